@@ -0,0 +1,226 @@
+import os
+from typing import Optional
+from agents.topic_agent import TopicAgent
+from agents.outline_agent import OutlineAgent
+from agents.article_pipeline import ArticlePipeline
+from agents.image_agent import ImageAgent
+from services.http_client import HttpClientPool
+from services.job_store import get_job_store
+from services.draft_store import get_draft_store
+from services.scheduler import current_tenant
+from services.checkpoints import get_checkpoints
+from services.metrics import metrics
+from models.article import FullArticleRequest, OutlineResponse, SectionContent
+from models.image import ImageResponse
+from models.topic import TopicResponse
+from models.draft import DraftCreate, DraftImageInput, DraftSectionInput
+from models.job import ArticleJobRequest, JobStatus, CANCELLED, FAILED, RUNNING, SUCCEEDED, TERMINAL_STATES
+
+# Share of overall progress each stage accounts for
+STAGE_WEIGHTS = {
+    "topics": 0.1,
+    "outline": 0.1,
+    "sections": 0.5,
+    "polish": 0.15,
+    "images": 0.15,
+}
+
+class JobCancelled(Exception):
+    pass
+
+class JobSuperseded(Exception):
+    """The job was retried; this runner belongs to an earlier attempt."""
+
+class ArticleJob:
+    """
+    The whole article flow for the job API: topic -> outline -> sections ->
+    polish -> images. Progress and each stage's partial result are written to
+    the job store as they happen; a job cancelled through the API stops at
+    the next checkpoint. Stage outputs are also checkpointed under the job ID,
+    so a retried job replays what already succeeded and resumes where it failed.
+    A runner left over from an earlier attempt stops at its next checkpoint
+    without writing.
+    """
+    def __init__(self, http_pool: Optional[HttpClientPool] = None):
+        self.store = get_job_store()
+        self.topic_agent = TopicAgent(http_pool)
+        self.outline_agent = OutlineAgent()
+        self.pipeline = ArticlePipeline()
+        self.image_agent = ImageAgent(http_pool)
+        self.checkpoints = get_checkpoints()
+
+    async def run(self, job_id: str, req: ArticleJobRequest, attempt: Optional[int] = None,
+                  owner: Optional[str] = None) -> Optional[JobStatus]:
+        """`owner` is the tenant the finished draft is saved under (X-Tenant-ID as given)."""
+        job = await self.store.load(job_id)
+        if job is None or job.state in TERMINAL_STATES:
+            return job
+        if attempt is not None and attempt != job.attempts:
+            metrics.incr("jobs.article.superseded") # A redelivered task of an earlier attempt
+            return job
+        if await self.store.is_cancelled(job_id):
+            # Cancelled before it started: record it, so the job can be retried
+            job.state = CANCELLED
+            await self.store.save(job)
+            return job
+        job.state = RUNNING
+        try:
+            await self._run_stages(job, req)
+            await self._save_draft(job, req, owner or current_tenant())
+            job.state = SUCCEEDED
+            job.stage = None
+            job.progress = 1.0
+            metrics.incr("jobs.article.succeeded")
+        except JobSuperseded:
+            metrics.incr("jobs.article.superseded")
+            return job
+        except JobCancelled:
+            metrics.incr("jobs.article.cancelled")
+            job.state = CANCELLED
+        except Exception as e:
+            print(f"Article Job Error ({job_id}): {e}")
+            job.state = FAILED
+            job.error = str(e)
+            metrics.incr("jobs.article.failed")
+        if await self.store.superseded(job):
+            metrics.incr("jobs.article.superseded")
+            return job
+        await self.store.save(job)
+        return job
+
+    async def _run_stages(self, job: JobStatus, req: ArticleJobRequest) -> None:
+        provider = req.model_provider
+        run_id = job.job_id
+
+        # 1. Topic: use the given title, or the top generated idea
+        await self._enter(job, "topics")
+        title, summary = req.topic_title, req.search_summary
+        ideas = None
+        if title is None:
+            topics = await self.checkpoints.memoize(
+                run_id, "topics", (req.keyword, provider),
+                lambda: self.topic_agent.generate_topics(req.keyword, provider),
+                model=TopicResponse, keep=lambda r: bool(r.topics),
+            )
+            if not topics.topics:
+                raise RuntimeError(f"No topic ideas were generated for '{req.keyword}'")
+            title = topics.topics[0].title
+            summary = summary or topics.search_summary
+            ideas = topics.model_dump()
+        job.results["topics"] = {"topic_title": title, "generated": ideas}
+        await self._finish(job, "topics")
+
+        # 2. Outline
+        await self._enter(job, "outline")
+        outline = await self.checkpoints.memoize(
+            run_id, "outline", (title, summary, provider),
+            lambda: self.outline_agent.generate_outline(title, summary, provider),
+            model=OutlineResponse, keep=lambda r: r != OutlineAgent.fallback(),
+        )
+        job.results["outline"] = outline.model_dump()
+        await self._finish(job, "outline")
+
+        # 3. Sections, reported one by one as they finish
+        await self._enter(job, "sections")
+        total = len(outline.sections)
+        written = [None] * total
+        job.results["sections"] = {"sections": written, "content": None}
+
+        async def on_section(index: int, section: SectionContent) -> None:
+            written[index] = section.model_dump()
+            done = sum(1 for s in written if s is not None)
+            job.progress = self._progress(job) + STAGE_WEIGHTS["sections"] * done / max(1, total)
+            await self._checkpoint(job)
+
+        article = await self.pipeline.write_article(FullArticleRequest(
+            topic=title,
+            outline=outline.sections,
+            context_summary=summary,
+            tone=req.tone,
+            model_provider=provider,
+            max_concurrency=req.max_concurrency,
+            run_id=run_id,
+        ), on_section=on_section)
+        job.results["sections"]["content"] = article.content
+        await self._finish(job, "sections")
+
+        # 4. Polish
+        if req.polish:
+            await self._enter(job, "polish")
+            polished = await self.checkpoints.memoize(
+                run_id, "polish", (article.content, req.polish_style, provider),
+                lambda: self.pipeline.polisher.polish_content(article.content, req.polish_style, provider),
+            )
+            job.results["polish"] = {"polished_content": polished}
+        await self._finish(job, "polish")
+
+        # 5. Illustrations for the first sections
+        if req.image_count:
+            await self._enter(job, "images")
+            job.results["images"] = []
+            for section in article.sections[:req.image_count]:
+                try:
+                    image = await self.checkpoints.memoize(
+                        run_id, "image", (section.content, req.image_style),
+                        lambda: self.image_agent.generate(section.content, req.image_style),
+                        # Remote placeholders stand in when the image backend is down; try again next time
+                        model=ImageResponse, keep=lambda r: r.url.startswith(self.image_agent.service.public_url_base),
+                    )
+                    job.results["images"].append({"section": section.title, **image.model_dump()})
+                except Exception as e:
+                    # The article stands without its illustrations
+                    print(f"Article Job Image Error ({job.job_id}): {e}")
+                    job.results["images"].append({"section": section.title, "error": str(e)})
+                await self._checkpoint(job)
+        await self._finish(job, "images")
+
+    async def _save_draft(self, job: JobStatus, req: ArticleJobRequest, owner: str) -> None:
+        """Keep the finished article as a draft (JOBS_SAVE_DRAFTS) so it can be edited and reused later."""
+        if os.getenv("JOBS_SAVE_DRAFTS", "1") != "1":
+            return
+        results = job.results
+        outline = results["outline"]["sections"]
+        written = results["sections"]["sections"]
+        try:
+            draft = await get_draft_store().create(owner, DraftCreate(
+                keyword=req.keyword,
+                topic_title=results["topics"]["topic_title"],
+                search_summary=(results["topics"]["generated"] or {}).get("search_summary") or req.search_summary,
+                topic_ideas=(results["topics"]["generated"] or {}).get("topics", []),
+                tone=req.tone,
+                model_provider=req.model_provider,
+                sections=[
+                    DraftSectionInput(**planned, content=(done or {}).get("content"))
+                    for planned, done in zip(outline, written)
+                ],
+                polished_content=results.get("polish", {}).get("polished_content"),
+                images=[
+                    DraftImageInput(url=image["url"], prompt=image["prompt"], section_position=i)
+                    for i, image in enumerate(results.get("images", [])) if "url" in image
+                ],
+            ))
+            job.draft_id = draft.id
+        except Exception as e:
+            # The job's own results still hold the article
+            print(f"Article Job Draft Error ({job.job_id}): {e}")
+            metrics.incr("jobs.article.draft_failed")
+
+    async def _enter(self, job: JobStatus, stage: str) -> None:
+        job.stage = stage
+        await self._checkpoint(job)
+
+    async def _finish(self, job: JobStatus, stage: str) -> None:
+        job.completed_stages.append(stage)
+        job.progress = self._progress(job)
+        await self._checkpoint(job)
+
+    async def _checkpoint(self, job: JobStatus) -> None:
+        if await self.store.superseded(job):
+            raise JobSuperseded()
+        if await self.store.is_cancelled(job.job_id):
+            raise JobCancelled()
+        await self.store.save(job)
+
+    @staticmethod
+    def _progress(job: JobStatus) -> float:
+        return round(sum(STAGE_WEIGHTS[s] for s in job.completed_stages), 3)
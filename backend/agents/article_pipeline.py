@@ -0,0 +1,98 @@
+import os
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+from agents.writer_agent import WriterAgent
+from agents.polishing_agent import PolishingAgent
+from services import deadline
+from services.metrics import metrics
+from services.checkpoints import get_checkpoints
+from models.article import FullArticleRequest, FullArticleResponse, OutlineSection, SectionContent
+
+class ArticlePipeline:
+    """
+    Writes every section of an outline concurrently, then optionally polishes
+    the whole article. With a run_id each section and the polish pass are
+    checkpointed, so retrying the run rewrites only what failed or changed.
+    """
+    def __init__(self):
+        self.writer = WriterAgent()
+        self.polisher = PolishingAgent()
+
+    async def write_article(self, req: FullArticleRequest, use_cache: bool = True,
+                            on_section: Optional[Callable[[int, SectionContent], Awaitable[None]]] = None) -> FullArticleResponse:
+        """`on_section(index, section)` is awaited as each section finishes, in completion order."""
+        checkpoints = get_checkpoints()
+        limit = req.max_concurrency or int(os.getenv("ARTICLE_MAX_CONCURRENCY", "3"))
+        semaphore = asyncio.Semaphore(max(1, limit))
+
+        async def write(index: int, section: OutlineSection) -> str:
+            async def compute() -> str:
+                async with semaphore:
+                    return await self.writer.write_section(
+                        section.title,
+                        self._section_brief(section),
+                        req.context_summary or req.topic,
+                        req.tone,
+                        req.model_provider,
+                        use_cache=use_cache
+                    )
+
+            inputs = (section.model_dump(), req.context_summary or req.topic, req.tone, req.model_provider)
+            content = await checkpoints.memoize(req.run_id, "section", inputs, compute)
+            if on_section is not None:
+                await on_section(index, SectionContent(title=section.title, content=content))
+            return content
+
+        # 1. Write all sections at once (bounded by the semaphore), keeping outline order
+        # A checkpointed run lets the other sections finish when one fails, so a retry only redoes that one
+        contents = await self._gather(*(write(i, s) for i, s in enumerate(req.outline)), settle=req.run_id is not None)
+        sections = [SectionContent(title=s.title, content=c) for s, c in zip(req.outline, contents)]
+        article = self._join(sections)
+
+        # 2. Optional polish pass over the assembled article
+        polished = None
+        left = deadline.remaining()
+        if req.polish and left is not None and left < float(os.getenv("DEADLINE_MIN_POLISH", "20")):
+            # Not enough time left for a whole-article pass: return the unpolished draft
+            metrics.incr("deadline.polish.skipped")
+        elif req.polish:
+            polished = await checkpoints.memoize(
+                req.run_id, "polish", (article, req.polish_style, req.model_provider),
+                lambda: self.polisher.polish_content(article, req.polish_style, req.model_provider, use_cache=use_cache),
+            )
+
+        return FullArticleResponse(
+            topic=req.topic,
+            sections=sections,
+            content=article,
+            polished_content=polished
+        )
+
+    @staticmethod
+    async def _gather(*coros, settle: bool = False) -> List:
+        # Unlike a bare gather, a failing (or cancelled) section cancels its siblings,
+        # unless `settle`: then they all run to completion before the first error is raised
+        tasks = [asyncio.ensure_future(c) for c in coros]
+        try:
+            if not settle:
+                return await asyncio.gather(*tasks)
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            return results
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    @staticmethod
+    def _section_brief(section: OutlineSection) -> str:
+        if not section.key_points:
+            return section.description
+        points = "\n".join(f"- {p}" for p in section.key_points)
+        return f"{section.description}\nKey points:\n{points}"
+
+    @staticmethod
+    def _join(sections: List[SectionContent]) -> str:
+        return "\n\n".join(f"## {s.title}\n\n{s.content}" for s in sections)
@@ -1,17 +1,18 @@
+from typing import Optional
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from services.llm_provider import LLMProvider
+from services.llm_runner import LLMRunner
+from services.context_packer import ContextPacker
 from services.image_service import ImageService
+from services.http_client import HttpClientPool
 from models.image import ImageResponse
 
 class ImageAgent:
-    def __init__(self):
-        self.service = ImageService()
+    def __init__(self, http_pool: Optional[HttpClientPool] = None):
+        self.service = ImageService(http_pool)
 
-    async def generate(self, context: str, style: str) -> ImageResponse:
+    async def generate(self, context: str, style: str, use_cache: bool = True) -> ImageResponse:
         # 1. Generate Prompt
-        llm = LLMProvider.get_model("gemini")
-        
         prompt_template = ChatPromptTemplate.from_template(
             """Create a detailed English image generation prompt for DALL-E based on this article section.
             Context: {context}
@@ -21,8 +22,11 @@ class ImageAgent:
             """
         )
         
-        chain = prompt_template | llm | StrOutputParser()
-        image_prompt = await chain.ainvoke({"context": context[:1000], "style": style})
+        image_prompt = await LLMRunner.invoke(
+            "image_prompt", prompt_template, StrOutputParser(), "gemini", temperature=0.7,
+            inputs={"context": ContextPacker("gemini").pack_text("", context, ContextPacker.budget("image_prompt")), "style": style},
+            use_cache=use_cache
+        )
         
         # 2. Generate Image
         url = await self.service.generate_image(image_prompt)
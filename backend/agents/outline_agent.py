@@ -1,11 +1,71 @@
+from typing import AsyncIterator, Dict, Tuple
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from services.llm_provider import LLMProvider
+from services.llm_runner import LLMRunner
+from services.semantic_cache import get_semantic_cache
+from services.context_packer import ContextPacker
+from pydantic import ValidationError
 from models.article import OutlineSection, OutlineResponse
 
 class OutlineAgent:
-    async def generate_outline(self, topic: str, context: str, provider: str = "gemini") -> OutlineResponse:
-        llm = LLMProvider.get_model(provider, temperature=0.7)
+    async def generate_outline(self, topic: str, context: str, provider: str = "gemini", use_cache: bool = True) -> OutlineResponse:
+        semantic_cache = get_semantic_cache()
+        namespace = f"outline:{provider}"
+        if use_cache:
+            cached = await semantic_cache.lookup(namespace, topic)
+            if cached is not None:
+                return OutlineResponse(**cached)
+
+        prompt, inputs = self._build_prompt(topic, context, provider)
+        
+        try:
+            result = await LLMRunner.invoke("outline", prompt, JsonOutputParser(), provider, temperature=0.7, inputs=inputs, use_cache=use_cache)
+            sections_data = result.get("sections", [])
+            sections = [OutlineSection(**s) for s in sections_data]
+            response = OutlineResponse(sections=sections)
+            if sections:
+                await semantic_cache.store(namespace, topic, response.model_dump())
+            return response
+        except Exception as e:
+            print(f"Outline Gen Error: {e}")
+            return self.fallback()
+
+    @staticmethod
+    def fallback() -> OutlineResponse:
+        """The generic outline returned when generation fails."""
+        return OutlineResponse(sections=[
+            OutlineSection(title="Introduction", description="Introduce the topic", key_points=[]),
+            OutlineSection(title="Main Analysis", description="Analyze the core details", key_points=[]),
+            OutlineSection(title="Conclusion", description="Wrap up", key_points=[])
+        ])
+
+    async def stream_outline(self, topic: str, context: str, provider: str = "gemini", use_cache: bool = True) -> AsyncIterator[OutlineSection]:
+        """Yield each section as soon as the model has finished writing it. Items that fail validation are skipped."""
+        semantic_cache = get_semantic_cache()
+        namespace = f"outline:{provider}"
+        if use_cache:
+            cached = await semantic_cache.lookup(namespace, topic)
+            if cached is not None:
+                for section in OutlineResponse(**cached).sections:
+                    yield section
+                return
+
+        prompt, inputs = self._build_prompt(topic, context, provider)
+        sections = []
+        async for item in LLMRunner.stream_json("outline", prompt, "sections", provider, temperature=0.7, inputs=inputs, use_cache=use_cache):
+            try:
+                section = OutlineSection(**item)
+            except ValidationError as e:
+                print(f"Outline Stream: skipping invalid section: {e}")
+                continue
+            sections.append(section)
+            yield section
+
+        if sections:
+            await semantic_cache.store(namespace, topic, OutlineResponse(sections=sections).model_dump())
+
+    def _build_prompt(self, topic: str, context: str, provider: str) -> Tuple[ChatPromptTemplate, Dict[str, str]]:
+        context = ContextPacker(provider).pack_text(topic, context, ContextPacker.budget("outline"))
         
         system_prompt = """You are an expert Content Architect for WeChat Official Accounts.
         Your task is to structure a viral article based on a topic and context.
@@ -17,10 +77,11 @@ class OutlineAgent:
         3. Conclusion/Call to Action
         
         Output JSON format: 
-        { "sections": [ {"title": "...", "description": "...", "key_points": ["point1", "point2"]} ] }
+        {{ "sections": [ {{"title": "...", "description": "...", "key_points": ["point1", "point2"]}} ] }}
         """
         
-        user_prompt = f"""
+        # Topic and context go in as variables, not formatted into the template: they may contain braces
+        user_prompt = """
         Topic: {topic}
         Context Info: {context}
         
@@ -31,19 +92,4 @@ class OutlineAgent:
             ("system", system_prompt),
             ("user", user_prompt)
         ])
-        
-        chain = prompt | llm | JsonOutputParser()
-        
-        try:
-            result = await chain.ainvoke({})
-            sections_data = result.get("sections", [])
-            sections = [OutlineSection(**s) for s in sections_data]
-            return OutlineResponse(sections=sections)
-        except Exception as e:
-            print(f"Outline Gen Error: {e}")
-            # Fallback
-            return OutlineResponse(sections=[
-                OutlineSection(title="Introduction", description="Introduce the topic", key_points=[]),
-                OutlineSection(title="Main Analysis", description="Analyze the core details", key_points=[]),
-                OutlineSection(title="Conclusion", description="Wrap up", key_points=[])
-            ])
+        return prompt, {"topic": topic, "context": context}
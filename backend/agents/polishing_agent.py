@@ -1,11 +1,23 @@
+from typing import AsyncIterator
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from services.llm_provider import LLMProvider
+from langchain_core.messages import BaseMessageChunk
+from services.llm_runner import LLMRunner
 
 class PolishingAgent:
-    async def polish_content(self, content: str, style: str = "Conversational", provider: str = "gemini") -> str:
-        llm = LLMProvider.get_model(provider, temperature=0.8) # Higher temp for creativity
+    async def polish_content(self, content: str, style: str = "Conversational", provider: str = "gemini", use_cache: bool = True) -> str:
+        prompt = self._build_prompt()
         
+        # Higher temp for creativity
+        return await LLMRunner.invoke("polish", prompt, StrOutputParser(), provider, temperature=0.8, inputs={"style": style, "content": content}, use_cache=use_cache)
+
+    def stream_polish(self, content: str, style: str = "Conversational", provider: str = "gemini") -> AsyncIterator[BaseMessageChunk]:
+        """Same prompt as polish_content, but yields message chunks as the model produces them."""
+        prompt = self._build_prompt()
+        
+        return LLMRunner.stream("polish", prompt, provider, temperature=0.8, inputs={"style": style, "content": content})
+
+    def _build_prompt(self) -> ChatPromptTemplate:
         system_prompt = """You are a professional Editor for WeChat Official Accounts.
         Your goal is to "Humanize" AI-generated text.
         
@@ -19,18 +31,15 @@ class PolishingAgent:
         Target Style: {style}
         """
         
-        user_prompt = f"""
+        # The article goes in as a variable, not formatted into the template: it may contain braces
+        user_prompt = """
         Original Text:
         {content}
         
         Rewrite this text to sound more human and engaging. Keep the formatting (Markdown).
         """
         
-        prompt = ChatPromptTemplate.from_messages([
+        return ChatPromptTemplate.from_messages([
             ("system", system_prompt),
             ("user", user_prompt)
         ])
-        
-        chain = prompt | llm | StrOutputParser()
-        
-        return await chain.ainvoke({"style": style})
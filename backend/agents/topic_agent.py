@@ -1,71 +1,101 @@
+import os
 import json
-from typing import List
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import ValidationError
 
 from services.search_service import SearchService
-from services.llm_provider import LLMProvider
+from services.http_client import HttpClientPool
+from services.llm_runner import LLMRunner
+from services.semantic_cache import get_semantic_cache
+from services.context_packer import ContextPacker
 from models.topic import TopicResponse, TopicIdea, SearchResult
 
 class TopicAgent:
-    def __init__(self):
-        self.search_service = SearchService()
+    def __init__(self, http_pool: Optional[HttpClientPool] = None):
+        self.search_service = SearchService(http_pool)
+
+    async def generate_topics(self, keyword: str, provider: str = "gemini", use_cache: bool = True) -> TopicResponse:
+        # 0. Near-identical keywords reuse a previous generation (skips search and LLM)
+        if use_cache:
+            cached = await self._lookup_similar(keyword, provider)
+            if cached is not None:
+                return cached
 
-    async def generate_topics(self, keyword: str, provider: str = "gemini") -> TopicResponse:
         # 1. Search Web
         search_results = await self.search_service.search(keyword)
         
-        # 2. Prepare Context
-        context_text = "\n\n".join([f"Title: {r.title}\nContent: {r.content}" for r in search_results])
-        if not context_text:
-            context_text = "No recent external information found. Rely on internal knowledge."
+        return await self.generate_from_results(keyword, search_results, provider, use_cache)
 
-        # 3. Setup LLM & Prompt
-        llm = LLMProvider.get_model(provider, temperature=0.8)
-        
-        system_prompt = """You are a professional WeChat Official Account Editor-in-Chief. 
-        Your goal is to brainstorm viral article topics based on a keyword and recent web search results.
-        
-        Output format must be a JSON object with this key: 'topics': [ {'title': '...', 'rationale': '...', 'angle': '...'} ]
-        
-        The 'title' should be catchy, click-baity but professional, typical Chinese WeChat style.
-        The 'angle' can be: 'Deep Analysis', 'Emotional', 'Financial/Career', 'News Report'.
+    async def generate_batch(self, keywords: List[str], provider: str = "gemini", use_cache: bool = True,
+                             max_concurrency: Optional[int] = None) -> AsyncIterator[Tuple[str, Union[TopicResponse, Exception]]]:
         """
-        
-        user_prompt = f"""
-        Keyword: {keyword}
-        
-        Recent Search Context:
-        {context_text}
-        
-        Task: Generate 5 unique topic ideas compatible with the keyword and context.
+        Generate topics for many keywords, yielding (keyword, result-or-error) as each one finishes.
+        Searches fan out under a concurrency cap; the LLM calls queue behind the provider rate limits.
         """
+        limit = max_concurrency or int(os.getenv("TOPIC_BATCH_SEARCH_CONCURRENCY", "8"))
+        search_slots = asyncio.Semaphore(max(1, limit))
+
+        async def one(keyword: str) -> Tuple[str, Union[TopicResponse, Exception]]:
+            try:
+                if use_cache:
+                    cached = await self._lookup_similar(keyword, provider)
+                    if cached is not None:
+                        return keyword, cached
+                async with search_slots:
+                    search_results = await self.search_service.search(keyword)
+                # Errors are raised, not folded into a fallback, so they are reported against the keyword
+                result = await self.generate_from_results(keyword, search_results, provider, use_cache, raise_errors=True)
+                if not result.topics:
+                    raise ValueError(f"No topic ideas were generated for '{keyword}'")
+                return keyword, result
+            except Exception as e:
+                # One bad keyword must not sink the batch
+                print(f"Topic Batch Error ({keyword}): {e}")
+                return keyword, e
+
+        tasks = [asyncio.ensure_future(one(k)) for k in dict.fromkeys(keywords)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _lookup_similar(self, keyword: str, provider: str) -> Optional[TopicResponse]:
+        cached = await get_semantic_cache().lookup(f"topics:{provider}", keyword)
+        return TopicResponse(**cached) if cached is not None else None
+
+    async def generate_from_results(self, keyword: str, search_results: List[SearchResult],
+                                    provider: str = "gemini", use_cache: bool = True, raise_errors: bool = False) -> TopicResponse:
+        """Topic ideas from search results. Errors give an empty fallback response unless `raise_errors`."""
+        prompt, inputs = self._build_prompt(keyword, search_results, provider)
+        context_text = inputs["context"]
         
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
-            ("user", user_prompt)
-        ])
-        
-        # 4. Chain Execution
-        chain = prompt | llm | JsonOutputParser()
-        
+        # 4. Chain Execution (served from the response cache when the rendered prompt repeats)
         try:
-            result = await chain.ainvoke({})
+            result = await LLMRunner.invoke("topics", prompt, JsonOutputParser(), provider, temperature=0.8, inputs=inputs, use_cache=use_cache)
             # Parse result into Pydantic models
             topics_data = result.get("topics", [])
             topics = [TopicIdea(**t) for t in topics_data]
             
             # Generate a brief summary of the search context
-            summary = self._generate_summary(context_text, llm) # Optional: separate call or simple string
+            summary = self._generate_summary(context_text) # Optional: separate call or simple string
             
-            return TopicResponse(
+            response = TopicResponse(
                 search_summary=summary,
                 sources=search_results,
                 topics=topics
             )
+            if topics:
+                await get_semantic_cache().store(f"topics:{provider}", keyword, response.model_dump())
+            return response
             
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Topic Generation Error: {e}")
             # Fallback
             return TopicResponse(
@@ -74,6 +104,76 @@ class TopicAgent:
                 topics=[]
             )
 
-    def _generate_summary(self, context: str, llm) -> str:
+    async def stream_topics(self, keyword: str, provider: str = "gemini", use_cache: bool = True) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Yield ("sources", results) once the search is done, ("topic", TopicIdea)
+        as each idea's JSON object closes, then ("done", TopicResponse). Ideas
+        that fail validation are skipped.
+        """
+        if use_cache:
+            cached = await self._lookup_similar(keyword, provider)
+            if cached is not None:
+                yield "sources", cached.sources
+                for idea in cached.topics:
+                    yield "topic", idea
+                yield "done", cached
+                return
+
+        search_results = await self.search_service.search(keyword)
+        yield "sources", search_results
+
+        prompt, inputs = self._build_prompt(keyword, search_results, provider)
+        context_text = inputs["context"]
+        topics = []
+        async for item in LLMRunner.stream_json("topics", prompt, "topics", provider, temperature=0.8, inputs=inputs, use_cache=use_cache):
+            try:
+                idea = TopicIdea(**item)
+            except ValidationError as e:
+                print(f"Topic Stream: skipping invalid idea: {e}")
+                continue
+            topics.append(idea)
+            yield "topic", idea
+
+        response = TopicResponse(search_summary=self._generate_summary(context_text), sources=search_results, topics=topics)
+        if topics:
+            await get_semantic_cache().store(f"topics:{provider}", keyword, response.model_dump())
+        yield "done", response
+
+    def _build_prompt(self, keyword: str, search_results: List[SearchResult], provider: str) -> Tuple[ChatPromptTemplate, Dict[str, str]]:
+        # 2. Prepare Context (most relevant results first, within the prompt token budget)
+        snippets = [f"Title: {r.title}\nContent: {r.content}" for r in search_results]
+        snippets = ContextPacker(provider).pack(keyword, snippets, ContextPacker.budget("topics"))
+        context_text = "\n\n".join(snippets)
+        if not context_text:
+            context_text = "No recent external information found. Rely on internal knowledge."
+
+        # 3. Setup Prompt
+        system_prompt = """You are a professional WeChat Official Account Editor-in-Chief. 
+        Your goal is to brainstorm viral article topics based on a keyword and recent web search results.
+        
+        Output format must be a JSON object with this key: 'topics': [ {{'title': '...', 'rationale': '...', 'angle': '...'}} ]
+        
+        The 'title' should be catchy, click-baity but professional, typical Chinese WeChat style.
+        The 'angle' can be: 'Deep Analysis', 'Emotional', 'Financial/Career', 'News Report'.
+        """
+        
+        # Keyword and search text go in as variables, not formatted into the template: web content often has braces
+        user_prompt = """
+        Keyword: {keyword}
+        
+        Recent Search Context:
+        {context}
+        
+        Task: Generate 5 unique topic ideas compatible with the keyword and context.
+        """
+        
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", system_prompt),
+            ("user", user_prompt)
+        ])
+        
+        return prompt, {"keyword": keyword, "context": context_text}
+
+    def _generate_summary(self, context: str) -> str:
         # Simple placeholder for now to save tokens/time, or implemented if needed
         return "Based on search results regarding " + context[:50] + "..."
@@ -1,12 +1,32 @@
+from typing import AsyncIterator, Dict, Tuple
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from services.llm_provider import LLMProvider
+from langchain_core.messages import BaseMessageChunk
+from services.llm_runner import LLMRunner
+from services.context_packer import ContextPacker
 
 class WriterAgent:
-    async def write_section(self, section_title: str, section_brief: str, context: str, tone: str, provider: str = "gemini") -> str:
-        llm = LLMProvider.get_model(provider, temperature=0.7)
+    async def write_section(self, section_title: str, section_brief: str, context: str, tone: str, provider: str = "gemini", use_cache: bool = True) -> str:
+        context = self._pack_context(section_title, section_brief, context, provider)
+        prompt, inputs = self._build_prompt(section_title, section_brief, context, tone)
         
-        system_prompt = f"""You are a top-tier Columnist. Write one specific section of an article.
+        return await LLMRunner.invoke("write_section", prompt, StrOutputParser(), provider, temperature=0.7, inputs=inputs, use_cache=use_cache)
+
+    def stream_section(self, section_title: str, section_brief: str, context: str, tone: str, provider: str = "gemini") -> AsyncIterator[BaseMessageChunk]:
+        """Same prompt as write_section, but yields message chunks as the model produces them."""
+        context = self._pack_context(section_title, section_brief, context, provider)
+        prompt, inputs = self._build_prompt(section_title, section_brief, context, tone)
+        
+        return LLMRunner.stream("write_section", prompt, provider, temperature=0.7, inputs=inputs)
+
+    def _pack_context(self, section_title: str, section_brief: str, context: str, provider: str) -> str:
+        # Keep the background most relevant to this section, within the prompt token budget
+        query = f"{section_title} {section_brief}"
+        return ContextPacker(provider).pack_text(query, context, ContextPacker.budget("write_section"))
+
+    def _build_prompt(self, section_title: str, section_brief: str, context: str, tone: str) -> Tuple[ChatPromptTemplate, Dict[str, str]]:
+        # Everything request-supplied goes in as a variable, not formatted into the template: it may contain braces
+        system_prompt = """You are a top-tier Columnist. Write one specific section of an article.
         
         Tone: {tone}
         Style rules:
@@ -16,7 +36,7 @@ class WriterAgent:
         - Output Markdown format.
         """
         
-        user_prompt = f"""
+        user_prompt = """
         Section Title: {section_title}
         Section Goal: {section_brief}
         Background Context: {context}
@@ -28,7 +48,4 @@ class WriterAgent:
             ("system", system_prompt),
             ("user", user_prompt)
         ])
-        
-        chain = prompt | llm | StrOutputParser()
-        
-        return await chain.ainvoke({})
+        return prompt, {"tone": tone, "section_title": section_title, "section_brief": section_brief, "context": context}
@@ -1,21 +1,52 @@
-from models.article import OutlineRequest, OutlineResponse, WriteSectionRequest, WriteSectionResponse
+import time
+from fastapi import APIRouter, Depends, HTTPException
+from models.article import OutlineRequest, OutlineResponse, WriteSectionRequest, WriteSectionResponse, FullArticleRequest, FullArticleResponse
 from models.polish import PolishRequest, PolishResponse
 from agents.outline_agent import OutlineAgent
 from agents.writer_agent import WriterAgent
 from agents.polishing_agent import PolishingAgent
+from agents.article_pipeline import ArticlePipeline
+from services.streaming import sse_event, sse_response, sse_token_stream
+from services.deadline import DeadlineExceeded
+from api.deps import use_cache, tenant_id, session_id
+from services.prefetch import get_prefetcher
 
 router = APIRouter(prefix="/api/articles", tags=["articles"])
 
 @router.post("/outline", response_model=OutlineResponse)
-async def generate_outline(req: OutlineRequest):
+async def generate_outline(req: OutlineRequest, cache: bool = Depends(use_cache),
+                           tenant: str = Depends(tenant_id), session: str = Depends(session_id)):
+    get_prefetcher().claim(tenant, session, req.topic_title, req.search_summary, req.model_provider)
     agent = OutlineAgent()
     try:
-        return await agent.generate_outline(req.topic_title, req.search_summary, req.model_provider)
+        return await agent.generate_outline(req.topic_title, req.search_summary, req.model_provider, use_cache=cache)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/outline/stream")
+async def generate_outline_stream(req: OutlineRequest, cache: bool = Depends(use_cache),
+                                  tenant: str = Depends(tenant_id), session: str = Depends(session_id)):
+    """Server-Sent Events: one `section` event per outline section as soon as it is complete, then `done`."""
+    get_prefetcher().claim(tenant, session, req.topic_title, req.search_summary, req.model_provider)
+    agent = OutlineAgent()
+
+    async def events():
+        started = time.perf_counter()
+        count = 0
+        try:
+            async for section in agent.stream_outline(req.topic_title, req.search_summary, req.model_provider, use_cache=cache):
+                yield sse_event("section", {"index": count, "section": section.model_dump()})
+                count += 1
+        except Exception as e:
+            print(f"Outline Stream Error: {e}")
+            yield sse_event("error", {"detail": str(e)})
+            return
+        yield sse_event("done", {"sections": count, "duration_ms": round((time.perf_counter() - started) * 1000)})
+
+    return sse_response(events())
+
 @router.post("/write_section", response_model=WriteSectionResponse)
-async def write_section(req: WriteSectionRequest):
+async def write_section(req: WriteSectionRequest, cache: bool = Depends(use_cache)):
     agent = WriterAgent()
     try:
         content = await agent.write_section(
@@ -23,17 +54,50 @@ async def write_section(req: WriteSectionRequest):
             req.section_description, 
             req.context_summary, 
             req.tone, 
-            req.model_provider
+            req.model_provider,
+            use_cache=cache
         )
         return WriteSectionResponse(content=content)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/write_section/stream")
+async def write_section_stream(req: WriteSectionRequest):
+    agent = WriterAgent()
+    chunks = agent.stream_section(
+        req.section_title,
+        req.section_description,
+        req.context_summary,
+        req.tone,
+        req.model_provider
+    )
+    return sse_response(sse_token_stream(chunks))
+
+@router.post("/write_full", response_model=FullArticleResponse)
+async def write_full_article(req: FullArticleRequest, cache: bool = Depends(use_cache)):
+    pipeline = ArticlePipeline()
+    try:
+        return await pipeline.write_article(req, use_cache=cache)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/polish", response_model=PolishResponse)
-async def polish_content(req: PolishRequest):
+async def polish_content(req: PolishRequest, cache: bool = Depends(use_cache)):
     agent = PolishingAgent()
     try:
-        res = await agent.polish_content(req.content, req.style, req.model_provider)
+        res = await agent.polish_content(req.content, req.style, req.model_provider, use_cache=cache)
         return PolishResponse(polished_content=res)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/polish/stream")
+async def polish_content_stream(req: PolishRequest):
+    agent = PolishingAgent()
+    chunks = agent.stream_polish(req.content, req.style, req.model_provider)
+    return sse_response(sse_token_stream(chunks))
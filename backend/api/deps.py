@@ -0,0 +1,21 @@
+from typing import Optional
+from fastapi import Header
+
+def use_cache(
+    x_cache_bypass: Optional[str] = Header(None),
+    cache_control: Optional[str] = Header(None),
+) -> bool:
+    """False when the client asks to skip the response cache (`X-Cache-Bypass: 1` or `Cache-Control: no-cache`)."""
+    if x_cache_bypass and x_cache_bypass.lower() not in ("0", "false", "no"):
+        return False
+    if cache_control and "no-cache" in cache_control.lower():
+        return False
+    return True
+
+def tenant_id(x_tenant_id: Optional[str] = Header(None)) -> str:
+    """Who the request is billed to for shared budgets; requests without the header share one."""
+    return (x_tenant_id or "anonymous").strip()[:64] or "anonymous"
+
+def session_id(x_session_id: Optional[str] = Header(None)) -> str:
+    """The editor session (one browser tab's workflow); empty when the client doesn't send it."""
+    return (x_session_id or "").strip()[:128]
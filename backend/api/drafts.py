@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException
+from models.article import FullArticleResponse
+from models.draft import DraftCreate, DraftPatch, DraftSaveResult, DraftSectionView, DraftView
+from services.draft_store import DraftConflict, DraftStore, get_draft_store
+from api.deps import tenant_id
+
+router = APIRouter(prefix="/api/drafts", tags=["drafts"])
+
+@router.post("", response_model=DraftView, status_code=201)
+async def create_draft(req: DraftCreate, store: DraftStore = Depends(get_draft_store), tenant: str = Depends(tenant_id)):
+    try:
+        return await store.create(tenant, req)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{draft_id}", response_model=DraftView)
+async def get_draft(draft_id: str, store: DraftStore = Depends(get_draft_store), tenant: str = Depends(tenant_id)):
+    """The draft with its section headers; section texts are fetched one at a time."""
+    draft = await store.get(tenant, draft_id)
+    if draft is None:
+        raise HTTPException(status_code=404, detail="Draft not found")
+    return draft
+
+@router.get("/{draft_id}/sections/{position}", response_model=DraftSectionView)
+async def get_draft_section(draft_id: str, position: int, store: DraftStore = Depends(get_draft_store), tenant: str = Depends(tenant_id)):
+    section = await store.get_section(tenant, draft_id, position)
+    if section is None:
+        raise HTTPException(status_code=404, detail="Section not found")
+    return section
+
+@router.patch("/{draft_id}", response_model=DraftSaveResult)
+async def autosave_draft(draft_id: str, patch: DraftPatch, store: DraftStore = Depends(get_draft_store), tenant: str = Depends(tenant_id)):
+    """Autosave: send only the fields and sections that changed. A stale `version` is answered with 409."""
+    try:
+        result = await store.save(tenant, draft_id, patch)
+    except DraftConflict as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "current_version": e.current_version})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Draft not found")
+    return result
+
+@router.get("/{draft_id}/article", response_model=FullArticleResponse)
+async def export_draft(draft_id: str, store: DraftStore = Depends(get_draft_store), tenant: str = Depends(tenant_id)):
+    """The whole article as one document."""
+    article = await store.assemble(tenant, draft_id)
+    if article is None:
+        raise HTTPException(status_code=404, detail="Draft not found")
+    return article
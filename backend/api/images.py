@@ -1,14 +1,19 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.staticfiles import StaticFiles
 from models.image import ImageRequest, ImageResponse
 from agents.image_agent import ImageAgent
+from services.deadline import DeadlineExceeded
+from api.deps import use_cache
+from services.http_client import HttpClientPool, get_http_pool
 
 router = APIRouter(prefix="/api/images", tags=["images"])
 
 @router.post("/generate", response_model=ImageResponse)
-async def generate_image_api(req: ImageRequest):
-    agent = ImageAgent()
+async def generate_image_api(req: ImageRequest, cache: bool = Depends(use_cache), http_pool: HttpClientPool = Depends(get_http_pool)):
+    agent = ImageAgent(http_pool)
     try:
-        return await agent.generate(req.article_context, req.style)
+        return await agent.generate(req.article_context, req.style, use_cache=cache)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,134 @@
+import os
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from models.job import ArticleJobRequest, JobStatus, JobSubmitResponse, CANCELLED, FAILED, QUEUED, RUNNING, TERMINAL_STATES
+from services.job_store import JobStore, get_job_store
+from api.deps import tenant_id
+from services.streaming import sse_event, sse_response
+from services import deadline
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+# Inline jobs (JOBS_BACKEND=inline) run on the API's own loop; strong refs keep them alive
+_inline_jobs = set()
+
+@router.post("/articles", response_model=JobSubmitResponse, status_code=202)
+async def submit_article_job(req: ArticleJobRequest, store: JobStore = Depends(get_job_store), tenant: str = Depends(tenant_id)):
+    """Queue a full article (topic -> outline -> sections -> polish -> images) and return its job ID at once."""
+    _require_reachable_store(store)
+    job = await store.create("article", request=req.model_dump())
+    return await _dispatch(job, req, store, tenant)
+
+@router.post("/{job_id}/retry", response_model=JobSubmitResponse, status_code=202)
+async def retry_article_job(job_id: str, store: JobStore = Depends(get_job_store), tenant: str = Depends(tenant_id)):
+    """Run a failed or cancelled job again. Stages that already succeeded are replayed from their checkpoints."""
+    # The stored state, not the cancel flag: a cancelled runner may still be finishing a stage
+    job = await store.load(job_id)
+    if job is None or job.request is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    cancelled = await store.is_cancelled(job_id)
+    if cancelled and job.state == RUNNING:
+        raise HTTPException(status_code=409, detail="Job is still stopping after its cancel; retry once it is cancelled")
+    # A job cancelled while still queued never had a runner to record it
+    if job.state not in (FAILED, CANCELLED) and not (cancelled and job.state == QUEUED):
+        raise HTTPException(status_code=409, detail=f"Job is {job.state}; only failed or cancelled jobs can be retried")
+    _require_reachable_store(store)
+    job.state = QUEUED
+    job.stage = None
+    job.progress = 0.0
+    job.results = {}
+    job.completed_stages = []
+    job.error = None
+    job.attempts += 1
+    await store.save(job) # Supersedes any runner of the previous attempt
+    await store.clear_cancel(job_id)
+    return await _dispatch(job, ArticleJobRequest(**job.request), store, tenant)
+
+def _require_reachable_store(store: JobStore) -> None:
+    # Celery workers run in other processes: without REDIS_URL they'd never see the job, and it would stay queued forever
+    if os.getenv("JOBS_BACKEND", "celery") != "inline" and not store.is_shared:
+        raise HTTPException(status_code=503, detail="JOBS_BACKEND=celery needs REDIS_URL for the job store; set it or use JOBS_BACKEND=inline")
+
+async def _dispatch(job: JobStatus, req: ArticleJobRequest, store: JobStore, tenant: str) -> JobSubmitResponse:
+    if os.getenv("JOBS_BACKEND", "celery") == "inline":
+        # Single-process dev mode: no broker or separate worker needed
+        from agents.article_job import ArticleJob
+        task = deadline.detached_task(ArticleJob().run(job.job_id, req, job.attempts, owner=tenant))
+        _inline_jobs.add(task)
+        task.add_done_callback(_inline_jobs.discard)
+    else:
+        from tasks.articles import generate_article
+        try:
+            generate_article.apply_async(args=[job.job_id, req.model_dump(), tenant, job.attempts], task_id=store.task_id(job))
+        except Exception as e:
+            job.state = FAILED
+            job.error = f"Could not queue job: {e}"
+            await store.save(job)
+            raise HTTPException(status_code=503, detail=job.error)
+    return JobSubmitResponse(
+        job_id=job.job_id,
+        state=job.state,
+        status_url=f"/api/jobs/{job.job_id}",
+        events_url=f"/api/jobs/{job.job_id}/events",
+    )
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, store: JobStore = Depends(get_job_store)):
+    job = await store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, store: JobStore = Depends(get_job_store)):
+    """
+    Server-Sent Events: `progress` on every update, `section` as each section
+    is written, `stage` with each stage's result once it completes, then
+    `done` with the final status.
+    """
+    if await store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    interval = float(os.getenv("JOB_EVENTS_POLL_INTERVAL", "0.5"))
+
+    async def events():
+        last_update = None
+        reported = set()
+        sections_sent = set()
+        while True:
+            job = await store.get(job_id)
+            if job is None:
+                yield sse_event("error", {"detail": "Job expired"})
+                return
+            if job.updated_at != last_update:
+                last_update = job.updated_at
+                yield sse_event("progress", {"state": job.state, "stage": job.stage, "progress": job.progress})
+                # Sections arrive one at a time, ahead of the sections stage completing
+                for index, section in enumerate((job.results.get("sections") or {}).get("sections") or []):
+                    if section is not None and index not in sections_sent:
+                        sections_sent.add(index)
+                        yield sse_event("section", {"index": index, "section": section})
+                for stage in job.completed_stages:
+                    if stage not in reported:
+                        reported.add(stage)
+                        yield sse_event("stage", {"stage": stage, "result": job.results.get(stage)})
+            if job.state in TERMINAL_STATES:
+                yield sse_event("done", job.model_dump())
+                return
+            await asyncio.sleep(interval)
+
+    return sse_response(events())
+
+@router.delete("/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str, store: JobStore = Depends(get_job_store)):
+    """Cancel a job. A running job stops at its next checkpoint; finished jobs are left as they are."""
+    job = await store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.state not in TERMINAL_STATES:
+        # A flag of its own, not a write to the job document the runner keeps saving
+        await store.request_cancel(job_id)
+        job.state = CANCELLED
+        if os.getenv("JOBS_BACKEND", "celery") != "inline":
+            from celery_app import celery_app
+            celery_app.control.revoke(store.task_id(job)) # Drops it if still queued
+    return job
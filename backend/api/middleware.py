@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import asyncio
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services import deadline
+from services.admission import Shed, get_admission
+from services.scheduler import class_for_path, known_tenant, work_context
+from services.metrics import metrics
+
+def route_template(scope: Scope) -> str:
+    """
+    The matched route's path template ("jobs/{job_id}"), for metric names: raw
+    paths carry job and draft IDs. The router records the route on the scope
+    once it matches, so this is only known inside or after the handler.
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path.removeprefix("/api/") if path else "unmatched"
+
+class CancelOnDisconnectMiddleware:
+    """
+    Cancels the route handler when the client goes away mid-request (closed
+    tab, "regenerate"). Cancellation propagates into the agent call and its
+    fan-out tasks, so abandoned LLM work stops and frees its slot.
+    """
+    def __init__(self, app: ASGIApp, path_prefix: str = "/api/"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        response_complete = False
+        disconnected = False
+
+        async def tracked_send(message: Message) -> None:
+            nonlocal response_complete
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        handler = asyncio.ensure_future(self.app(scope, queue.get, tracked_send))
+
+        async def pump() -> None:
+            # Forward client messages to the app and watch for an early disconnect
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                await queue.put(message)
+                if message["type"] == "http.disconnect":
+                    if not response_complete and not handler.done():
+                        disconnected = True
+                        metrics.incr(f"cancelled.{route_template(scope)}")
+                        handler.cancel()
+                    return
+
+        watcher = asyncio.ensure_future(pump())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not disconnected:
+                raise # We were cancelled ourselves, not by the client leaving
+        finally:
+            watcher.cancel()
+            if not handler.done():
+                handler.cancel()
+
+class DeadlineMiddleware:
+    """
+    Gives each API request a deadline (X-Request-Timeout header, else the
+    per-endpoint default) that the search, LLM and image stages read to size
+    their own timeouts. As a backstop, a handler still running
+    REQUEST_DEADLINE_GRACE seconds past it is cancelled and answered with a
+    504 if no response has started.
+    """
+    def __init__(self, app: ASGIApp, path_prefix: str = "/api/"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        requested = headers.get(b"x-request-timeout")
+        seconds = deadline.for_path(scope["path"], requested.decode("latin-1") if requested else None)
+        if seconds is None:
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def tracked_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        grace = float(os.getenv("REQUEST_DEADLINE_GRACE", "2"))
+        with deadline.scope(seconds):
+            try:
+                await asyncio.wait_for(self.app(scope, receive, tracked_send), timeout=seconds + grace)
+            except asyncio.TimeoutError:
+                metrics.incr(f"deadline.{route_template(scope)}.timeout")
+                if response_started:
+                    return # Mid-stream; all we can do is stop
+                body = json.dumps({"detail": f"Request exceeded its {seconds:g}s deadline"}).encode()
+                await send({"type": "http.response.start", "status": 504,
+                            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+                await send({"type": "http.response.body", "body": body})
+
+class SchedulingMiddleware:
+    """
+    Tags each API request's LLM work with its tenant (X-Tenant-ID, if it is
+    listed in TENANTS) and work class (by path: batch endpoints are bulk, the
+    rest interactive) for the fair scheduler. Tasks started by the handler
+    inherit the tags.
+    """
+    def __init__(self, app: ASGIApp, path_prefix: str = "/api/"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        tenant = known_tenant(headers.get(b"x-tenant-id", b"").decode("latin-1"))
+        with work_context(class_for_path(scope["path"]), tenant):
+            await self.app(scope, receive, send)
+
+class AdmissionMiddleware:
+    """
+    Load shedding in front of the agent endpoints: a request the admission
+    controller refuses gets an immediate 503 with Retry-After instead of
+    waiting on the event loop until its deadline. Health, metrics and the
+    cheap job endpoints are never refused.
+    """
+    def __init__(self, app: ASGIApp, path_prefix: str = "/api/"):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+        controller = get_admission()
+        route = controller.route_for(scope["method"], scope["path"])
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            controller.admit(route)
+        except Shed as e:
+            body = json.dumps({"detail": str(e), "reason": e.reason}).encode()
+            await send({"type": "http.response.start", "status": 503,
+                        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                                    (b"retry-after", str(e.retry_after).encode())]})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(route, time.perf_counter() - started)
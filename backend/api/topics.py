@@ -1,14 +1,72 @@
-from fastapi import APIRouter, HTTPException
-from models.topic import TopicInput, TopicResponse
+from fastapi import APIRouter, Depends, HTTPException
+import time
+from models.topic import TopicInput, TopicResponse, TopicBatchInput
 from agents.topic_agent import TopicAgent
+from api.deps import use_cache, tenant_id, session_id
+from services.http_client import HttpClientPool, get_http_pool
+from services.prefetch import get_prefetcher
+from services.streaming import sse_event, sse_response
 
 router = APIRouter(prefix="/api/topics", tags=["topics"])
 
 @router.post("/generate", response_model=TopicResponse)
-async def generate_topics(input_data: TopicInput):
-    agent = TopicAgent()
+async def generate_topics(input_data: TopicInput, cache: bool = Depends(use_cache), http_pool: HttpClientPool = Depends(get_http_pool),
+                          tenant: str = Depends(tenant_id), session: str = Depends(session_id)):
+    agent = TopicAgent(http_pool)
     try:
-        result = await agent.generate_topics(input_data.keyword, input_data.model_provider)
-        return result
+        result = await agent.generate_topics(input_data.keyword, input_data.model_provider, use_cache=cache)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if cache:
+        # Speculatively outline the likely picks; /outline picks them up from the response cache
+        get_prefetcher().schedule(tenant, session, result, input_data.model_provider, input_data.prefetch_outlines)
+    return result
+
+@router.post("/generate/stream")
+async def generate_topics_stream(input_data: TopicInput, cache: bool = Depends(use_cache), http_pool: HttpClientPool = Depends(get_http_pool)):
+    """Server-Sent Events: `sources` once the search is done, one `topic` event per idea as it completes, then `done`."""
+    agent = TopicAgent(http_pool)
+
+    async def events():
+        started = time.perf_counter()
+        try:
+            async for kind, payload in agent.stream_topics(input_data.keyword, input_data.model_provider, use_cache=cache):
+                if kind == "sources":
+                    yield sse_event("sources", [r.model_dump() for r in payload])
+                elif kind == "topic":
+                    yield sse_event("topic", payload.model_dump())
+                else:
+                    yield sse_event("done", {
+                        "search_summary": payload.search_summary,
+                        "topics": len(payload.topics),
+                        "duration_ms": round((time.perf_counter() - started) * 1000),
+                    })
+        except Exception as e:
+            print(f"Topic Stream Error: {e}")
+            yield sse_event("error", {"detail": str(e)})
+
+    return sse_response(events())
+
+@router.post("/generate_batch")
+async def generate_topics_batch(input_data: TopicBatchInput, cache: bool = Depends(use_cache), http_pool: HttpClientPool = Depends(get_http_pool)):
+    """Server-Sent Events: one `result` or `error` event per keyword as it finishes, then `done`."""
+    agent = TopicAgent(http_pool)
+
+    async def events():
+        started = time.perf_counter()
+        succeeded = failed = 0
+        batch = agent.generate_batch(input_data.keywords, input_data.model_provider, cache, input_data.max_concurrency)
+        async for keyword, result in batch:
+            if isinstance(result, Exception):
+                failed += 1
+                yield sse_event("error", {"keyword": keyword, "detail": str(result)})
+            else:
+                succeeded += 1
+                yield sse_event("result", {"keyword": keyword, "result": result.model_dump()})
+        yield sse_event("done", {
+            "succeeded": succeeded,
+            "failed": failed,
+            "duration_ms": round((time.perf_counter() - started) * 1000),
+        })
+
+    return sse_response(events())
@@ -0,0 +1,49 @@
+import os
+import asyncio
+from celery import Celery
+from celery.schedules import crontab
+from dotenv import load_dotenv
+
+# Load env vars
+load_dotenv()
+
+celery_app = Celery(
+    "wecreate",
+    broker=os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"),
+    backend=os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0"),
+    include=["tasks.warming", "tasks.articles"],
+)
+
+def _cron(expression: str) -> crontab:
+    minute, hour, day_of_month, month_of_year, day_of_week = expression.split()
+    return crontab(minute=minute, hour=hour, day_of_month=day_of_month,
+                   month_of_year=month_of_year, day_of_week=day_of_week)
+
+celery_app.conf.update(
+    timezone=os.getenv("CELERY_TIMEZONE", "Asia/Shanghai"),
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    # Article jobs get their own queue so their workers scale separately from maintenance tasks
+    task_routes={"tasks.articles.*": {"queue": os.getenv("ARTICLE_JOB_QUEUE", "articles")}},
+    beat_schedule={
+        # Off-peak, ahead of the morning rush
+        "warm-trending-keywords": {
+            "task": "tasks.warming.warm_trending_keywords",
+            "schedule": _cron(os.getenv("WARM_SCHEDULE", "30 6 * * *")),
+        },
+    },
+)
+
+_loop = None
+
+def run_async(coro):
+    """
+    Run a coroutine from a (sync) task. Each worker process keeps one event
+    loop, so the service singletons (HTTP pool, Redis clients, rate limiters)
+    stay bound to the loop they were created on.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
@@ -2,18 +2,45 @@ import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 
 # Load env vars
 load_dotenv()
 
-from api import topics, articles, images
+from api import topics, articles, images, jobs, drafts
+from api.middleware import AdmissionMiddleware, CancelOnDisconnectMiddleware, DeadlineMiddleware, SchedulingMiddleware
+from services.llm_provider import LLMProvider
+from services.cache import get_response_cache, close_response_cache
+from services.semantic_cache import close_semantic_cache
+from services.metrics import metrics
+from services.rate_limiter import limiter_stats
+from services.scheduler import get_scheduler
+from services.admission import get_admission
+from services.circuit_breaker import OPEN, breaker_states
+from services.http_client import get_http_pool, close_http_pool
+from services.search_cache import get_search_cache, close_search_cache
+from services.prefetch import get_prefetcher, close_prefetcher
+from services.cache_warming import load_report
+from services.job_store import close_job_store
+from services.draft_store import close_draft_store
+from services.checkpoints import close_checkpoints
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Startup: Initializing Application")
+    get_http_pool() # Shared keep-alive pool for Tavily and image downloads
     yield
     print("Shutdown: Cleaning up")
+    await close_prefetcher()
+    await close_job_store()
+    close_draft_store()
+    await close_checkpoints()
+    await LLMProvider.aclose()
+    await close_response_cache()
+    await close_semantic_cache()
+    await close_http_pool()
+    await close_search_cache()
 
 app = FastAPI(
     title="WeCreate AI Backend",
@@ -21,7 +48,17 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# CORS Config
+# Stop agent work for requests whose client has gone away
+app.add_middleware(CancelOnDisconnectMiddleware)
+# Per-request deadline that the agent stages budget against
+app.add_middleware(DeadlineMiddleware)
+# Tenant and work class for the fair LLM scheduler
+app.add_middleware(SchedulingMiddleware)
+# Shed agent requests up front when overloaded, before any of the above run
+app.add_middleware(AdmissionMiddleware)
+
+# CORS Config. Added last so it wraps everything: the 503s and 504s the
+# middlewares above answer with themselves need the headers too.
 origins = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
@@ -39,6 +76,8 @@ app.add_middleware(
 app.include_router(topics.router)
 app.include_router(articles.router)
 app.include_router(images.router)
+app.include_router(jobs.router)
+app.include_router(drafts.router)
 
 # Mount Static Files for Images
 import os
@@ -51,4 +90,24 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    circuits = breaker_states()
+    degraded = any(c["state"] == OPEN for c in circuits.values())
+    return {
+        "status": "degraded" if degraded else "ok",
+        "llm_pool": LLMProvider.stats(),
+        "circuits": circuits,
+    }
+
+@app.get("/metrics")
+async def read_metrics():
+    return {
+        **metrics.snapshot(),
+        "response_cache": get_response_cache().stats(),
+        "rate_limits": limiter_stats(),
+        "scheduler": get_scheduler().stats(),
+        "admission": get_admission().stats(),
+        "http_pool": get_http_pool().stats(),
+        "search_cache": get_search_cache().stats(),
+        "prefetch": get_prefetcher().stats(),
+        "cache_warming": await load_report(),
+    }
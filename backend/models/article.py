@@ -30,5 +30,20 @@ class WriteSectionResponse(BaseModel):
 class FullArticleRequest(BaseModel):
     topic: str
     outline: List[OutlineSection]
+    context_summary: str = ""
     tone: str = "Professional"
     model_provider: str = "gemini"
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Sections written at once; defaults to ARTICLE_MAX_CONCURRENCY")
+    polish: bool = False
+    polish_style: str = "Conversational"
+    run_id: Optional[str] = Field(None, max_length=64, description="Resume this run: sections and polish already done for the same inputs are reused")
+
+class SectionContent(BaseModel):
+    title: str
+    content: str
+
+class FullArticleResponse(BaseModel):
+    topic: str
+    sections: List[SectionContent]
+    content: str = Field(..., description="All sections joined as one Markdown document")
+    polished_content: Optional[str] = None
@@ -0,0 +1,132 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from sqlalchemy import JSON, Column, Text
+from sqlmodel import Field, SQLModel
+
+# --- Tables ---
+class Draft(SQLModel, table=True):
+    """An article being worked on: the chosen topic plus its settings. Sections and images hang off it."""
+    __tablename__ = "drafts"
+
+    id: str = Field(primary_key=True, max_length=32)
+    tenant: str = Field(index=True, max_length=64)
+    keyword: str = ""
+    topic_title: str
+    search_summary: str = Field(default="", sa_column=Column(Text, nullable=False, default=""))
+    topic_ideas: List[Dict[str, Any]] = Field(default_factory=list, sa_column=Column(JSON, nullable=False))
+    tone: str = "Professional"
+    model_provider: str = "gemini"
+    polished_content: Optional[str] = Field(default=None, sa_column=Column(Text))
+    version: int = 1
+    created_at: float
+    updated_at: float
+
+class DraftSection(SQLModel, table=True):
+    """One outline section and, once written, its text. `position` orders sections within the draft."""
+    __tablename__ = "draft_sections"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    draft_id: str = Field(foreign_key="drafts.id", index=True, max_length=32)
+    position: int
+    title: str
+    description: str = ""
+    key_points: List[str] = Field(default_factory=list, sa_column=Column(JSON, nullable=False))
+    content: Optional[str] = Field(default=None, sa_column=Column(Text))
+    version: int = 1
+    updated_at: float
+
+class DraftImage(SQLModel, table=True):
+    """A generated illustration; the file itself stays in the image directory or CDN."""
+    __tablename__ = "draft_images"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    draft_id: str = Field(foreign_key="drafts.id", index=True, max_length=32)
+    section_position: Optional[int] = None
+    url: str
+    prompt: str = Field(default="", sa_column=Column(Text, nullable=False, default=""))
+    created_at: float
+
+# --- API Models ---
+class DraftSectionInput(BaseModel):
+    title: str
+    description: str = ""
+    key_points: List[str] = []
+    content: Optional[str] = None
+
+class DraftImageInput(BaseModel):
+    url: str
+    prompt: str = ""
+    section_position: Optional[int] = None
+
+class DraftCreate(BaseModel):
+    keyword: str = ""
+    topic_title: str
+    search_summary: str = ""
+    topic_ideas: List[Dict[str, Any]] = []
+    tone: str = "Professional"
+    model_provider: str = "gemini"
+    sections: List[DraftSectionInput] = []
+    polished_content: Optional[str] = None
+    images: List[DraftImageInput] = []
+
+class SectionPatch(BaseModel):
+    """Changed fields of one section; None leaves a field as it is."""
+    position: int
+    version: Optional[int] = None # The version the client edited; a mismatch is a conflict
+    title: Optional[str] = None
+    description: Optional[str] = None
+    key_points: Optional[List[str]] = None
+    content: Optional[str] = None
+
+class DraftPatch(BaseModel):
+    """
+    An autosave: only what changed since the client's last save. Removals are
+    applied first and close the gaps; section positions then refer to the
+    result, and a position one past the last section appends a new one.
+    """
+    version: Optional[int] = None # The draft version the client edited; a mismatch is a conflict
+    topic_title: Optional[str] = None
+    search_summary: Optional[str] = None
+    tone: Optional[str] = None
+    polished_content: Optional[str] = None
+    sections: List[SectionPatch] = []
+    removed_sections: List[int] = []
+    images: List[DraftImageInput] = []
+
+class DraftSectionHeader(BaseModel):
+    position: int
+    title: str
+    description: str
+    key_points: List[str]
+    version: int
+    has_content: bool
+
+class DraftSectionView(BaseModel):
+    position: int
+    title: str
+    description: str
+    key_points: List[str]
+    content: Optional[str]
+    version: int
+
+class DraftView(BaseModel):
+    """A draft without its section texts; fetch the section being edited on its own."""
+    id: str
+    keyword: str
+    topic_title: str
+    search_summary: str
+    topic_ideas: List[Dict[str, Any]]
+    tone: str
+    model_provider: str
+    has_polished_content: bool
+    version: int
+    sections: List[DraftSectionHeader]
+    images: List[DraftImageInput]
+    created_at: float
+    updated_at: float
+
+class DraftSaveResult(BaseModel):
+    id: str
+    version: int
+    section_versions: Dict[int, int] # position -> version, for the sections this save touched
+    changed: int # Sections inserted, updated or removed
@@ -0,0 +1,46 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+# Stages in order; each one's partial result lands in JobStatus.results under its name
+STAGES = ["topics", "outline", "sections", "polish", "images"]
+
+class ArticleJobRequest(BaseModel):
+    keyword: str
+    topic_title: Optional[str] = Field(None, description="Skip topic generation and write about this title")
+    search_summary: str = ""
+    tone: str = "Professional"
+    model_provider: str = "gemini"
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Sections written at once; defaults to ARTICLE_MAX_CONCURRENCY")
+    polish: bool = True
+    polish_style: str = "Conversational"
+    image_count: int = Field(1, ge=0, le=10, description="Illustrations for the first N sections")
+    image_style: str = "Flat Vector Illustration"
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    state: str
+    status_url: str
+    events_url: str
+
+class JobStatus(BaseModel):
+    job_id: str
+    kind: str = "article"
+    state: str = QUEUED
+    stage: Optional[str] = None
+    progress: float = 0.0
+    results: Dict[str, Any] = Field(default_factory=dict, description="Partial results per finished (or running) stage")
+    completed_stages: List[str] = Field(default_factory=list)
+    error: Optional[str] = None
+    draft_id: Optional[str] = Field(None, description="The saved draft (/api/drafts) once the job has succeeded")
+    request: Optional[Dict[str, Any]] = Field(None, description="What was submitted, kept so the job can be retried")
+    attempts: int = 1
+    created_at: float
+    updated_at: float
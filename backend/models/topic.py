@@ -5,6 +5,12 @@ class TopicInput(BaseModel):
     keyword: str
     mode: str = "creative"  # creative or imitation
     model_provider: Optional[str] = "gemini" # gemini or openai
+    prefetch_outlines: Optional[bool] = Field(None, description="False opts out of outlining the top ideas in the background; only applies when OUTLINE_PREFETCH_ENABLED")
+
+class TopicBatchInput(BaseModel):
+    keywords: List[str] = Field(..., min_length=1, max_length=100)
+    model_provider: Optional[str] = "gemini"
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Concurrent searches; defaults to TOPIC_BATCH_SEARCH_CONCURRENCY")
 
 class SearchResult(BaseModel):
     title: str
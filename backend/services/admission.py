@@ -0,0 +1,140 @@
+import os
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from services import deadline
+from services.metrics import metrics
+from services.scheduler import INTERACTIVE, get_scheduler
+
+# In-flight cap by API path (after /api/). Paths not listed (job polling,
+# cancellation, submission onto the workers) are cheap and never shed.
+DEFAULT_LIMITS = {
+    "topics/generate": 32,
+    "topics/generate/stream": 32,
+    "topics/generate_batch": 4,
+    "articles/outline": 32,
+    "articles/outline/stream": 32,
+    "articles/write_section": 24,
+    "articles/write_section/stream": 24,
+    "articles/write_full": 8,
+    "articles/polish": 16,
+    "articles/polish/stream": 16,
+    "images/generate": 16,
+}
+
+class Shed(Exception):
+    """The request was turned away; `retry_after` is a hint in whole seconds."""
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Decides at the door whether an agent request can be served in time.
+    Each endpoint has an in-flight cap (ADMISSION_MAX_INFLIGHT_<PATH>) under a
+    global one; when the endpoint's recent p90 latency passes its target (a
+    share of its deadline) the cap drops to ADMISSION_OVERLOAD_FACTOR of
+    itself, and new work is refused while the scheduler's interactive queue is
+    deeper than ADMISSION_MAX_QUEUED. A refused request costs nothing; one
+    accepted and then timed out costs a whole LLM call.
+    """
+    def __init__(self):
+        self.enabled = os.getenv("ADMISSION_ENABLED", "1") == "1"
+        self.max_inflight = int(os.getenv("ADMISSION_MAX_INFLIGHT", "64"))
+        self.max_queued = int(os.getenv("ADMISSION_MAX_QUEUED", "32"))
+        self.overload_factor = float(os.getenv("ADMISSION_OVERLOAD_FACTOR", "0.5"))
+        self.target_share = float(os.getenv("ADMISSION_LATENCY_TARGET_SHARE", "0.8"))
+        self.window = float(os.getenv("ADMISSION_LATENCY_WINDOW", "30"))
+        self.inflight: Dict[str, int] = {}
+        self._latencies: Dict[str, Deque[Tuple[float, float]]] = {}
+
+    @staticmethod
+    def route_for(method: str, path: str) -> Optional[str]:
+        """The admission-controlled route for a request, or None when it is exempt."""
+        if method in ("OPTIONS", "HEAD"):
+            return None # Preflights and probes do no agent work
+        route = path.removeprefix("/api/").strip("/")
+        return route if route in DEFAULT_LIMITS else None
+
+    def limit(self, route: str) -> int:
+        name = route.replace("/", "_").upper()
+        return int(os.getenv(f"ADMISSION_MAX_INFLIGHT_{name}") or DEFAULT_LIMITS[route])
+
+    def latency_target(self, route: str) -> Optional[float]:
+        seconds = deadline.for_path(f"/api/{route}")
+        return seconds * self.target_share if seconds is not None else None
+
+    def recent_latency(self, route: str, q: float = 90) -> Optional[float]:
+        samples = self._latencies.get(route)
+        if not samples:
+            return None
+        cutoff = time.monotonic() - self.window
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        if not samples:
+            return None
+        ordered = sorted(d for _, d in samples)
+        return ordered[min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))]
+
+    def admit(self, route: str) -> None:
+        """Take an in-flight slot for `route` or raise Shed. Pair with `release`."""
+        if self.enabled:
+            reason = self._over_limit(route)
+            if reason is not None:
+                metrics.incr(f"admission.{route}.shed")
+                metrics.incr(f"admission.shed.{reason}")
+                raise Shed(reason, self._retry_after(route))
+        self.inflight[route] = self.inflight.get(route, 0) + 1
+        metrics.incr(f"admission.{route}.admitted")
+
+    def release(self, route: str, duration: float) -> None:
+        self.inflight[route] -= 1
+        samples = self._latencies.setdefault(route, deque(maxlen=500))
+        samples.append((time.monotonic(), duration))
+
+    def _over_limit(self, route: str) -> Optional[str]:
+        if sum(self.inflight.values()) >= self.max_inflight:
+            return "global_inflight"
+        limit, reason = self.limit(route), "inflight"
+        target = self.latency_target(route)
+        latency = self.recent_latency(route)
+        if target is not None and latency is not None and latency > target:
+            limit, reason = max(1, int(limit * self.overload_factor)), "latency"
+        if self.inflight.get(route, 0) >= limit:
+            return reason
+        if get_scheduler().queued(INTERACTIVE) >= self.max_queued:
+            return "queue_depth"
+        return None
+
+    def _retry_after(self, route: str) -> int:
+        # Roughly when the work in front of this request should have drained
+        typical = self.recent_latency(route, 50) or 1.0
+        return max(1, min(int(os.getenv("ADMISSION_MAX_RETRY_AFTER", "30")), math.ceil(typical)))
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "inflight": sum(self.inflight.values()),
+            "max_inflight": self.max_inflight,
+            "routes": {
+                route: {
+                    "inflight": self.inflight.get(route, 0),
+                    "limit": self.limit(route),
+                    "p90": self.recent_latency(route),
+                    "target": self.latency_target(route),
+                    "shed": metrics.count(f"admission.{route}.shed"),
+                }
+                for route in DEFAULT_LIMITS
+            },
+        }
+
+_controller: Optional[AdmissionController] = None
+
+def get_admission() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
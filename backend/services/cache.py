@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import hashlib
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Optional, Tuple
+
+from services.metrics import metrics
+
+try:
+    import redis.asyncio as aioredis
+except ImportError: # Redis is optional; the in-memory stand-in takes over
+    aioredis = None
+
+# Seconds a cached response stays valid, per endpoint. 0 disables caching for that endpoint.
+DEFAULT_TTLS = {
+    "topics": 600,
+    "outline": 3600,
+    "polish": 3600,
+    "image_prompt": 3600,
+    "write_section": 0, # Rewrites are usually a deliberate "regenerate"
+}
+
+# Lower bound on the TTL of entries written inside min_ttl(); 0 means each cache's own TTL applies
+_min_ttl: contextvars.ContextVar[float] = contextvars.ContextVar("cache_min_ttl", default=0.0)
+
+@contextmanager
+def min_ttl(seconds: float):
+    """
+    Keep entries written inside the block (by any cache, and by tasks started
+    from it) for at least `seconds`: cache warming runs hours before the peak
+    it fills the caches for.
+    """
+    token = _min_ttl.set(seconds)
+    try:
+        yield
+    finally:
+        _min_ttl.reset(token)
+
+def current_min_ttl() -> float:
+    return _min_ttl.get()
+
+def effective_ttl(ttl: float) -> float:
+    """`ttl`, raised to the current min_ttl. A TTL of 0 (caching off) stays 0."""
+    return max(ttl, _min_ttl.get()) if ttl > 0 else ttl
+
+def cache_key(*parts: Any) -> str:
+    """Content address for a request: sha256 over a canonical JSON encoding of its parts."""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class LRUCache:
+    """Bounded in-process map with per-entry expiry. Oldest entries are evicted first."""
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class MemoryBackend:
+    """Local stand-in for the Redis tier, used in tests and when REDIS_URL is unset."""
+    def __init__(self):
+        self._lru = LRUCache(max_entries=int(os.getenv("CACHE_SHARED_MAX_ENTRIES", "10000")))
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._lru.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._lru.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        self._lru.delete(key)
+
+    async def aclose(self) -> None:
+        pass
+
+class RedisBackend:
+    """Shared tier across workers. Redis errors degrade to cache misses rather than failed requests."""
+    def __init__(self, url: str):
+        self.client = aioredis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            return await self.client.get(key)
+        except Exception as e:
+            print(f"Cache Redis Error: {e}")
+            return None
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        try:
+            await self.client.set(key, value, ex=max(1, int(ttl)))
+        except Exception as e:
+            print(f"Cache Redis Error: {e}")
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self.client.delete(key)
+        except Exception as e:
+            print(f"Cache Redis Error: {e}")
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+def shared_backend():
+    """Redis if REDIS_URL is configured and the client is installed, otherwise the in-memory stand-in."""
+    url = os.getenv("REDIS_URL")
+    if url and aioredis is not None:
+        return RedisBackend(url)
+    return MemoryBackend()
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses: a bounded in-process LRU in front of a
+    shared backend. Values are stored as JSON so both tiers hold the same thing.
+    """
+    def __init__(self, backend=None, max_entries: Optional[int] = None):
+        self.local = LRUCache(max_entries or int(os.getenv("CACHE_MAX_ENTRIES", "1024")))
+        self.shared = backend if backend is not None else shared_backend()
+        self.enabled = os.getenv("CACHE_ENABLED", "1") != "0"
+
+    @staticmethod
+    def ttl(namespace: str) -> float:
+        return float(os.getenv(f"CACHE_TTL_{namespace.upper()}", DEFAULT_TTLS.get(namespace, 0)))
+
+    def is_active(self, namespace: str) -> bool:
+        return self.enabled and self.ttl(namespace) > 0
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        if current_min_ttl() > self.ttl(namespace):
+            # Entries don't record their TTL: regenerate so the answer is kept for long enough
+            metrics.incr(f"cache.{namespace}.rewarm")
+            return None
+        full_key = f"llm:{namespace}:{key}"
+
+        raw = self.local.get(full_key)
+        if raw is not None:
+            metrics.incr(f"cache.{namespace}.hit_local")
+            return json.loads(raw)
+
+        raw = await self.shared.get(full_key)
+        if raw is not None:
+            metrics.incr(f"cache.{namespace}.hit_shared")
+            # Promote so the next hit on this worker skips the network
+            self.local.set(full_key, raw, self.ttl(namespace))
+            return json.loads(raw)
+
+        metrics.incr(f"cache.{namespace}.miss")
+        return None
+
+    async def set(self, namespace: str, key: str, value: Any) -> None:
+        if not self.is_active(namespace):
+            return
+        ttl = effective_ttl(self.ttl(namespace))
+        full_key = f"llm:{namespace}:{key}"
+        raw = json.dumps(value, ensure_ascii=False)
+        self.local.set(full_key, raw, ttl)
+        await self.shared.set(full_key, raw, ttl)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "local_entries": len(self.local),
+            "local_max_entries": self.local.max_entries,
+            "shared_backend": type(self.shared).__name__,
+        }
+
+    async def aclose(self) -> None:
+        await self.shared.aclose()
+
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+async def close_response_cache() -> None:
+    global _response_cache
+    if _response_cache is not None:
+        await _response_cache.aclose()
+        _response_cache = None
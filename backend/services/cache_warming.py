@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import asyncio
+from typing import List, Optional
+
+from services.cache import aioredis, get_response_cache, min_ttl
+from services.http_client import HttpClientPool, get_http_pool
+from services.metrics import metrics
+from services.rate_limiter import TokenBucket
+
+REPORT_KEY = "warming:report"
+REPORT_TTL = 7 * 24 * 3600
+
+async def load_trending_keywords(http_pool: Optional[HttpClientPool] = None) -> List[str]:
+    """
+    Keywords to warm, merged in order from WARM_KEYWORDS_FILE (one per line,
+    # for comments), WARM_KEYWORDS_URL (a JSON list or {"keywords": [...]}) and
+    WARM_KEYWORDS_REDIS_KEY (a sorted set read highest score first, a set or a
+    list). Duplicates are dropped and the result capped at WARM_MAX_KEYWORDS.
+    A source that fails is logged and skipped.
+    """
+    keywords: List[str] = []
+
+    path = os.getenv("WARM_KEYWORDS_FILE")
+    if path:
+        try:
+            with open(path, encoding="utf-8") as f:
+                keywords += [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+        except OSError as e:
+            print(f"Warming: cannot read {path}: {e}")
+
+    url = os.getenv("WARM_KEYWORDS_URL")
+    if url:
+        try:
+            response = await (http_pool or get_http_pool()).get(url)
+            response.raise_for_status()
+            data = response.json()
+            keywords += [str(k) for k in (data.get("keywords", []) if isinstance(data, dict) else data)]
+        except Exception as e:
+            print(f"Warming: cannot fetch {url}: {e}")
+
+    redis_key = os.getenv("WARM_KEYWORDS_REDIS_KEY")
+    redis_url = os.getenv("REDIS_URL")
+    if redis_key and redis_url and aioredis is not None:
+        limit = int(os.getenv("WARM_MAX_KEYWORDS", "50"))
+        client = aioredis.from_url(redis_url, decode_responses=True)
+        try:
+            kind = await client.type(redis_key)
+            if kind == "zset":
+                keywords += await client.zrevrange(redis_key, 0, limit - 1)
+            elif kind == "set":
+                keywords += sorted(await client.smembers(redis_key))
+            elif kind == "list":
+                keywords += await client.lrange(redis_key, 0, limit - 1)
+        except Exception as e:
+            print(f"Warming: cannot read Redis key {redis_key}: {e}")
+        finally:
+            await client.aclose()
+
+    unique = list(dict.fromkeys(k.strip() for k in keywords if k.strip()))
+    return unique[:int(os.getenv("WARM_MAX_KEYWORDS", "50"))]
+
+class CacheWarmer:
+    """
+    Runs the topic flow (search, then topic generation) for trending keywords
+    so the search cache and LLM response caches are filled before the peak.
+    Keywords are paced by WARM_KEYWORDS_PER_MINUTE and run WARM_CONCURRENCY at
+    a time; the LLM calls still queue behind the provider rate limits. What
+    it writes is kept for at least WARM_TTL, so it outlives the gap between
+    the run and the peak. The caches must be shared (REDIS_URL) for the API
+    workers to see the results.
+    """
+    def __init__(self, http_pool: Optional[HttpClientPool] = None, provider: Optional[str] = None):
+        self.http_pool = http_pool or get_http_pool()
+        self.provider = provider or os.getenv("WARM_PROVIDER", "gemini")
+        self.concurrency = int(os.getenv("WARM_CONCURRENCY", "2"))
+        self.pace = TokenBucket(float(os.getenv("WARM_KEYWORDS_PER_MINUTE", "10")), capacity=1)
+        self.ttl = float(os.getenv("WARM_TTL", str(6 * 3600)))
+
+    async def run(self, keywords: List[str]) -> dict:
+        from agents.topic_agent import TopicAgent # Agents import services, not the other way round
+
+        agent = TopicAgent(self.http_pool)
+        slots = asyncio.Semaphore(max(1, self.concurrency))
+        started = time.time()
+
+        async def warm(keyword: str) -> dict:
+            async with slots:
+                await self.pace.acquire()
+                try:
+                    already_fresh = await agent.search_service.warm(keyword)
+                    # Not generate_topics: a semantic-cache hit for a similar keyword would leave this one cold
+                    results = await agent.search_service.search(keyword)
+                    result = await agent.generate_from_results(keyword, results, self.provider, raise_errors=True)
+                except Exception as e:
+                    print(f"Warming Error ({keyword}): {e}")
+                    metrics.incr("warming.failed")
+                    return {"keyword": keyword, "status": "failed", "detail": str(e)}
+                status = "already_fresh" if already_fresh else "warmed"
+                if not result.topics:
+                    status = "failed" # The fallback response isn't cached, so nothing was warmed
+                metrics.incr(f"warming.{status}")
+                return {"keyword": keyword, "status": status, "topics": len(result.topics)}
+
+        with min_ttl(self.ttl):
+            results = await asyncio.gather(*(warm(k) for k in keywords))
+        covered = sum(1 for r in results if r["status"] != "failed")
+        report = {
+            "started_at": started,
+            "finished_at": time.time(),
+            "provider": self.provider,
+            "keywords": len(keywords),
+            "warmed": sum(1 for r in results if r["status"] == "warmed"),
+            "already_fresh": sum(1 for r in results if r["status"] == "already_fresh"),
+            "failed": len(keywords) - covered,
+            "coverage": round(covered / len(keywords), 3) if keywords else None,
+            "shared_cache": os.getenv("REDIS_URL") is not None,
+            "results": results,
+        }
+        await save_report(report)
+        return report
+
+async def save_report(report: dict) -> None:
+    await get_response_cache().shared.set(REPORT_KEY, json.dumps(report, ensure_ascii=False), REPORT_TTL)
+
+async def load_report() -> Optional[dict]:
+    """The last warming run's report, without the per-keyword detail."""
+    raw = await get_response_cache().shared.get(REPORT_KEY)
+    if raw is None:
+        return None
+    report = json.loads(raw)
+    report.pop("results", None)
+    return report
@@ -0,0 +1,71 @@
+import os
+import json
+from typing import Any, Awaitable, Callable, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+from services.cache import cache_key, shared_backend
+from services.metrics import metrics
+
+T = TypeVar("T")
+
+class CheckpointStore:
+    """
+    Stage outputs of an article run (outline, each section, polish, images),
+    keyed by the run and a content hash of the stage's inputs. Retrying a run
+    replays every stage whose inputs are unchanged and recomputes only the
+    rest: the section that failed, or the one whose outline entry was edited
+    and the polish pass after it. Separate from the response cache, which
+    deliberately never reuses section text across runs.
+    """
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else shared_backend()
+        self.enabled = os.getenv("CHECKPOINTS_ENABLED", "1") == "1"
+        self.ttl = float(os.getenv("CHECKPOINT_TTL", str(24 * 3600)))
+
+    @staticmethod
+    def _key(run_id: str, stage: str, inputs: Any) -> str:
+        return f"checkpoint:{run_id}:{stage}:{cache_key(stage, inputs)}"
+
+    async def memoize(self, run_id: Optional[str], stage: str, inputs: Any,
+                      compute: Callable[[], Awaitable[T]], model: Optional[Type[BaseModel]] = None,
+                      keep: Optional[Callable[[T], bool]] = None) -> T:
+        """
+        The checkpointed output of `stage` for these inputs in this run, or
+        `compute()`'s result, checkpointed unless `keep` rejects it (agents'
+        fallback answers). Without a run_id nothing is kept. Pydantic results
+        need their `model` to be restored.
+        """
+        if run_id is None or not self.enabled:
+            return await compute()
+        key = self._key(run_id, stage, inputs)
+        raw = await self.backend.get(key)
+        if raw is not None:
+            metrics.incr(f"checkpoint.{stage}.hit")
+            value = json.loads(raw)
+            return model.model_validate(value) if model is not None else value
+
+        metrics.incr(f"checkpoint.{stage}.miss")
+        result = await compute()
+        if keep is not None and not keep(result):
+            return result
+        value = result.model_dump() if isinstance(result, BaseModel) else result
+        await self.backend.set(key, json.dumps(value, ensure_ascii=False), self.ttl)
+        return result
+
+    async def aclose(self) -> None:
+        await self.backend.aclose()
+
+_checkpoints: Optional[CheckpointStore] = None
+
+def get_checkpoints() -> CheckpointStore:
+    global _checkpoints
+    if _checkpoints is None:
+        _checkpoints = CheckpointStore()
+    return _checkpoints
+
+async def close_checkpoints() -> None:
+    global _checkpoints
+    if _checkpoints is not None:
+        await _checkpoints.aclose()
+        _checkpoints = None
@@ -0,0 +1,110 @@
+import os
+import time
+from typing import Dict
+
+from services.metrics import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+    def __init__(self, name: str):
+        super().__init__(f"Circuit '{name}' is open")
+        self.name = name
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker. `failure_threshold` consecutive failures open
+    it; after `recovery_timeout` seconds it goes half-open and lets
+    `half_open_max_calls` probes through. A successful probe closes it, a
+    failed one re-opens it. A probe that ends without an outcome (cancelled,
+    or cut off by the request deadline) hands its slot back with
+    `release_probe`; should one never report at all, a new round of probes is
+    allowed once `recovery_timeout` has passed again.
+    """
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.probing_since = 0.0
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected outright (open and not yet due for a probe)."""
+        return self.state == OPEN and time.monotonic() - self.opened_at < self.recovery_timeout
+
+    def available(self) -> bool:
+        """Whether `allow` would let a call through now, without taking a probe slot."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return not self.is_open()
+        return self.probes < self.half_open_max_calls or self._probes_stale()
+
+    def allow(self) -> bool:
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self._transition(HALF_OPEN)
+            self.probes = 0
+            self.probing_since = time.monotonic()
+        elif self.state == HALF_OPEN and self._probes_stale():
+            # The probes never reported back; start a fresh round rather than wedge half-open
+            self.probes = 0
+            self.probing_since = time.monotonic()
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self.probes < self.half_open_max_calls:
+            self.probes += 1
+            return True
+        metrics.incr(f"circuit.{self.name}.rejected")
+        return False
+
+    def release_probe(self) -> None:
+        """A call let through by `allow` ended with no verdict on the upstream; free its probe slot."""
+        if self.state == HALF_OPEN and self.probes > 0:
+            self.probes -= 1
+
+    def _probes_stale(self) -> bool:
+        return self.probes >= self.half_open_max_calls and time.monotonic() - self.probing_since >= self.recovery_timeout
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != OPEN:
+                self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        print(f"Circuit '{self.name}': {self.state} -> {state}")
+        metrics.incr(f"circuit.{self.name}.{state}")
+        self.state = state
+
+    def stats(self) -> dict:
+        return {"state": self.state, "failures": self.failures}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Breakers are per upstream (llm.gemini, llm.openai, tavily, image), configured from CIRCUIT_* env vars."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(
+            name,
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            recovery_timeout=float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", "30")),
+            half_open_max_calls=int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", "1")),
+        )
+    return breaker
+
+def breaker_states() -> dict:
+    return {name: breaker.stats() for name, breaker in sorted(_breakers.items())}
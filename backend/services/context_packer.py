@@ -0,0 +1,119 @@
+import os
+import re
+import math
+from collections import Counter
+from typing import List
+
+from services import deadline
+from services.metrics import metrics
+from services.tokens import count_tokens
+
+# Per-endpoint prompt-context budgets, in tokens
+DEFAULT_BUDGETS = {
+    "topics": 1500,
+    "outline": 1500,
+    "write_section": 1200,
+    "image_prompt": 300,
+}
+
+_TERM_RE = re.compile(r"[一-鿿㐀-䶿]+|[a-z0-9]+")
+# CJK terminators end a sentence outright; Latin ones only before whitespace (so "3.5" survives)
+_SENTENCE_RE = re.compile(r"(?<=[。！？；])\s*|(?<=[.!?;])\s+|\n+")
+
+def _terms(text: str) -> List[str]:
+    # Latin words as-is; CJK runs as overlapping bigrams (plus the char itself for 1-char runs)
+    terms = []
+    for run in _TERM_RE.findall(text.lower()):
+        if run[0].isascii():
+            terms.append(run)
+        elif len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s and s.strip()]
+
+def bm25_scores(query: str, docs: List[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    query_terms = set(_terms(query))
+    doc_terms = [Counter(_terms(d)) for d in docs]
+    if not query_terms or not docs:
+        return [0.0] * len(docs)
+    avg_len = sum(sum(t.values()) for t in doc_terms) / len(docs) or 1.0
+    scores = []
+    for terms in doc_terms:
+        length = sum(terms.values())
+        score = 0.0
+        for term in query_terms:
+            tf = terms.get(term, 0)
+            if not tf:
+                continue
+            df = sum(1 for t in doc_terms if term in t)
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_len))
+        scores.append(score)
+    return scores
+
+class ContextPacker:
+    """
+    Fits prompt context into a token budget: snippets are ranked by BM25
+    relevance to the query and taken greedily; the snippet that doesn't fit is
+    trimmed at a sentence boundary. Chosen snippets keep their original order.
+    """
+    def __init__(self, provider: str = "gemini"):
+        self.provider = provider
+
+    @staticmethod
+    def budget(endpoint: str) -> int:
+        """The endpoint's token budget, shrunk when the request is close to its deadline (shorter prompt, faster call)."""
+        budget = int(os.getenv(f"CONTEXT_BUDGET_{endpoint.upper()}", DEFAULT_BUDGETS.get(endpoint, 1500)))
+        scale = deadline.pressure()
+        if scale < 1.0:
+            metrics.incr(f"deadline.{endpoint}.context_shrunk")
+        return int(budget * scale)
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self.provider)
+
+    def pack(self, query: str, snippets: List[str], budget: int) -> List[str]:
+        costs = [self.count(s) for s in snippets]
+        if sum(costs) <= budget:
+            return list(snippets)
+
+        scores = bm25_scores(query, snippets)
+        ranked = sorted(range(len(snippets)), key=lambda i: scores[i], reverse=True) # stable: ties keep order
+        chosen = {}
+        remaining = budget
+        for i in ranked:
+            if costs[i] <= remaining:
+                chosen[i] = snippets[i]
+                remaining -= costs[i]
+            else:
+                trimmed = self._trim(snippets[i], remaining)
+                if trimmed:
+                    chosen[i] = trimmed
+                    remaining -= self.count(trimmed)
+            if remaining <= 0:
+                break
+        return [chosen[i] for i in sorted(chosen)]
+
+    def pack_text(self, query: str, text: str, budget: int) -> str:
+        """Pack free text (a context summary) by treating its paragraphs as snippets."""
+        if self.count(text) <= budget:
+            return text
+        paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+        if len(paragraphs) == 1:
+            paragraphs = split_sentences(text)
+        return "\n\n".join(self.pack(query, paragraphs, budget))
+
+    def _trim(self, snippet: str, budget: int) -> str:
+        kept = []
+        used = 0
+        for sentence in split_sentences(snippet):
+            cost = self.count(sentence)
+            if used + cost > budget:
+                break
+            kept.append(sentence)
+            used += cost
+        return " ".join(kept)
@@ -0,0 +1,35 @@
+import os
+from typing import Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import create_engine
+
+_engine: Optional[Engine] = None
+
+def database_url() -> str:
+    """DATABASE_URL (Postgres in docker-compose); a local SQLite file otherwise. `sqlite://` is in-memory, for tests."""
+    return os.getenv("DATABASE_URL") or "sqlite:///wecreate.db"
+
+def get_engine() -> Engine:
+    """
+    The SQLModel engine for persisted drafts. Synchronous (psycopg2 / sqlite3):
+    callers run their sessions with asyncio.to_thread, as the pgvector cache does.
+    """
+    global _engine
+    if _engine is None:
+        url = database_url()
+        if url.startswith("sqlite"):
+            kwargs = {"connect_args": {"check_same_thread": False}}
+            if url in ("sqlite://", "sqlite:///:memory:"):
+                kwargs["poolclass"] = StaticPool # One shared connection, or every session sees an empty database
+        else:
+            kwargs = {"pool_pre_ping": True, "pool_size": int(os.getenv("DATABASE_POOL_SIZE", "5"))}
+        _engine = create_engine(url, echo=os.getenv("DATABASE_ECHO", "0") == "1", **kwargs)
+    return _engine
+
+def close_database() -> None:
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
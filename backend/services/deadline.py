@@ -0,0 +1,144 @@
+import os
+import math
+import time
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from typing import Awaitable, Optional, TypeVar
+
+from services.metrics import metrics
+
+T = TypeVar("T")
+
+# Seconds a request may take, by path (after /api/). 0 means no deadline:
+# streams and batches report progress as they go, so they aren't cut off.
+DEFAULT_DEADLINES = {
+    "topics/generate": 30,
+    "topics/generate/stream": 0,
+    "topics/generate_batch": 0,
+    "articles/outline": 30,
+    "articles/outline/stream": 0,
+    "articles/write_section": 60,
+    "articles/write_section/stream": 0,
+    "articles/write_full": 180,
+    "articles/polish": 60,
+    "articles/polish/stream": 0,
+    "images/generate": 45,
+    "jobs": 0, # Submitting and polling are quick; the event stream stays open until the job ends
+}
+
+# Share of the remaining budget a stage may use, so later stages still get time
+DEFAULT_SHARES = {
+    "search": 0.3,
+    "image": 0.5,
+}
+
+# Absolute time.monotonic() by which the current request must be done; None when unbounded
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    """The request's deadline ran out during `stage`. Not a TimeoutError, so limiters don't retry it."""
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded during {stage}")
+        self.stage = stage
+
+def for_path(path: str, requested: Optional[str] = None) -> Optional[float]:
+    """
+    Seconds allowed for a request: REQUEST_DEADLINE_<PATH> or the default for
+    the path. An X-Request-Timeout header can only shorten that (down to
+    REQUEST_DEADLINE_MIN); on a path without a deadline it sets one of at most
+    REQUEST_DEADLINE_MAX. Unparseable or non-finite values are ignored. None
+    means no deadline, which only the server's configuration can choose.
+    """
+    route = path.removeprefix("/api/").strip("/")
+    # The most specific configured route wins ("jobs" covers "jobs/<id>/events")
+    while route and route not in DEFAULT_DEADLINES and not os.getenv(f"REQUEST_DEADLINE_{route.replace('/', '_').upper()}"):
+        route = route.rpartition("/")[0]
+    name = route.replace("/", "_").upper()
+    seconds = float(os.getenv(f"REQUEST_DEADLINE_{name}") or DEFAULT_DEADLINES.get(route, os.getenv("REQUEST_DEADLINE_DEFAULT", "60")))
+    if requested:
+        try:
+            asked = float(requested)
+        except ValueError:
+            asked = math.nan
+        if math.isfinite(asked):
+            floor = float(os.getenv("REQUEST_DEADLINE_MIN", "1"))
+            ceiling = seconds if seconds > 0 else float(os.getenv("REQUEST_DEADLINE_MAX", "300"))
+            seconds = max(min(floor, ceiling), min(asked, ceiling))
+    return seconds if seconds > 0 else None
+
+@contextmanager
+def scope(seconds: Optional[float]):
+    """Run the block under a deadline `seconds` from now (never later than an enclosing one)."""
+    at = time.monotonic() + seconds if seconds is not None else None
+    current = _deadline.get()
+    if current is not None and (at is None or current < at):
+        at = current
+    token = _deadline.set(at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline (may be negative), or None without one."""
+    at = _deadline.get()
+    return at - time.monotonic() if at is not None else None
+
+def stage_budget(stage: str) -> Optional[float]:
+    """This stage's share of the remaining time (DEADLINE_SHARE_<STAGE>), or None without a deadline."""
+    left = remaining()
+    if left is None:
+        return None
+    share = float(os.getenv(f"DEADLINE_SHARE_{stage.upper()}") or DEFAULT_SHARES.get(stage, 1.0))
+    return max(0.0, left * share)
+
+def pressure() -> float:
+    """
+    1.0 with plenty of time left, falling linearly to DEADLINE_MIN_SCALE once
+    less than DEADLINE_TIGHT_SECONDS remain. Used to shrink optional work.
+    """
+    left = remaining()
+    tight = float(os.getenv("DEADLINE_TIGHT_SECONDS", "15"))
+    if left is None or left >= tight:
+        return 1.0
+    return max(float(os.getenv("DEADLINE_MIN_SCALE", "0.25")), left / tight)
+
+def check(stage: str) -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        metrics.incr(f"deadline.{stage}.exceeded")
+        raise DeadlineExceeded(stage)
+
+async def wait(aw: Awaitable[T], stage: str, timeout: Optional[float] = None) -> T:
+    """
+    Await `aw` for at most `timeout` seconds or until the deadline, whichever
+    comes first. Raises DeadlineExceeded when the deadline was the limit, and
+    asyncio.TimeoutError when `timeout` was.
+    """
+    try:
+        check(stage)
+    except DeadlineExceeded:
+        if asyncio.iscoroutine(aw):
+            aw.close() # Never started; close it so it isn't reported as never awaited
+        raise
+    left = remaining()
+    if left is None or (timeout is not None and timeout < left):
+        if timeout is None:
+            return await aw
+        return await asyncio.wait_for(aw, timeout=timeout)
+    try:
+        return await asyncio.wait_for(aw, timeout=left)
+    except asyncio.TimeoutError:
+        metrics.incr(f"deadline.{stage}.exceeded")
+        raise DeadlineExceeded(stage)
+
+def detached_task(coro: Awaitable[T]) -> "asyncio.Task[T]":
+    """
+    Start `coro` as a task outside any request deadline: work shared by several
+    requests (single-flight calls) or outliving one (prefetches) must not be
+    cut short by whichever request happened to start it.
+    """
+    context = contextvars.copy_context()
+    context.run(_deadline.set, None)
+    return asyncio.get_running_loop().create_task(coro, context=context)
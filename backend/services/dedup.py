@@ -0,0 +1,55 @@
+import re
+import hashlib
+from typing import List, Set
+
+from models.topic import SearchResult
+
+# CJK ideographs are one token each (no word boundaries); Latin text splits into words
+_TOKEN_RE = re.compile(r"[一-鿿㐀-䶿]|[a-z0-9]+")
+
+def shingles(text: str, k: int = 3) -> Set[str]:
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < k:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+class MinHashSketch:
+    """
+    Bottom-k MinHash: the k smallest 64-bit shingle hashes. One hash per
+    shingle (instead of one per shingle per permutation) keeps it cheap enough
+    to run on every search response.
+    """
+    def __init__(self, text: str, k: int = 64):
+        self.k = k
+        hashes = {
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+            for s in shingles(text)
+        }
+        self.values = sorted(hashes)[:k]
+
+    def similarity(self, other: "MinHashSketch") -> float:
+        """Estimated Jaccard similarity of the two shingle sets."""
+        if not self.values or not other.values:
+            return 0.0
+        mine, theirs = set(self.values), set(other.values)
+        union_bottom = sorted(mine | theirs)[:self.k]
+        shared = sum(1 for h in union_bottom if h in mine and h in theirs)
+        return shared / len(union_bottom)
+
+def dedupe_results(results: List[SearchResult], threshold: float = 0.7) -> List[SearchResult]:
+    """
+    Drop near-duplicate results (syndicated copies of the same story), keeping
+    the first (highest-ranked) copy. A dropped copy's published_date fills in
+    the kept one if it had none.
+    """
+    kept: List[SearchResult] = []
+    sketches: List[MinHashSketch] = []
+    for result in results:
+        sketch = MinHashSketch(f"{result.title} {result.content}")
+        match = next((i for i, s in enumerate(sketches) if s.similarity(sketch) >= threshold), None)
+        if match is None:
+            kept.append(result)
+            sketches.append(sketch)
+        elif not kept[match].published_date and result.published_date:
+            kept[match] = kept[match].model_copy(update={"published_date": result.published_date})
+    return kept
@@ -0,0 +1,236 @@
+import time
+import uuid
+import asyncio
+import threading
+from typing import List, Optional
+
+from sqlalchemy import delete, func, update
+from sqlmodel import Session, SQLModel, select
+
+from models.article import FullArticleResponse, SectionContent
+from models.draft import (
+    Draft, DraftSection, DraftImage, DraftCreate, DraftPatch, DraftImageInput,
+    DraftView, DraftSectionHeader, DraftSectionView, DraftSaveResult,
+)
+from services.database import close_database, get_engine
+from services.metrics import metrics
+
+class DraftConflict(Exception):
+    """The client edited an older version of the draft or a section than the one stored."""
+    def __init__(self, what: str, current_version: int):
+        super().__init__(f"{what} was changed elsewhere (now at version {current_version})")
+        self.what = what
+        self.current_version = current_version
+
+class DraftStore:
+    """
+    Articles and drafts in the database: topic, outline, section texts and
+    image references. Saves are deltas applied in one transaction, bumping the
+    version of each section that actually changed; reads return the draft's
+    section headers and load a section's text only when it is asked for.
+    """
+    _SECTION_FIELDS = ("title", "description", "key_points", "content")
+    _DRAFT_FIELDS = ("topic_title", "search_summary", "tone", "polished_content")
+
+    def __init__(self, engine=None):
+        self.engine = engine if engine is not None else get_engine()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _session(self) -> Session:
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    SQLModel.metadata.create_all(self.engine, tables=[Draft.__table__, DraftSection.__table__, DraftImage.__table__])
+                    self._schema_ready = True
+        return Session(self.engine)
+
+    async def create(self, tenant: str, data: DraftCreate) -> DraftView:
+        return await asyncio.to_thread(self._create, tenant, data)
+
+    async def get(self, tenant: str, draft_id: str) -> Optional[DraftView]:
+        return await asyncio.to_thread(self._get, tenant, draft_id)
+
+    async def get_section(self, tenant: str, draft_id: str, position: int) -> Optional[DraftSectionView]:
+        return await asyncio.to_thread(self._get_section, tenant, draft_id, position)
+
+    async def save(self, tenant: str, draft_id: str, patch: DraftPatch) -> Optional[DraftSaveResult]:
+        """Apply an autosave delta. None if the draft doesn't exist; DraftConflict on a stale version."""
+        return await asyncio.to_thread(self._save, tenant, draft_id, patch)
+
+    async def assemble(self, tenant: str, draft_id: str) -> Optional[FullArticleResponse]:
+        """The whole article, every section's text included, for export."""
+        return await asyncio.to_thread(self._assemble, tenant, draft_id)
+
+    def _create(self, tenant: str, data: DraftCreate) -> DraftView:
+        now = time.time()
+        draft_id = uuid.uuid4().hex
+        with self._session() as session:
+            session.add(Draft(id=draft_id, tenant=tenant, created_at=now, updated_at=now, **data.model_dump(exclude={"sections", "images"})))
+            for position, section in enumerate(data.sections):
+                session.add(DraftSection(draft_id=draft_id, position=position, updated_at=now, **section.model_dump()))
+            for image in data.images:
+                session.add(DraftImage(draft_id=draft_id, created_at=now, **image.model_dump()))
+            session.commit()
+        metrics.incr("drafts.created")
+        return self._get(tenant, draft_id)
+
+    def _find(self, session: Session, tenant: str, draft_id: str, lock: bool = False) -> Optional[Draft]:
+        query = select(Draft).where(Draft.id == draft_id, Draft.tenant == tenant)
+        if lock:
+            query = query.with_for_update() # Serialise concurrent autosaves of one draft (no-op on SQLite)
+        return session.exec(query).first()
+
+    def _get(self, tenant: str, draft_id: str) -> Optional[DraftView]:
+        with self._session() as session:
+            draft = self._find(session, tenant, draft_id)
+            if draft is None:
+                return None
+            # Headers only: the section texts stay in the database
+            headers = session.exec(
+                select(DraftSection.position, DraftSection.title, DraftSection.description,
+                       DraftSection.key_points, DraftSection.version, DraftSection.content.is_not(None))
+                .where(DraftSection.draft_id == draft_id)
+                .order_by(DraftSection.position)
+            ).all()
+            images = session.exec(select(DraftImage).where(DraftImage.draft_id == draft_id).order_by(DraftImage.id)).all()
+            return DraftView(
+                id=draft.id,
+                keyword=draft.keyword,
+                topic_title=draft.topic_title,
+                search_summary=draft.search_summary,
+                topic_ideas=draft.topic_ideas,
+                tone=draft.tone,
+                model_provider=draft.model_provider,
+                has_polished_content=draft.polished_content is not None,
+                version=draft.version,
+                sections=[
+                    DraftSectionHeader(position=p, title=t, description=d, key_points=k, version=v, has_content=c)
+                    for p, t, d, k, v, c in headers
+                ],
+                images=[DraftImageInput(url=i.url, prompt=i.prompt, section_position=i.section_position) for i in images],
+                created_at=draft.created_at,
+                updated_at=draft.updated_at,
+            )
+
+    def _get_section(self, tenant: str, draft_id: str, position: int) -> Optional[DraftSectionView]:
+        with self._session() as session:
+            section = session.exec(
+                select(DraftSection)
+                .join(Draft, Draft.id == DraftSection.draft_id)
+                .where(Draft.id == draft_id, Draft.tenant == tenant, DraftSection.position == position)
+            ).first()
+            if section is None:
+                return None
+            return DraftSectionView(**section.model_dump(include={"position", "version", *self._SECTION_FIELDS}))
+
+    def _save(self, tenant: str, draft_id: str, patch: DraftPatch) -> Optional[DraftSaveResult]:
+        now = time.time()
+        changed = 0
+        versions = {}
+        with self._session() as session:
+            draft = self._find(session, tenant, draft_id, lock=True)
+            if draft is None:
+                return None
+            if patch.version is not None and patch.version != draft.version:
+                raise DraftConflict("Draft", draft.version)
+
+            draft_changed = False
+            for name in self._DRAFT_FIELDS:
+                value = getattr(patch, name)
+                if value is not None and value != getattr(draft, name):
+                    setattr(draft, name, value)
+                    draft_changed = True
+
+            if patch.removed_sections:
+                changed += self._remove_sections(session, draft_id, sorted(set(patch.removed_sections)))
+
+            if patch.sections:
+                count = session.exec(select(func.count()).select_from(DraftSection).where(DraftSection.draft_id == draft_id)).one()
+                positions = [p.position for p in patch.sections]
+                rows = {
+                    row.position: row
+                    for row in session.exec(select(DraftSection).where(DraftSection.draft_id == draft_id, DraftSection.position.in_(positions)))
+                }
+                for section_patch in sorted(patch.sections, key=lambda p: p.position):
+                    row = rows.get(section_patch.position)
+                    if row is None:
+                        if section_patch.position != count or section_patch.title is None:
+                            raise ValueError(f"Section {section_patch.position} does not exist; new sections need a title and go at position {count}")
+                        row = DraftSection(
+                            draft_id=draft_id, position=count, updated_at=now,
+                            **section_patch.model_dump(include=set(self._SECTION_FIELDS), exclude_none=True),
+                        )
+                        session.add(row)
+                        count += 1
+                        changed += 1
+                    else:
+                        if section_patch.version is not None and section_patch.version != row.version:
+                            raise DraftConflict(f"Section {row.position}", row.version)
+                        updates = {
+                            name: value
+                            for name, value in section_patch.model_dump(include=set(self._SECTION_FIELDS), exclude_none=True).items()
+                            if value != getattr(row, name)
+                        }
+                        if updates:
+                            for name, value in updates.items():
+                                setattr(row, name, value)
+                            row.version += 1
+                            row.updated_at = now
+                            session.add(row)
+                            changed += 1
+                    versions[row.position] = row.version
+
+            for image in patch.images:
+                session.add(DraftImage(draft_id=draft_id, created_at=now, **image.model_dump()))
+                draft_changed = True
+
+            if changed or draft_changed:
+                draft.version += 1
+                draft.updated_at = now
+                session.add(draft)
+                session.commit()
+                metrics.incr("drafts.saved")
+            else:
+                metrics.incr("drafts.unchanged")
+            metrics.observe("drafts.sections_per_save", changed)
+            return DraftSaveResult(id=draft_id, version=draft.version, section_versions=versions, changed=changed)
+
+    @staticmethod
+    def _remove_sections(session: Session, draft_id: str, removed: List[int]) -> int:
+        result = session.exec(delete(DraftSection).where(DraftSection.draft_id == draft_id, DraftSection.position.in_(removed)))
+        # Close the gaps: sections between the i-th and (i+1)-th removed position move up by i+1
+        bounds = removed + [None]
+        for i, start in enumerate(removed):
+            query = update(DraftSection).where(DraftSection.draft_id == draft_id, DraftSection.position > start)
+            if bounds[i + 1] is not None:
+                query = query.where(DraftSection.position < bounds[i + 1])
+            session.exec(query.values(position=DraftSection.position - (i + 1)))
+        return result.rowcount
+
+    def _assemble(self, tenant: str, draft_id: str) -> Optional[FullArticleResponse]:
+        with self._session() as session:
+            draft = self._find(session, tenant, draft_id)
+            if draft is None:
+                return None
+            rows = session.exec(select(DraftSection).where(DraftSection.draft_id == draft_id).order_by(DraftSection.position)).all()
+            sections = [SectionContent(title=row.title, content=row.content or "") for row in rows]
+            return FullArticleResponse(
+                topic=draft.topic_title,
+                sections=sections,
+                content="\n\n".join(f"## {s.title}\n\n{s.content}" for s in sections),
+                polished_content=draft.polished_content,
+            )
+
+_draft_store: Optional[DraftStore] = None
+
+def get_draft_store() -> DraftStore:
+    global _draft_store
+    if _draft_store is None:
+        _draft_store = DraftStore()
+    return _draft_store
+
+def close_draft_store() -> None:
+    global _draft_store
+    _draft_store = None
+    close_database()
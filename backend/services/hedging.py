@@ -0,0 +1,104 @@
+import os
+import asyncio
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from services.metrics import metrics
+
+# An attempt runs one provider and sets the event once its first token arrives
+Attempt = Callable[[str, asyncio.Event], Awaitable[Any]]
+
+def _setting(endpoint: str, name: str, default: str) -> str:
+    """HEDGE_<ENDPOINT>_<NAME> overrides HEDGE_<NAME> for a single endpoint."""
+    return os.getenv(f"HEDGE_{endpoint.upper()}_{name}") or os.getenv(f"HEDGE_{name}") or default
+
+class HedgePolicy:
+    """
+    When to send a backup request to a second provider. The hedge fires if the
+    primary hasn't produced a first token within the given percentile of its
+    recent time-to-first-token, clamped to [min_delay, max_delay]. max_rate caps
+    the share of recent calls that may be hedged, which bounds the extra spend.
+    """
+    _recent: Dict[str, Deque[bool]] = defaultdict(lambda: deque(maxlen=200))
+
+    def __init__(self, endpoint: str, primary: str, secondary: str, percentile: float,
+                 min_delay: float, max_delay: float, max_rate: float):
+        self.endpoint = endpoint
+        self.primary = primary
+        self.secondary = secondary
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_rate = max_rate
+
+    @classmethod
+    def for_endpoint(cls, endpoint: str, primary: str) -> Optional["HedgePolicy"]:
+        if _setting(endpoint, "ENABLED", "0") != "1":
+            return None
+        secondary = _setting(endpoint, "SECONDARY", "openai" if primary != "openai" else "gemini")
+        if secondary == primary:
+            return None
+        return cls(
+            endpoint=endpoint,
+            primary=primary,
+            secondary=secondary,
+            percentile=float(_setting(endpoint, "PERCENTILE", "95")),
+            min_delay=float(_setting(endpoint, "MIN_DELAY", "1.0")),
+            max_delay=float(_setting(endpoint, "MAX_DELAY", "10.0")),
+            max_rate=float(_setting(endpoint, "MAX_RATE", "0.1")),
+        )
+
+    def delay(self) -> float:
+        observed = metrics.percentile(f"llm.ttft.{self.primary}", self.percentile)
+        if observed is None:
+            return self.max_delay
+        return min(self.max_delay, max(self.min_delay, observed))
+
+    def within_budget(self) -> bool:
+        recent = self._recent[self.endpoint]
+        return not recent or sum(recent) / len(recent) < self.max_rate
+
+    def record(self, hedged: bool) -> None:
+        self._recent[self.endpoint].append(hedged)
+        metrics.incr(f"hedge.{self.endpoint}.calls")
+        if hedged:
+            metrics.incr(f"hedge.{self.endpoint}.fired")
+
+async def hedged_call(policy: HedgePolicy, attempt: Attempt) -> Any:
+    """
+    Run the primary attempt; if it stalls before its first token, race a backup
+    on the secondary provider. The first attempt to succeed wins and the other
+    is cancelled. If both fail, the last error is raised.
+    """
+    first_token = asyncio.Event()
+    primary = asyncio.create_task(attempt(policy.primary, first_token))
+    backup: Optional[asyncio.Task] = None
+    try:
+        waiter = asyncio.create_task(first_token.wait())
+        try:
+            await asyncio.wait({primary, waiter}, timeout=policy.delay(), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+
+        if primary.done() or first_token.is_set() or not policy.within_budget():
+            policy.record(False)
+            return await primary
+
+        policy.record(True)
+        backup = asyncio.create_task(attempt(policy.secondary, asyncio.Event()))
+        names = {primary: "primary", backup: "backup"}
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    metrics.incr(f"hedge.{policy.endpoint}.{names[task]}_won")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # The loser (or everything, if we were cancelled) stops here
+        for task in (primary, backup):
+            if task is not None and not task.done():
+                task.cancel()
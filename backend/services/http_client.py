@@ -0,0 +1,101 @@
+import os
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from services.metrics import metrics
+
+try:
+    import h2 # noqa: F401  (needed by httpx for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+class HttpClientPool:
+    """
+    Keep-alive httpx clients shared by the services, one per upstream host so
+    each host gets its own connection limit (Tavily can't starve image
+    downloads). Created in the app lifespan and closed on shutdown.
+    """
+    def __init__(self):
+        self.http2 = os.getenv("HTTP2_ENABLED", "0") == "1" and HTTP2_AVAILABLE
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_PER_HOST", "10")),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+        )
+        self.timeout = httpx.Timeout(
+            float(os.getenv("HTTP_TIMEOUT", "10")),
+            connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+        )
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._in_flight: Dict[str, int] = defaultdict(int)
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        host = urlsplit(url).netloc
+        client = self._clients.get(host)
+        if client is None:
+            client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+            self._clients[host] = client
+        return client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        host = urlsplit(url).netloc
+        client = self.client_for(url)
+        self._in_flight[host] += 1
+        started = time.perf_counter()
+        try:
+            return await client.request(method, url, **kwargs)
+        finally:
+            self._in_flight[host] -= 1
+            metrics.incr(f"http.{host}.requests")
+            metrics.observe(f"http.{host}.latency", time.perf_counter() - started)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        hosts = {}
+        for host, client in self._clients.items():
+            # httpcore's pool isn't public API; report what it exposes, if anything
+            connections = getattr(getattr(client, "_transport", None), "_pool", None)
+            connections = getattr(connections, "connections", [])
+            idle = sum(1 for c in connections if getattr(c, "is_idle", lambda: False)())
+            hosts[host] = {
+                "in_flight": self._in_flight[host],
+                "connections": len(connections),
+                "idle_connections": idle,
+                "utilization": round(self._in_flight[host] / self.limits.max_connections, 3),
+            }
+        return {
+            "http2": self.http2,
+            "max_connections_per_host": self.limits.max_connections,
+            "max_keepalive_per_host": self.limits.max_keepalive_connections,
+            "hosts": hosts,
+        }
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+_http_pool: Optional[HttpClientPool] = None
+
+def get_http_pool() -> HttpClientPool:
+    """FastAPI dependency; also usable outside requests (workers, background tasks)."""
+    global _http_pool
+    if _http_pool is None:
+        _http_pool = HttpClientPool()
+    return _http_pool
+
+async def close_http_pool() -> None:
+    global _http_pool
+    if _http_pool is not None:
+        await _http_pool.aclose()
+        _http_pool = None
@@ -1,13 +1,17 @@
 import os
 import uuid
+import asyncio
+from typing import Optional
 from fastapi import UploadFile
 from pathlib import Path
 
-# Placeholder for real generation
-import httpx 
+from services import deadline
+from services.circuit_breaker import get_breaker
+from services.http_client import HttpClientPool, get_http_pool
 
 class ImageService:
-    def __init__(self):
+    def __init__(self, http_pool: Optional[HttpClientPool] = None):
+        self.http_pool = http_pool or get_http_pool()
         self.storage_path = Path("/data/images") # Map to docker volume or local folder
         self.storage_path.mkdir(parents=True, exist_ok=True)
         # In Docker, we map /data to ./data locally.
@@ -36,10 +40,28 @@ class ImageService:
         
         mock_url = f"https://placehold.co/600x400/png?text={category}"
         
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(mock_url)
+        # Image backend is down: hand back the remote placeholder instead of waiting on it
+        breaker = get_breaker("image")
+        if not breaker.allow():
+            return mock_url
+        
+        try:
+            resp = await deadline.wait(self.http_pool.get(mock_url), "image", timeout=deadline.stage_budget("image"))
+            resp.raise_for_status()
             with open(file_path, "wb") as f:
                 f.write(resp.content)
+        except (deadline.DeadlineExceeded, asyncio.TimeoutError):
+            # Out of time: the remote placeholder still renders, it just isn't stored locally.
+            # Both limits come from the request's deadline, not the backend, so the breaker isn't told.
+            breaker.release_probe()
+            return mock_url
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
                 
         return f"{self.public_url_base}/{filename}"
 
@@ -0,0 +1,94 @@
+import os
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from models.job import JobStatus, CANCELLED, TERMINAL_STATES
+from services.cache import MemoryBackend, shared_backend
+
+class JobStore:
+    """
+    Job status documents in the shared backend, so the API process can report
+    on jobs the Celery workers are running. Needs REDIS_URL outside of
+    single-process (inline) mode. Each job document has a single writer, its
+    runner; a cancel from the API goes under a key of its own, so the runner's
+    next save can't overwrite it, and reads report the job as cancelled. The
+    flag stays until the runner has stopped and stored the cancel itself.
+    Runners of an earlier attempt of a retried job are `superseded` and must
+    stop without writing.
+    """
+    def __init__(self):
+        self.backend = shared_backend()
+        self.ttl = float(os.getenv("JOB_TTL", str(24 * 3600)))
+
+    @property
+    def is_shared(self) -> bool:
+        """False when jobs only live in this process, out of reach of Celery workers."""
+        return not isinstance(self.backend, MemoryBackend)
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"job:{job_id}"
+
+    @staticmethod
+    def _cancel_key(job_id: str) -> str:
+        return f"job:{job_id}:cancel"
+
+    async def create(self, kind: str = "article", request: Optional[Dict[str, Any]] = None) -> JobStatus:
+        now = time.time()
+        job = JobStatus(job_id=uuid.uuid4().hex, kind=kind, request=request, created_at=now, updated_at=now)
+        await self.save(job)
+        return job
+
+    async def load(self, job_id: str) -> Optional[JobStatus]:
+        """The job as its runner last saved it, without a pending cancel applied."""
+        raw = await self.backend.get(self._key(job_id))
+        return JobStatus.model_validate_json(raw) if raw is not None else None
+
+    async def get(self, job_id: str) -> Optional[JobStatus]:
+        job = await self.load(job_id)
+        if job is None:
+            return None
+        if job.state not in TERMINAL_STATES and await self.is_cancelled(job_id):
+            job.state = CANCELLED
+        return job
+
+    async def request_cancel(self, job_id: str) -> None:
+        await self.backend.set(self._cancel_key(job_id), "1", self.ttl)
+
+    async def is_cancelled(self, job_id: str) -> bool:
+        return await self.backend.get(self._cancel_key(job_id)) is not None
+
+    async def clear_cancel(self, job_id: str) -> None:
+        await self.backend.delete(self._cancel_key(job_id))
+
+    async def superseded(self, job: JobStatus) -> bool:
+        """Whether the job has been retried (or has expired) since this copy of it was loaded."""
+        stored = await self.load(job.job_id)
+        return stored is None or stored.attempts != job.attempts
+
+    async def save(self, job: JobStatus) -> None:
+        job.updated_at = time.time()
+        await self.backend.set(self._key(job.job_id), job.model_dump_json(), self.ttl)
+
+    @staticmethod
+    def task_id(job: JobStatus) -> str:
+        # Celery remembers revoked IDs, so a retry of a cancelled job needs a fresh one
+        return job.job_id if job.attempts == 1 else f"{job.job_id}-{job.attempts}"
+
+    async def aclose(self) -> None:
+        await self.backend.aclose()
+
+_job_store: Optional[JobStore] = None
+
+def get_job_store() -> JobStore:
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore()
+    return _job_store
+
+async def close_job_store() -> None:
+    global _job_store
+    if _job_store is not None:
+        await _job_store.aclose()
+        _job_store = None
@@ -0,0 +1,75 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+class JsonArrayStream:
+    """
+    Incremental scanner for model output shaped like `{"<key>": [ {...}, {...} ]}`.
+    Feed it text as it arrives; each object in the named top-level array is
+    returned as soon as its closing brace does. Text outside the JSON (a
+    ```json fence, a preamble) is skipped. Only tracks strings and nesting,
+    so it stays linear in the length of the output.
+    """
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.text = ""
+        self._pos = 0
+        self._stack: List[Tuple[str, Optional[str], int]] = [] # (bracket, key it is the value of, start offset)
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._last_key: Optional[str] = None
+        self._pending_key: Optional[str] = None
+
+    def feed(self, delta: str) -> List[Dict[str, Any]]:
+        """Append `delta` and return the array items completed by it."""
+        self.text += delta
+        completed = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._expect_key and self._stack and self._stack[-1][0] == "{":
+                        self._last_key = self._decode(text[self._string_start:i + 1])
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":" and self._stack and self._stack[-1][0] == "{":
+                self._expect_key = False
+                self._pending_key = self._last_key
+            elif c == "," and self._stack and self._stack[-1][0] == "{":
+                self._expect_key = True
+            elif c in "{[":
+                key = self._pending_key if self._stack and self._stack[-1][0] == "{" else None
+                self._stack.append((c, key, i))
+                self._pending_key = None
+                self._expect_key = c == "{"
+            elif c in "}]" and self._stack:
+                bracket, _, start = self._stack.pop()
+                if bracket == "{" and self._is_item_level():
+                    item = self._decode(text[start:i + 1])
+                    if isinstance(item, dict):
+                        completed.append(item)
+                self._expect_key = False
+        self._pos = len(text)
+        return completed
+
+    def _is_item_level(self) -> bool:
+        # Root object -> our array -> the object that just closed
+        return (len(self._stack) == 2 and self._stack[0][0] == "{"
+                and self._stack[1][0] == "[" and self._stack[1][1] == self.array_key)
+
+    @staticmethod
+    def _decode(raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
@@ -1,32 +1,139 @@
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
+from typing import Dict, Optional, Tuple
+
+import httpx
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_core.language_models import BaseChatModel
 
+# (provider, model, temperature, base_url)
+ClientKey = Tuple[str, str, float, Optional[str]]
+
 class LLMProvider:
+    """
+    Hands out chat models from a registry that lives for the app lifespan.
+    Clients are keyed on (provider, model, temperature, base_url) so every
+    request with the same settings reuses the same keep-alive connection pool.
+    """
+    _clients: Dict[ClientKey, BaseChatModel] = {}
+    _embeddings: Dict[str, Embeddings] = {}
+    _http_client: Optional[httpx.Client] = None
+    _http_async_client: Optional[httpx.AsyncClient] = None
+
+    @staticmethod
+    def model_name(provider: str = "gemini") -> str:
+        if provider == "openai":
+            return os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+        return os.getenv("GEMINI_MODEL", "gemini-pro")
+
     @staticmethod
-    def get_model(provider: str = "gemini", temperature: float = 0.7) -> BaseChatModel:
+    def pool_limits() -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "30")),
+        )
+
+    @classmethod
+    def _shared_http_clients(cls) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        # One pool shared by every OpenAI-compatible client, whatever its model or temperature
+        if cls._http_async_client is None:
+            limits = cls.pool_limits()
+            timeout = httpx.Timeout(float(os.getenv("LLM_HTTP_TIMEOUT", "120")), connect=10.0)
+            cls._http_client = httpx.Client(limits=limits, timeout=timeout)
+            cls._http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        return cls._http_client, cls._http_async_client
+
+    @classmethod
+    def get_model(cls, provider: str = "gemini", temperature: float = 0.7) -> BaseChatModel:
+        model = cls.model_name(provider)
+        base_url = os.getenv("OPENAI_BASE_URL", None) if provider == "openai" else None
+        key: ClientKey = ("openai" if provider == "openai" else "gemini", model, float(temperature), base_url)
+
+        client = cls._clients.get(key)
+        if client is None:
+            client = cls._build_model(key)
+            cls._clients[key] = client
+        return client
+
+    @classmethod
+    def _build_model(cls, key: ClientKey) -> BaseChatModel:
+        provider, model, temperature, base_url = key
         if provider == "openai":
             api_key = os.getenv("OPENAI_API_KEY")
-            base_url = os.getenv("OPENAI_BASE_URL", None) # Support custom endpoints (DeepSeek etc)
             if not api_key:
                 raise ValueError("OPENAI_API_KEY is not set")
+            http_client, http_async_client = cls._shared_http_clients()
             return ChatOpenAI(
-                model="gpt-3.5-turbo", # Default, can be configurable
+                model=model,
                 temperature=temperature,
                 api_key=api_key,
-                base_url=base_url
+                base_url=base_url, # Support custom endpoints (DeepSeek etc)
+                http_client=http_client,
+                http_async_client=http_async_client,
             )
-        
+
         # Default to Gemini
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             # Fallback for dev without keys? No, better functionality requires keys.
             print("Warning: GEMINI_API_KEY is not set.")
-        
+
+        # The Gemini SDK keeps its own transport per model instance, so reusing
+        # the instance is what keeps its connections warm.
         return ChatGoogleGenerativeAI(
-            model="gemini-pro",
+            model=model,
             temperature=temperature,
             google_api_key=api_key,
-            convert_system_message_to_human=True 
+            convert_system_message_to_human=True
         )
+
+    @classmethod
+    def get_embeddings(cls, provider: str = "gemini") -> Embeddings:
+        provider = "openai" if provider == "openai" else "gemini"
+        embeddings = cls._embeddings.get(provider)
+        if embeddings is not None:
+            return embeddings
+
+        if provider == "openai":
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY is not set")
+            http_client, http_async_client = cls._shared_http_clients()
+            embeddings = OpenAIEmbeddings(
+                model=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small"),
+                api_key=api_key,
+                base_url=os.getenv("OPENAI_BASE_URL", None),
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+        else:
+            embeddings = GoogleGenerativeAIEmbeddings(
+                model=os.getenv("GEMINI_EMBEDDING_MODEL", "models/embedding-001"),
+                google_api_key=os.getenv("GEMINI_API_KEY"),
+            )
+        cls._embeddings[provider] = embeddings
+        return embeddings
+
+    @classmethod
+    def stats(cls) -> dict:
+        limits = cls.pool_limits()
+        return {
+            "clients": len(cls._clients),
+            "max_connections": limits.max_connections,
+            "max_keepalive_connections": limits.max_keepalive_connections,
+            "keepalive_expiry": limits.keepalive_expiry,
+        }
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Drop cached clients and close the shared pools. Called on app shutdown."""
+        cls._clients.clear()
+        cls._embeddings.clear()
+        if cls._http_async_client is not None:
+            await cls._http_async_client.aclose()
+            cls._http_async_client = None
+        if cls._http_client is not None:
+            cls._http_client.close()
+            cls._http_client = None
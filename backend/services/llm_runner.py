@@ -0,0 +1,235 @@
+import os
+import time
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, BaseMessageChunk
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import BaseOutputParser, JsonOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from services import deadline
+from services.cache import cache_key, get_response_cache
+from services.circuit_breaker import CircuitOpenError, get_breaker
+from services.hedging import HedgePolicy, hedged_call
+from services.json_stream import JsonArrayStream
+from services.llm_provider import LLMProvider
+from services.metrics import metrics
+from services.rate_limiter import get_limiter
+from services.scheduler import get_scheduler
+from services.singleflight import SingleFlight
+from services.tokens import estimate_tokens
+
+# Identical prompts already on their way to the provider are shared, not repeated
+_llm_flight = SingleFlight("llm")
+
+class LLMRunner:
+    """
+    Single path from the agents to the chat models. Agents build the prompt and
+    parser; the runner renders the prompt and decides how the model gets called
+    (response cache first, then one shared in-flight call per identical prompt,
+    then the provider's circuit breaker and rate limiter, optionally hedged
+    against a second provider).
+    """
+
+    @staticmethod
+    async def invoke(
+        endpoint: str,
+        prompt: ChatPromptTemplate,
+        parser: BaseOutputParser,
+        provider: str = "gemini",
+        temperature: float = 0.7,
+        inputs: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True,
+    ) -> Any:
+        messages = await prompt.aformat_messages(**(inputs or {}))
+        cache = get_response_cache()
+
+        if not use_cache:
+            metrics.incr(f"cache.{endpoint}.bypass")
+            return await LLMRunner._call(endpoint, provider, temperature, messages, parser)
+
+        key = LLMRunner.request_key(endpoint, provider, temperature, messages)
+        if cache.is_active(endpoint):
+            cached = await cache.get(endpoint, key)
+            if cached is not None:
+                return cached
+
+        async def call_and_store():
+            result = await LLMRunner._call(endpoint, provider, temperature, messages, parser)
+            await cache.set(endpoint, key, result)
+            return result
+
+        return await _llm_flight.do(key, call_and_store)
+
+    @staticmethod
+    async def stream(
+        endpoint: str,
+        prompt: ChatPromptTemplate,
+        provider: str = "gemini",
+        temperature: float = 0.7,
+        inputs: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[BaseMessageChunk]:
+        """Yield raw message chunks. Streams always go to the provider; they are not cached."""
+        messages = await prompt.aformat_messages(**(inputs or {}))
+        async for chunk in LLMRunner._stream_messages(provider, temperature, messages):
+            yield chunk
+
+    @staticmethod
+    async def stream_json(
+        endpoint: str,
+        prompt: ChatPromptTemplate,
+        array_key: str,
+        provider: str = "gemini",
+        temperature: float = 0.7,
+        inputs: Optional[Dict[str, Any]] = None,
+        use_cache: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the objects of the `array_key` array in the model's JSON reply as
+        each one closes. Shares cache entries with `invoke`: a cached reply is
+        replayed item by item, and a streamed one is parsed whole at the end
+        and stored under the same key.
+        """
+        messages = await prompt.aformat_messages(**(inputs or {}))
+        cache = get_response_cache()
+        key = LLMRunner.request_key(endpoint, provider, temperature, messages)
+
+        if not use_cache:
+            metrics.incr(f"cache.{endpoint}.bypass")
+        elif cache.is_active(endpoint):
+            cached = await cache.get(endpoint, key)
+            if cached is not None:
+                for item in (cached.get(array_key) or []) if isinstance(cached, dict) else []:
+                    yield item
+                return
+
+        scanner = JsonArrayStream(array_key)
+        async for chunk in LLMRunner._stream_messages(provider, temperature, messages):
+            delta = chunk.content if isinstance(chunk.content, str) else ""
+            for item in scanner.feed(delta):
+                yield item
+
+        try:
+            result = JsonOutputParser().parse(scanner.text)
+        except OutputParserException:
+            return
+        await cache.set(endpoint, key, result)
+
+    @staticmethod
+    async def _stream_messages(provider: str, temperature: float, messages: List[BaseMessage]) -> AsyncIterator[BaseMessageChunk]:
+        provider = LLMRunner._route(provider)
+        breaker = get_breaker(f"llm.{provider}")
+        if not breaker.allow():
+            raise CircuitOpenError(breaker.name)
+
+        llm = LLMProvider.get_model(provider, temperature=temperature)
+        estimate = LLMRunner._estimate(messages)
+        try:
+            async with get_scheduler().slot(estimate), get_limiter(provider).slot(estimate):
+                started = time.perf_counter()
+                first = True
+                async for chunk in llm.astream(messages):
+                    if first:
+                        metrics.observe(f"llm.ttft.{provider}", time.perf_counter() - started)
+                        first = False
+                    yield chunk
+        except (asyncio.CancelledError, GeneratorExit):
+            metrics.incr(f"llm.{provider}.cancelled")
+            breaker.release_probe()
+            raise
+        except deadline.DeadlineExceeded:
+            breaker.release_probe()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+
+    @staticmethod
+    def request_key(endpoint: str, provider: str, temperature: float, messages: List[BaseMessage]) -> str:
+        rendered = [(m.type, m.content) for m in messages]
+        return cache_key(endpoint, provider, LLMProvider.model_name(provider), float(temperature), rendered)
+
+    @staticmethod
+    async def _call(endpoint: str, provider: str, temperature: float, messages: List[BaseMessage], parser: BaseOutputParser) -> Any:
+        provider = LLMRunner._route(provider)
+        policy = HedgePolicy.for_endpoint(endpoint, provider)
+        if policy is None:
+            return await LLMRunner._attempt(provider, temperature, messages, parser)
+
+        async def attempt(name: str, first_token: asyncio.Event) -> Any:
+            return await LLMRunner._attempt(name, temperature, messages, parser, first_token)
+
+        return await hedged_call(policy, attempt)
+
+    @staticmethod
+    async def _attempt(provider: str, temperature: float, messages: List[BaseMessage],
+                       parser: BaseOutputParser, first_token: Optional[asyncio.Event] = None) -> Any:
+        deadline.check(f"llm.{provider}")
+        breaker = get_breaker(f"llm.{provider}")
+        if not breaker.allow():
+            raise CircuitOpenError(breaker.name)
+
+        async def call() -> Any:
+            if first_token is None:
+                llm = LLMProvider.get_model(provider, temperature=temperature)
+                chain = llm | parser
+                coro = chain.ainvoke(messages)
+            else:
+                coro = LLMRunner._streamed_attempt(provider, temperature, messages, parser, first_token)
+            return await deadline.wait(coro, f"llm.{provider}", timeout=float(os.getenv("LLM_TIMEOUT", "60")))
+
+        async def scheduled() -> Any:
+            # Wait our turn among tenants and work classes, then queue behind the provider's
+            # RPM/TPM buckets and concurrency window; throttled calls are requeued
+            estimate = LLMRunner._estimate(messages)
+            async with get_scheduler().slot(estimate):
+                return await get_limiter(provider).run(estimate, call)
+
+        try:
+            result = await deadline.wait(scheduled(), f"llm.{provider}.queue")
+        except asyncio.CancelledError:
+            # Hedge losers and abandoned requests say nothing about the provider
+            metrics.incr(f"llm.{provider}.cancelled")
+            breaker.release_probe()
+            raise
+        except deadline.DeadlineExceeded:
+            breaker.release_probe() # The request ran out of time; not the provider's fault
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return result
+
+    @staticmethod
+    def _route(provider: str) -> str:
+        """Fail over at once to LLM_FAILOVER_PROVIDER while this provider's breaker would reject the call."""
+        provider = "openai" if provider == "openai" else "gemini"
+        if get_breaker(f"llm.{provider}").available():
+            return provider
+        alternate = os.getenv("LLM_FAILOVER_PROVIDER") or ("gemini" if provider == "openai" else "openai")
+        if alternate != provider and get_breaker(f"llm.{alternate}").available():
+            metrics.incr(f"circuit.llm.{provider}.failover")
+            return alternate
+        return provider
+
+    @staticmethod
+    def _estimate(messages: List[BaseMessage]) -> int:
+        prompt_tokens = sum(estimate_tokens(m.content) for m in messages if isinstance(m.content, str))
+        return prompt_tokens + int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "800"))
+
+    @staticmethod
+    async def _streamed_attempt(provider: str, temperature: float, messages: List[BaseMessage],
+                                parser: BaseOutputParser, first_token: asyncio.Event) -> Any:
+        # Hedging needs to see the first token, so the attempt streams and parses the joined text at the end
+        llm = LLMProvider.get_model(provider, temperature=temperature)
+        started = time.perf_counter()
+        parts = []
+        async for chunk in llm.astream(messages):
+            if not first_token.is_set():
+                metrics.observe(f"llm.ttft.{provider}", time.perf_counter() - started)
+                first_token.set()
+            parts.append(chunk.content if isinstance(chunk.content, str) else "")
+        return parser.parse("".join(parts))
@@ -0,0 +1,44 @@
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+class Metrics:
+    """
+    In-process counters and latency samples, served as JSON on /metrics.
+    Samples are a bounded window so percentiles track recent behaviour.
+    """
+    def __init__(self, window: int = 500):
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def incr(self, name: str, value: float = 1) -> None:
+        self._counters[name] += value
+
+    def count(self, name: str) -> float:
+        return self._counters.get(name, 0)
+
+    def observe(self, name: str, value: float) -> None:
+        self._samples[name].append(value)
+
+    def percentile(self, name: str, q: float) -> Optional[float]:
+        samples = self._samples.get(name)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": dict(sorted(self._counters.items())),
+            "timings": {
+                name: {
+                    "count": len(samples),
+                    "p50": self.percentile(name, 50),
+                    "p95": self.percentile(name, 95),
+                    "p99": self.percentile(name, 99),
+                }
+                for name, samples in sorted(self._samples.items())
+            },
+        }
+
+metrics = Metrics()
@@ -0,0 +1,183 @@
+import os
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from models.topic import TopicResponse
+from services import deadline
+from services.cache import get_response_cache
+from services.metrics import metrics
+from services.rate_limiter import TokenBucket
+from services.scheduler import PREFETCH, known_tenant, work_context
+
+# (topic_title, search_summary, provider): the inputs that make up the outline prompt
+PrefetchKey = Tuple[str, str, str]
+
+class _Prefetch:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.claimed = False
+
+class OutlinePrefetcher:
+    """
+    Speculative outlines. After /topics/generate, the top-N ideas are outlined
+    in the background; the results land in the response cache under the same
+    prompt key /outline will use, so the editor's pick is a cache hit (or
+    coalesces with the call still in flight). Each tenant (of TENANTS; the
+    rest share one) has an hourly prefetch budget, and a session's pending
+    prefetches are cancelled once it moves on: new topics, or an outline was
+    requested. Requests without an X-Session-ID can't be told apart, so they
+    get no prefetches. OUTLINE_PREFETCH_ENABLED has the final say; a request
+    can only opt out.
+    """
+    def __init__(self):
+        self.enabled = os.getenv("OUTLINE_PREFETCH_ENABLED", "0") == "1"
+        self.top_n = int(os.getenv("OUTLINE_PREFETCH_TOP_N", "2"))
+        self.max_in_flight = int(os.getenv("OUTLINE_PREFETCH_MAX_IN_FLIGHT", "8"))
+        self.max_sessions = int(os.getenv("OUTLINE_PREFETCH_MAX_SESSIONS", "1000"))
+        self.tenant_per_hour = float(os.getenv("OUTLINE_PREFETCH_TENANT_PER_HOUR", "60"))
+        self.tenant_burst = float(os.getenv("OUTLINE_PREFETCH_TENANT_BURST", "10"))
+        self.max_tenants = int(os.getenv("OUTLINE_PREFETCH_MAX_TENANTS", "1000"))
+        self._budgets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._sessions: "OrderedDict[str, Dict[PrefetchKey, _Prefetch]]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set() # Strong refs; a claimed prefetch keeps running after its session ends
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def schedule(self, tenant: str, session: str, result: TopicResponse, provider: str, requested: Optional[bool] = None) -> int:
+        """Start outlines for the top ideas in `result`. Returns how many were started."""
+        if not self.enabled or requested is False:
+            return 0
+        tenant = known_tenant(tenant)
+        if not session:
+            # Without a session every anonymous caller would share one and cancel each other's prefetches
+            metrics.incr("prefetch.outline.skipped_no_session")
+            return 0
+        self._end_session(tenant, session)
+        if not get_response_cache().is_active("outline"):
+            return 0 # Nowhere to put the result; /outline would redo the work anyway
+
+        from agents.outline_agent import OutlineAgent # Agents import services, not the other way round
+
+        budget = self._budget(tenant)
+        entries: Dict[PrefetchKey, _Prefetch] = {}
+        for idea in result.topics[:self.top_n]:
+            if self.in_flight() >= self.max_in_flight:
+                metrics.incr("prefetch.outline.skipped_capacity")
+                break
+            if not budget.try_acquire():
+                metrics.incr("prefetch.outline.skipped_budget")
+                metrics.incr(f"prefetch.outline.tenant.{tenant}.skipped_budget")
+                break
+            key = (idea.title, result.search_summary, provider)
+            coro = OutlineAgent().generate_outline(idea.title, result.search_summary, provider)
+            task = deadline.detached_task(self._run(tenant, coro)) # Outlives the topics request
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            entries[key] = _Prefetch(task)
+            metrics.incr("prefetch.outline.scheduled")
+            metrics.incr(f"prefetch.outline.tenant.{tenant}.scheduled")
+
+        if entries:
+            self._sessions[self._session_key(tenant, session)] = entries
+            while len(self._sessions) > self.max_sessions:
+                _, evicted = self._sessions.popitem(last=False)
+                self._discard(evicted)
+        return len(entries)
+
+    def claim(self, tenant: str, session: str, topic_title: str, search_summary: str, provider: str) -> None:
+        """
+        Called by /outline before it generates. Records whether a prefetch
+        covered this request and cancels the session's other pending
+        prefetches. A matching prefetch is left running: the route's own call
+        joins it through the runner's single-flight, or reads its cached result.
+        """
+        if not session:
+            return
+        tenant = known_tenant(tenant)
+        entries = self._sessions.pop(self._session_key(tenant, session), None)
+        if not entries:
+            return
+        match = entries.pop((topic_title, search_summary, provider), None)
+        if match is None:
+            metrics.incr("prefetch.outline.miss")
+            metrics.incr(f"prefetch.outline.tenant.{tenant}.miss")
+        else:
+            match.claimed = True
+            outcome = "hit" if match.task.done() else "joined"
+            metrics.incr(f"prefetch.outline.{outcome}")
+            metrics.incr(f"prefetch.outline.tenant.{tenant}.{outcome}")
+        self._discard(entries)
+
+    async def _run(self, tenant: str, coro) -> None:
+        try:
+            with work_context(PREFETCH, tenant):
+                await coro
+            metrics.incr("prefetch.outline.completed")
+        except asyncio.CancelledError:
+            metrics.incr("prefetch.outline.cancelled")
+            raise
+        except Exception as e:
+            print(f"Outline prefetch error ({tenant}): {e}")
+            metrics.incr("prefetch.outline.failed")
+
+    def _budget(self, tenant: str) -> TokenBucket:
+        bucket = self._budgets.get(tenant)
+        if bucket is None:
+            bucket = self._budgets[tenant] = TokenBucket(self.tenant_per_hour / 60, capacity=self.tenant_burst)
+            while len(self._budgets) > self.max_tenants:
+                self._budgets.popitem(last=False) # Least recently used; it starts over with a full burst
+        else:
+            self._budgets.move_to_end(tenant)
+        return bucket
+
+    def _end_session(self, tenant: str, session: str) -> None:
+        entries = self._sessions.pop(self._session_key(tenant, session), None)
+        if entries:
+            self._discard(entries)
+
+    @staticmethod
+    def _discard(entries: Dict[PrefetchKey, _Prefetch]) -> None:
+        for prefetch in entries.values():
+            if not prefetch.task.done():
+                prefetch.task.cancel()
+            elif not prefetch.claimed:
+                metrics.incr("prefetch.outline.wasted")
+
+    @staticmethod
+    def _session_key(tenant: str, session: str) -> str:
+        return f"{tenant}:{session}"
+
+    def stats(self) -> dict:
+        scheduled = metrics.count("prefetch.outline.scheduled")
+        used = metrics.count("prefetch.outline.hit") + metrics.count("prefetch.outline.joined")
+        return {
+            "enabled": self.enabled,
+            "top_n": self.top_n,
+            "tenant_per_hour": self.tenant_per_hour,
+            "in_flight": self.in_flight(),
+            "sessions": len(self._sessions),
+            "hit_rate": round(used / scheduled, 3) if scheduled else None,
+        }
+
+    async def aclose(self) -> None:
+        tasks = list(self._tasks)
+        self._sessions.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+_prefetcher: Optional[OutlinePrefetcher] = None
+
+def get_prefetcher() -> OutlinePrefetcher:
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = OutlinePrefetcher()
+    return _prefetcher
+
+async def close_prefetcher() -> None:
+    global _prefetcher
+    if _prefetcher is not None:
+        await _prefetcher.aclose()
+        _prefetcher = None
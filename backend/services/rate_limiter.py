@@ -0,0 +1,159 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.metrics import metrics
+
+class TokenBucket:
+    """
+    Refills at `per_minute / 60` units per second up to `capacity`. Callers
+    queue on the lock in arrival order and sleep until enough units are
+    available, so bursts are delayed rather than rejected. 0 means unlimited.
+    """
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        if self.per_minute <= 0:
+            return
+        amount = min(amount, self.capacity) # A single oversized request still gets through eventually
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+    def try_acquire(self, amount: float = 1) -> bool:
+        """Take `amount` units if they are available now; never waits."""
+        if self.per_minute <= 0:
+            return True
+        self._refill()
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency window: each success grows the limit by 1/limit (about +1
+    per full window), each throttle or timeout halves it. Callers over the
+    limit wait for a slot instead of failing.
+    """
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = 64):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self.waiting = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            self.waiting += 1
+            try:
+                await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+
+    async def release(self, outcome: str) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            if outcome == "ok":
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            elif outcome == "throttled":
+                self.limit = max(self.min_limit, self.limit / 2)
+            self._cond.notify_all()
+
+def is_throttle_error(e: BaseException) -> bool:
+    """429s and quota errors from either SDK, plus timeouts: all signals to back off."""
+    if isinstance(e, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    if getattr(e, "status_code", None) == 429 or getattr(e, "code", None) == 429:
+        return True
+    name = type(e).__name__
+    if name in ("RateLimitError", "ResourceExhausted", "TooManyRequests") or "Timeout" in name:
+        return True
+    text = str(e).lower()
+    return "429" in text or "rate limit" in text or "quota" in text
+
+class ProviderLimiter:
+    """Requests/min and tokens/min buckets plus an AIMD concurrency window for one provider."""
+    def __init__(self, provider: str):
+        name = provider.upper()
+        self.provider = provider
+        self.requests = TokenBucket(float(os.getenv(f"LLM_RPM_{name}", "0")))
+        self.tokens = TokenBucket(float(os.getenv(f"LLM_TPM_{name}", "0")))
+        self.concurrency = AdaptiveConcurrency(
+            initial=int(os.getenv(f"LLM_CONCURRENCY_{name}", "8")),
+            min_limit=int(os.getenv("LLM_MIN_CONCURRENCY", "1")),
+            max_limit=int(os.getenv(f"LLM_MAX_CONCURRENCY_{name}", "32")),
+        )
+        self.max_retries = int(os.getenv("LLM_THROTTLE_RETRIES", "3"))
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        started = time.perf_counter()
+        await self.concurrency.acquire()
+        outcome = "error"
+        try:
+            await self.requests.acquire(1)
+            await self.tokens.acquire(estimated_tokens)
+            metrics.observe(f"ratelimit.{self.provider}.wait", time.perf_counter() - started)
+            yield
+            outcome = "ok"
+        except BaseException as e:
+            if is_throttle_error(e):
+                outcome = "throttled"
+                metrics.incr(f"ratelimit.{self.provider}.throttled")
+            raise
+        finally:
+            await self.concurrency.release(outcome)
+
+    async def run(self, estimated_tokens: int, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn inside a slot, requeueing with backoff when the provider throttles."""
+        attempt = 0
+        while True:
+            try:
+                async with self.slot(estimated_tokens):
+                    return await fn()
+            except Exception as e:
+                if not is_throttle_error(e) or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                metrics.incr(f"ratelimit.{self.provider}.requeued")
+                await asyncio.sleep(min(30.0, 2 ** attempt))
+
+    def stats(self) -> dict:
+        return {
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "waiting": self.concurrency.waiting,
+            "rpm": self.requests.per_minute,
+            "tpm": self.tokens.per_minute,
+        }
+
+_limiters: Dict[str, ProviderLimiter] = {}
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    provider = "openai" if provider == "openai" else "gemini"
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limiter = _limiters[provider] = ProviderLimiter(provider)
+    return limiter
+
+def limiter_stats() -> dict:
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
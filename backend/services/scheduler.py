@@ -0,0 +1,287 @@
+import os
+import time
+import asyncio
+import contextvars
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict, Optional, Set
+
+from services.metrics import metrics
+
+# Work classes in strict priority order
+INTERACTIVE = "interactive"
+PREFETCH = "prefetch"
+BATCH = "batch"
+CLASSES = [INTERACTIVE, PREFETCH, BATCH]
+
+# Work class by API path (after /api/); anything not listed is interactive
+PATH_CLASSES = {
+    "topics/generate_batch": BATCH,
+    "jobs": BATCH,
+}
+
+# Tenants the shared budgets are kept for; anyone else (the X-Tenant-ID header is the client's word) shares this one
+DEFAULT_TENANT = "anonymous"
+# Background work the server starts itself (cache warming)
+SYSTEM_TENANT = "system"
+
+# Who the current LLM work is for, set per request by SchedulingMiddleware and by background runners
+_work_class: contextvars.ContextVar[str] = contextvars.ContextVar("work_class", default=INTERACTIVE)
+_tenant: contextvars.ContextVar[str] = contextvars.ContextVar("tenant", default=DEFAULT_TENANT)
+# Set inside work shared by callers of several classes; overrides _work_class
+_shared: contextvars.ContextVar[Optional["SharedWork"]] = contextvars.ContextVar("shared_work", default=None)
+
+def known_tenant(tenant: Optional[str]) -> str:
+    """
+    `tenant` if it is one of TENANTS (comma-separated), else the default
+    bucket. Queues, budgets and metric names are kept per tenant, so a client
+    mustn't be able to mint new ones, or a fresh fair share, with a header.
+    """
+    tenant = (tenant or "").strip()
+    known = {t.strip() for t in os.getenv("TENANTS", "").split(",")}
+    return tenant if tenant and tenant in known else DEFAULT_TENANT
+
+@contextmanager
+def work_context(work_class: Optional[str] = None, tenant: Optional[str] = None):
+    """Attribute LLM calls made inside the block (and tasks started from it) to this class and tenant."""
+    tokens = []
+    if work_class is not None:
+        tokens.append((_work_class, _work_class.set(work_class)))
+    if tenant is not None:
+        tokens.append((_tenant, _tenant.set(tenant)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+def class_for_path(path: str) -> str:
+    route = path.removeprefix("/api/").strip("/")
+    while route and route not in PATH_CLASSES:
+        route = route.rpartition("/")[0]
+    return PATH_CLASSES.get(route, INTERACTIVE)
+
+def current_work_class() -> str:
+    shared = _shared.get()
+    return shared.work_class if shared is not None else _work_class.get()
+
+def _rank(work_class: str) -> int:
+    return CLASSES.index(work_class) if work_class in CLASSES else 0
+
+class SharedWork:
+    """
+    The class of a call several callers wait on (single-flight): the highest
+    among them. An interactive request joining a batch-started call raises it,
+    moving its queued LLM slots to the interactive queue so the request isn't
+    stuck behind the batch backlog.
+    """
+    def __init__(self, work_class: str):
+        self.work_class = work_class
+        self.queued: Set["_Waiter"] = set()
+
+    def raise_to(self, work_class: str) -> None:
+        if _rank(work_class) >= _rank(self.work_class):
+            return
+        self.work_class = work_class
+        for waiter in list(self.queued):
+            get_scheduler()._promote(waiter, work_class)
+
+@contextmanager
+def shared_work(work: SharedWork):
+    """Attribute LLM calls made inside the block to `work`'s class, following it as it is raised."""
+    token = _shared.set(work)
+    try:
+        yield
+    finally:
+        _shared.reset(token)
+
+def current_tenant() -> str:
+    return _tenant.get()
+
+class _Waiter:
+    def __init__(self, work_class: str, tenant: str, cost: float):
+        self.work_class = work_class
+        self.tenant = tenant
+        self.cost = cost
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+class FairScheduler:
+    """
+    Admission in front of every LLM call. Classes are served in strict
+    priority (interactive, then prefetch, then batch), each under its own
+    concurrency cap so bulk work can never hold every slot. Within a class,
+    tenants share by deficit round robin: each visit adds quantum x tenant
+    weight to the tenant's deficit and calls are admitted while it covers
+    their estimated tokens, so one tenant's 50-keyword batch interleaves with
+    everyone else's instead of running ahead of them.
+    """
+    def __init__(self):
+        self.enabled = os.getenv("LLM_SCHEDULER_ENABLED", "1") == "1"
+        self.capacity = int(os.getenv("LLM_SCHEDULER_CAPACITY", "16"))
+        defaults = {INTERACTIVE: self.capacity, PREFETCH: max(1, self.capacity // 4), BATCH: max(1, self.capacity // 2)}
+        self.caps = {c: int(os.getenv(f"LLM_SCHEDULER_MAX_{c.upper()}") or defaults[c]) for c in CLASSES}
+        self.quantum = float(os.getenv("LLM_SCHEDULER_QUANTUM", "2000"))
+        self.running = {c: 0 for c in CLASSES}
+        self._queues: Dict[str, Dict[str, Deque[_Waiter]]] = {c: {} for c in CLASSES}
+        self._rotation: Dict[str, Deque[str]] = {c: deque() for c in CLASSES}
+        self._deficit: Dict[str, Dict[str, float]] = {c: {} for c in CLASSES}
+
+    @staticmethod
+    def weight(tenant: str) -> float:
+        return max(0.01, float(os.getenv(f"LLM_SCHEDULER_TENANT_WEIGHT_{tenant.upper()}", "1")))
+
+    def queued(self, work_class: str) -> int:
+        return sum(len(q) for q in self._queues[work_class].values())
+
+    @asynccontextmanager
+    async def slot(self, cost: float = 1):
+        if not self.enabled:
+            yield
+            return
+        work_class = current_work_class()
+        if work_class not in self.running:
+            work_class = INTERACTIVE
+        tenant = current_tenant()
+        started = time.perf_counter()
+
+        if self._can_start_now(work_class):
+            self.running[work_class] += 1
+        else:
+            waiter = self._enqueue(_Waiter(work_class, tenant, cost))
+            shared = _shared.get()
+            if shared is not None:
+                shared.queued.add(waiter)
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    self._release(waiter.work_class) # Granted just as we were cancelled; hand the slot on
+                else:
+                    self._remove(waiter)
+                raise
+            finally:
+                if shared is not None:
+                    shared.queued.discard(waiter)
+            work_class = waiter.work_class # Promoted while queued
+
+        waited = time.perf_counter() - started
+        metrics.observe(f"scheduler.{work_class}.wait", waited)
+        metrics.incr(f"scheduler.{work_class}.admitted")
+        metrics.incr(f"scheduler.tenant.{tenant}.{work_class}.admitted")
+        try:
+            yield
+        finally:
+            self._release(work_class)
+
+    def _can_start_now(self, work_class: str) -> bool:
+        # Only skip the queue when nobody of equal or higher priority is waiting
+        if sum(self.running.values()) >= self.capacity or self.running[work_class] >= self.caps[work_class]:
+            return False
+        for c in CLASSES[:CLASSES.index(work_class) + 1]:
+            if self._rotation[c]:
+                return False
+        return True
+
+    def _enqueue(self, waiter: _Waiter) -> _Waiter:
+        work_class, tenant = waiter.work_class, waiter.tenant
+        queues = self._queues[work_class]
+        if tenant not in queues or not queues[tenant]:
+            queues[tenant] = deque()
+            self._rotation[work_class].append(tenant)
+            self._deficit[work_class][tenant] = 0.0
+        queues[tenant].append(waiter)
+        return waiter
+
+    def _unqueue(self, waiter: _Waiter) -> bool:
+        queue = self._queues[waiter.work_class].get(waiter.tenant)
+        if not queue or waiter not in queue:
+            return False
+        queue.remove(waiter)
+        if not queue:
+            self._drop_tenant(waiter.work_class, waiter.tenant)
+        return True
+
+    def _remove(self, waiter: _Waiter) -> None:
+        self._unqueue(waiter)
+        self._dispatch()
+
+    def _promote(self, waiter: _Waiter, work_class: str) -> None:
+        """Move a still-queued waiter to a higher class's queue."""
+        if waiter.future.done() or work_class not in self.running or not self._unqueue(waiter):
+            return
+        waiter.work_class = work_class
+        self._enqueue(waiter)
+        metrics.incr(f"scheduler.{work_class}.promoted")
+        self._dispatch()
+
+    def _drop_tenant(self, work_class: str, tenant: str) -> None:
+        self._queues[work_class].pop(tenant, None)
+        self._deficit[work_class].pop(tenant, None)
+        try:
+            self._rotation[work_class].remove(tenant)
+        except ValueError:
+            pass
+
+    def _release(self, work_class: str) -> None:
+        self.running[work_class] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while sum(self.running.values()) < self.capacity:
+            for work_class in CLASSES:
+                if self.running[work_class] >= self.caps[work_class]:
+                    continue
+                waiter = self._next(work_class)
+                if waiter is not None:
+                    self.running[work_class] += 1
+                    waiter.future.set_result(None)
+                    break
+            else:
+                return
+
+    def _next(self, work_class: str) -> Optional[_Waiter]:
+        """Deficit round robin over the class's tenants."""
+        rotation = self._rotation[work_class]
+        deficits = self._deficit[work_class]
+        while rotation:
+            tenant = rotation[0]
+            queue = self._queues[work_class][tenant]
+            head = queue[0]
+            if head.future.done(): # Cancelled while queued
+                queue.popleft()
+                if not queue:
+                    self._drop_tenant(work_class, tenant)
+                continue
+            if deficits[tenant] >= head.cost:
+                deficits[tenant] -= head.cost
+                queue.popleft()
+                if not queue:
+                    self._drop_tenant(work_class, tenant)
+                return head
+            deficits[tenant] += self.quantum * self.weight(tenant)
+            rotation.rotate(-1)
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "capacity": self.capacity,
+            "classes": {
+                c: {
+                    "running": self.running[c],
+                    "queued": self.queued(c),
+                    "max": self.caps[c],
+                    "tenants_waiting": len(self._rotation[c]),
+                    "wait_p95": metrics.percentile(f"scheduler.{c}.wait", 95),
+                }
+                for c in CLASSES
+            },
+        }
+
+_scheduler: Optional[FairScheduler] = None
+
+def get_scheduler() -> FairScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = FairScheduler()
+    return _scheduler
@@ -0,0 +1,94 @@
+import os
+import json
+import time
+from typing import List, Optional, Tuple
+
+from models.topic import SearchResult
+from services.cache import LRUCache, RedisBackend, aioredis, effective_ttl
+from services.metrics import metrics
+
+class SearchCache:
+    """
+    Search results keyed by normalised query and max_results. Entries are fresh
+    for `ttl` seconds and may be served stale for another `stale_ttl` while the
+    caller refreshes them in the background (stale-while-revalidate). A bounded
+    LRU holds entries in process; Redis backs it when REDIS_URL is set.
+    """
+    def __init__(self):
+        self.ttl = float(os.getenv("SEARCH_CACHE_TTL", "900"))
+        self.stale_ttl = float(os.getenv("SEARCH_CACHE_STALE_TTL", "3600"))
+        self.enabled = self.ttl > 0
+        self.local = LRUCache(int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000")))
+        url = os.getenv("REDIS_URL")
+        use_redis = os.getenv("SEARCH_CACHE_REDIS", "1") == "1"
+        self.shared = RedisBackend(url) if url and use_redis and aioredis is not None else None
+
+    @staticmethod
+    def key(query: str, max_results: int) -> str:
+        return f"search:{' '.join(query.lower().split())}|{max_results}"
+
+    async def get(self, key: str) -> Optional[Tuple[List[SearchResult], bool]]:
+        """Return (results, is_fresh), or None on a miss or once the entry is past its stale window."""
+        if not self.enabled:
+            return None
+        raw = self.local.get(key)
+        if raw is None and self.shared is not None:
+            raw = await self.shared.get(key)
+            if raw is not None:
+                self.local.set(key, raw, self.ttl + self.stale_ttl)
+        if raw is None:
+            metrics.incr("search_cache.miss")
+            return None
+
+        entry = json.loads(raw)
+        age = time.time() - entry["fetched_at"]
+        ttl = entry.get("ttl", self.ttl) # Warmed entries stay fresh for longer
+        if age > ttl + self.stale_ttl:
+            metrics.incr("search_cache.miss")
+            return None
+        # Inside min_ttl (cache warming), an entry that won't stay fresh for long enough counts as stale
+        fresh = age <= ttl and ttl >= effective_ttl(self.ttl)
+        metrics.incr("search_cache.hit" if fresh else "search_cache.stale")
+        return [SearchResult(**r) for r in entry["results"]], fresh
+
+    async def set(self, key: str, results: List[SearchResult]) -> None:
+        if not self.enabled:
+            return
+        ttl = effective_ttl(self.ttl)
+        raw = json.dumps({
+            "fetched_at": time.time(),
+            "ttl": ttl,
+            "results": [r.model_dump() for r in results],
+        }, ensure_ascii=False)
+        lifetime = ttl + self.stale_ttl
+        self.local.set(key, raw, lifetime)
+        if self.shared is not None:
+            await self.shared.set(key, raw, lifetime)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "local_entries": len(self.local),
+            "local_max_entries": self.local.max_entries,
+            "redis": self.shared is not None,
+        }
+
+    async def aclose(self) -> None:
+        if self.shared is not None:
+            await self.shared.aclose()
+
+_search_cache: Optional[SearchCache] = None
+
+def get_search_cache() -> SearchCache:
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SearchCache()
+    return _search_cache
+
+async def close_search_cache() -> None:
+    global _search_cache
+    if _search_cache is not None:
+        await _search_cache.aclose()
+        _search_cache = None
@@ -0,0 +1,150 @@
+import os
+import json
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Type
+
+from models.topic import SearchResult
+from services.http_client import HttpClientPool
+
+class SearchProvider(ABC):
+    """
+    One search source. `search` returns up to `limit` results, best first;
+    errors propagate and SearchService drops the source for that query.
+    Sources talking to a remote service set `breaker` to the name of their
+    circuit breaker.
+    """
+    name = "base"
+    breaker: Optional[str] = None
+
+    def __init__(self, http_pool: HttpClientPool):
+        self.http_pool = http_pool
+
+    def is_configured(self) -> bool:
+        return True
+
+    @abstractmethod
+    async def search(self, query: str, limit: int) -> List[SearchResult]:
+        ...
+
+    @staticmethod
+    def _max_chars() -> int:
+        # Hard cap only; ContextPacker trims to the prompt budget at sentence boundaries
+        return int(os.getenv("SEARCH_RESULT_MAX_CHARS", "1000"))
+
+class TavilyProvider(SearchProvider):
+    name = "tavily"
+    breaker = "tavily"
+
+    def __init__(self, http_pool: HttpClientPool):
+        super().__init__(http_pool)
+        self.api_key = os.getenv("TAVILY_API_KEY")
+        self.base_url = "https://api.tavily.com/search"
+
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
+
+    async def search(self, query: str, limit: int) -> List[SearchResult]:
+        payload = {
+            "api_key": self.api_key,
+            "query": query,
+            "search_depth": os.getenv("TAVILY_SEARCH_DEPTH", "basic"),
+            "include_images": False,
+            "max_results": min(20, limit)
+        }
+        response = await self.http_pool.post(self.base_url, json=payload)
+        response.raise_for_status()
+        data = response.json()
+
+        return [
+            SearchResult(
+                title=result.get("title", ""),
+                url=result.get("url", ""),
+                content=result.get("content", "")[:self._max_chars()],
+                published_date=result.get("published_date")
+            )
+            for result in data.get("results", [])
+        ]
+
+class ArticleIndexProvider(SearchProvider):
+    """
+    Our own article index behind SEARCH_ARTICLE_INDEX_URL. POSTs
+    {"query", "max_results"} and expects {"results": [SearchResult, ...]}.
+    """
+    name = "article_index"
+    breaker = "article_index"
+
+    def __init__(self, http_pool: HttpClientPool):
+        super().__init__(http_pool)
+        self.url = os.getenv("SEARCH_ARTICLE_INDEX_URL")
+
+    def is_configured(self) -> bool:
+        return bool(self.url)
+
+    async def search(self, query: str, limit: int) -> List[SearchResult]:
+        response = await self.http_pool.post(self.url, json={"query": query, "max_results": limit})
+        response.raise_for_status()
+        max_chars = self._max_chars()
+        results = []
+        for item in response.json().get("results", []):
+            result = SearchResult(**item)
+            results.append(result.model_copy(update={"content": result.content[:max_chars]}))
+        return results
+
+class FixtureProvider(SearchProvider):
+    """
+    Canned results for tests and keyless local runs. SEARCH_FIXTURES_FILE may
+    map queries to result lists ("*" for any query); otherwise two generic
+    results mentioning the query are returned.
+    """
+    name = "fixture"
+
+    def __init__(self, http_pool: HttpClientPool):
+        super().__init__(http_pool)
+        self.fixtures: Dict[str, list] = {}
+        path = os.getenv("SEARCH_FIXTURES_FILE")
+        if path:
+            with open(path, encoding="utf-8") as f:
+                self.fixtures = json.load(f)
+
+    async def search(self, query: str, limit: int) -> List[SearchResult]:
+        items = self.fixtures.get(query, self.fixtures.get("*"))
+        if items is not None:
+            return [SearchResult(**item) for item in items[:limit]]
+        return [
+            SearchResult(
+                title=f"Why {query} is trending now",
+                url="https://example.com/mock1",
+                content=f"This is a mock search result describing why {query} is important in 2024. It covers the latest trends and user reactions.",
+                published_date="2024-01-20"
+            ),
+            SearchResult(
+                title=f"The complete guide to {query}",
+                url="https://example.com/mock2",
+                content=f"Comprehensive analysis of {query} focusing on technical details and future outlook.",
+                published_date="2024-01-19"
+            )
+        ][:limit]
+
+SEARCH_PROVIDERS: Dict[str, Type[SearchProvider]] = {
+    TavilyProvider.name: TavilyProvider,
+    ArticleIndexProvider.name: ArticleIndexProvider,
+    FixtureProvider.name: FixtureProvider,
+}
+
+def build_providers(http_pool: HttpClientPool) -> List[SearchProvider]:
+    """The configured sources from SEARCH_PROVIDERS (comma-separated, in priority order), skipping unconfigured ones."""
+    providers = []
+    for name in os.getenv("SEARCH_PROVIDERS", "tavily").split(","):
+        name = name.strip()
+        if not name:
+            continue
+        cls = SEARCH_PROVIDERS.get(name)
+        if cls is None:
+            print(f"Warning: unknown search provider '{name}'")
+            continue
+        provider = cls(http_pool)
+        if not provider.is_configured():
+            print(f"Warning: search provider '{name}' is not configured. Skipping it.")
+            continue
+        providers.append(provider)
+    return providers
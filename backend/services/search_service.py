@@ -1,56 +1,164 @@
 import os
-import httpx
-from typing import List, Dict, Optional
+import math
+import time
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
 from models.topic import SearchResult
+from services import deadline
+from services.http_client import HttpClientPool, get_http_pool
+from services.singleflight import SingleFlight
+from services.circuit_breaker import get_breaker
+from services.search_cache import SearchCache, get_search_cache
+from services.search_providers import FixtureProvider, SearchProvider, build_providers
+from services.dedup import dedupe_results
+from services.metrics import metrics
+
+# Concurrent searches for the same query share one fan-out
+_search_flight = SingleFlight("search")
+# Strong refs so background refreshes aren't garbage-collected mid-flight
+_refreshes: Set[asyncio.Task] = set()
 
 class SearchService:
-    def __init__(self):
-        self.api_key = os.getenv("TAVILY_API_KEY")
-        self.base_url = "https://api.tavily.com/search"
+    """
+    Fans a query out to the configured sources (SEARCH_PROVIDERS) in
+    parallel, each under its own deadline, then merges the answers by
+    reciprocal rank, drops near-duplicates and caches the result. A source
+    that is slow, failing or behind an open breaker is left out, so search
+    latency is bounded by the deadline rather than the slowest source.
+    """
+    def __init__(self, http_pool: Optional[HttpClientPool] = None):
+        self.http_pool = http_pool or get_http_pool()
+        self.cache = get_search_cache()
+        self.providers = build_providers(self.http_pool)
+        self.fallback = FixtureProvider(self.http_pool)
 
     async def search(self, query: str, max_results: int = 5) -> List[SearchResult]:
-        if not self.api_key:
-            print("Warning: TAVILY_API_KEY not found. Returning mock data.")
-            return self._get_mock_results(query)
-
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "api_key": self.api_key,
-                "query": query,
-                "search_depth": "basic",
-                "include_images": False,
-                "max_results": max_results
-            }
-            try:
-                response = await client.post(self.base_url, json=payload, timeout=10.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                results = []
-                for result in data.get("results", []):
-                    results.append(SearchResult(
-                        title=result.get("title", ""),
-                        url=result.get("url", ""),
-                        content=result.get("content", "")[:300], # Trucate context
-                        published_date=result.get("published_date")
-                    ))
-                return results
-            except Exception as e:
-                print(f"Search API Error: {e}")
-                return []
-
-    def _get_mock_results(self, query: str) -> List[SearchResult]:
-        return [
-            SearchResult(
-                title=f"Why {query} is trending now",
-                url="https://example.com/mock1",
-                content=f"This is a mock search result describing why {query} is important in 2024. It covers the latest trends and user reactions.",
-                published_date="2024-01-20"
-            ),
-            SearchResult(
-                title=f"The complete guide to {query}",
-                url="https://example.com/mock2",
-                content=f"Comprehensive analysis of {query} focusing on technical details and future outlook.",
-                published_date="2024-01-19"
-            )
-        ]
+        if not self.providers:
+            return await self.fallback.search(query, max_results)
+
+        key = self._key(query, max_results)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            results, fresh = cached
+            if not fresh:
+                self._refresh_in_background(key, query, max_results)
+            return results
+
+        # Every source is known to be down: skip the timeouts and serve the mock results
+        if all(p.breaker and get_breaker(p.breaker).is_open() for p in self.providers):
+            return await self.fallback.search(query, max_results)
+
+        # Under a request deadline, sources only get the search stage's share of the time left
+        cap = deadline.stage_budget("search")
+        if cap is not None and cap < float(os.getenv("DEADLINE_MIN_SEARCH", "0.5")):
+            metrics.incr("deadline.search.skipped")
+            return []
+        try:
+            return await _search_flight.do(key, lambda: self._fetch(key, query, max_results, cap))
+        except deadline.DeadlineExceeded:
+            return []
+
+    async def warm(self, query: str, max_results: int = 5) -> bool:
+        """Make sure the cache holds a fresh entry for `query`. Returns True if it already did."""
+        if not self.providers or not self.cache.enabled:
+            return False
+        key = self._key(query, max_results)
+        cached = await self.cache.get(key)
+        if cached is not None and cached[1]:
+            return True
+        await _search_flight.do(key, lambda: self._fetch(key, query, max_results))
+        return False
+
+    def _key(self, query: str, max_results: int) -> str:
+        # The source set is part of the key so changing SEARCH_PROVIDERS doesn't serve the old mix
+        return SearchCache.key(query, max_results) + "|" + ",".join(p.name for p in self.providers)
+
+    def _refresh_in_background(self, key: str, query: str, max_results: int) -> None:
+        # Goes through the same flight, so a refresh and a cold request for the key share one call
+        task = deadline.detached_task(_search_flight.do(key, lambda: self._fetch(key, query, max_results)))
+        _refreshes.add(task)
+        task.add_done_callback(_refreshes.discard)
+
+    async def _fetch(self, key: str, query: str, max_results: int, cap: Optional[float] = None) -> List[SearchResult]:
+        # Over-fetch so the slots freed by dropping syndicated copies can be refilled
+        overfetch = float(os.getenv("SEARCH_OVERFETCH_FACTOR", "1.5"))
+        limit = math.ceil(max_results * overfetch)
+
+        answers = await asyncio.gather(*(self._query_source(p, query, limit, cap) for p in self.providers))
+        ranked = [(p, results) for p, (results, _) in zip(self.providers, answers) if results is not None]
+        if not ranked:
+            return [] # Every source failed or timed out; don't cache the miss
+
+        merged = self._merge(ranked)
+        unique = dedupe_results(merged, float(os.getenv("SEARCH_DEDUP_THRESHOLD", "0.7")))
+        metrics.incr("search.dedup.dropped", len(merged) - len(unique))
+        results = unique[:max_results]
+        if any(cut for _, cut in answers):
+            # Short of a source only because this request was short of time: don't cache the partial answer
+            metrics.incr("deadline.search.partial")
+        else:
+            await self.cache.set(key, results)
+        return results
+
+    async def _query_source(self, provider: SearchProvider, query: str, limit: int,
+                            cap: Optional[float] = None) -> Tuple[Optional[List[SearchResult]], bool]:
+        """
+        One source's results (None if it was skipped, failed or missed its
+        deadline), and whether the request deadline `cap` cut it short.
+        """
+        breaker = get_breaker(provider.breaker) if provider.breaker else None
+        if breaker is not None and not breaker.allow():
+            metrics.incr(f"search.{provider.name}.skipped")
+            return None, False
+
+        timeout = float(os.getenv(f"SEARCH_DEADLINE_{provider.name.upper()}") or os.getenv("SEARCH_DEADLINE", "4"))
+        capped = cap is not None and cap < timeout
+        if capped:
+            timeout = cap
+        started = time.perf_counter()
+        try:
+            results = await asyncio.wait_for(provider.search(query, limit), timeout=timeout)
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.release_probe()
+            raise
+        except asyncio.TimeoutError:
+            print(f"Search Source Timeout ({provider.name}) after {timeout:.1f}s")
+            metrics.incr(f"search.{provider.name}.timeout")
+            if breaker is not None:
+                if capped:
+                    breaker.release_probe() # Only this request's deadline was short; no verdict on the source
+                else:
+                    breaker.record_failure()
+            return None, capped
+        except Exception as e:
+            print(f"Search API Error ({provider.name}): {e}")
+            metrics.incr(f"search.{provider.name}.error")
+            if breaker is not None:
+                breaker.record_failure()
+            return None, False
+        finally:
+            metrics.observe(f"search.{provider.name}.latency", time.perf_counter() - started)
+
+        if breaker is not None:
+            breaker.record_success()
+        return results, False
+
+    @staticmethod
+    def _merge(ranked: List[Tuple[SearchProvider, List[SearchResult]]]) -> List[SearchResult]:
+        """
+        Reciprocal rank fusion: each source contributes weight / (k + rank) per
+        result (SEARCH_WEIGHT_<SOURCE>, default 1). The same URL from several
+        sources adds up; ties keep source priority order.
+        """
+        k = float(os.getenv("SEARCH_RRF_K", "60"))
+        scores: Dict[str, float] = {}
+        by_url: Dict[str, SearchResult] = {}
+        for provider, results in ranked:
+            weight = float(os.getenv(f"SEARCH_WEIGHT_{provider.name.upper()}", "1"))
+            for rank, result in enumerate(results):
+                url = result.url or f"{provider.name}:{rank}"
+                scores[url] = scores.get(url, 0.0) + weight / (k + rank + 1)
+                by_url.setdefault(url, result)
+        order = sorted(scores, key=lambda url: scores[url], reverse=True) # Stable: ties keep first-seen order
+        return [by_url[url] for url in order]
@@ -0,0 +1,262 @@
+import os
+import re
+import json
+import math
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.cache import effective_ttl
+from services.llm_provider import LLMProvider
+from services.metrics import metrics
+
+try:
+    import psycopg2
+    from psycopg2.pool import ThreadedConnectionPool
+except ImportError: # pgvector tier is optional; the in-process index takes over
+    psycopg2 = None
+
+Vector = List[float]
+
+# Terms that name a different thing when they differ ("iPhone 15" / "iPhone 16", "2024年" / "2025年")
+_NUMBER_RE = re.compile(r"\d+")
+_WORD_RE = re.compile(r"[a-z]+")
+
+class HashingEmbedder:
+    """
+    Dependency-free embedder: hashed character uni/bi-grams, L2-normalised.
+    For tests and offline development (SEMANTIC_CACHE_EMBEDDINGS=local). It
+    can't tell "iPhone 15" from "iPhone 16", so its hits also need every
+    number and Latin word to match exactly.
+    """
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    async def aembed_query(self, text: str) -> Vector:
+        chars = "".join(text.lower().split())
+        grams = list(chars) + [chars[i:i + 2] for i in range(len(chars) - 1)]
+        vector = [0.0] * self.dim
+        for gram in grams:
+            digest = hashlib.md5(gram.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0
+        return _normalise(vector)
+
+def _normalise(vector: Vector) -> Vector:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+def _cosine(a: Vector, b: Vector) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+class InMemoryVectorIndex:
+    """Brute-force cosine search per namespace. Fallback when Postgres isn't available."""
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries: Dict[str, List[Tuple[float, Vector, str, str]]] = {}
+
+    async def add(self, namespace: str, vector: Vector, text: str, payload: str, ttl: float) -> None:
+        entries = self._entries.setdefault(namespace, [])
+        entries.append((time.monotonic() + ttl, vector, text, payload))
+        if len(entries) > self.max_entries:
+            del entries[0]
+
+    async def search(self, namespace: str, vector: Vector) -> Optional[Tuple[float, str, str]]:
+        now = time.monotonic()
+        entries = [e for e in self._entries.get(namespace, []) if e[0] > now]
+        self._entries[namespace] = entries
+        best = None
+        for _, stored, text, payload in entries:
+            score = _cosine(vector, stored)
+            if best is None or score > best[0]:
+                best = (score, text, payload)
+        return best
+
+    async def aclose(self) -> None:
+        pass
+
+class PgVectorIndex:
+    """
+    pgvector-backed index with an HNSW cosine index. psycopg2 is blocking, so
+    queries run in a worker thread. The table is created on first use, once the
+    embedding dimension is known (one table per dimension). Inserts purge
+    expired rows every SEMANTIC_CACHE_PURGE_INTERVAL seconds: HNSW filters
+    after its approximate search, so dead rows left in the index would crowd
+    out live matches.
+    """
+    def __init__(self, dsn: str):
+        self.pool = ThreadedConnectionPool(1, int(os.getenv("SEMANTIC_CACHE_PG_POOL", "5")), dsn)
+        self.purge_interval = float(os.getenv("SEMANTIC_CACHE_PURGE_INTERVAL", "300"))
+        self._ready_dims = set()
+        self._purged_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def _table(self, dim: int) -> str:
+        return f"semantic_cache_{dim}"
+
+    def _ensure_table(self, conn, dim: int) -> None:
+        with self._lock:
+            if dim in self._ready_dims:
+                return
+            table = self._table(dim)
+            with conn.cursor() as cur:
+                cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
+                cur.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        id BIGSERIAL PRIMARY KEY,
+                        namespace TEXT NOT NULL,
+                        text TEXT NOT NULL,
+                        payload JSONB NOT NULL,
+                        embedding vector({dim}) NOT NULL,
+                        expires_at TIMESTAMPTZ NOT NULL
+                    )
+                """)
+                cur.execute(f"CREATE INDEX IF NOT EXISTS {table}_hnsw ON {table} USING hnsw (embedding vector_cosine_ops)")
+                cur.execute(f"CREATE INDEX IF NOT EXISTS {table}_ns ON {table} (namespace, expires_at)")
+            conn.commit()
+            self._ready_dims.add(dim)
+
+    def _purge_due(self, dim: int) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._purged_at.get(dim, float("-inf")) < self.purge_interval:
+                return False
+            self._purged_at[dim] = now
+            return True
+
+    def _run(self, fn):
+        conn = self.pool.getconn()
+        try:
+            return fn(conn)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+    async def add(self, namespace: str, vector: Vector, text: str, payload: str, ttl: float) -> None:
+        def insert(conn):
+            self._ensure_table(conn, len(vector))
+            with conn.cursor() as cur:
+                if self._purge_due(len(vector)):
+                    cur.execute(f"DELETE FROM {self._table(len(vector))} WHERE expires_at <= now()")
+                    if cur.rowcount:
+                        metrics.incr("semantic_cache.purged", cur.rowcount)
+                cur.execute(
+                    f"INSERT INTO {self._table(len(vector))} (namespace, text, payload, embedding, expires_at) "
+                    "VALUES (%s, %s, %s, %s::vector, now() + %s * interval '1 second')",
+                    (namespace, text, payload, _vector_literal(vector), ttl),
+                )
+            conn.commit()
+        await asyncio.to_thread(self._run, insert)
+
+    async def search(self, namespace: str, vector: Vector) -> Optional[Tuple[float, str, str]]:
+        def query(conn):
+            self._ensure_table(conn, len(vector))
+            literal = _vector_literal(vector)
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT 1 - (embedding <=> %s::vector), text, payload::text FROM {self._table(len(vector))} "
+                    "WHERE namespace = %s AND expires_at > now() "
+                    "ORDER BY embedding <=> %s::vector LIMIT 1",
+                    (literal, namespace, literal),
+                )
+                return cur.fetchone()
+        row = await asyncio.to_thread(self._run, query)
+        return (float(row[0]), row[1], row[2]) if row else None
+
+    async def aclose(self) -> None:
+        self.pool.closeall()
+
+def _vector_literal(vector: Vector) -> str:
+    return "[" + ",".join(f"{v:.6f}" for v in vector) + "]"
+
+class SemanticCache:
+    """
+    Similarity cache for keyword-driven generations (topics, outlines). The
+    keyword/topic is embedded and the closest stored entry in the same
+    namespace is returned if its cosine similarity clears the threshold and
+    both name the same numbers (years, model numbers), which embeddings
+    rate as near-identical.
+    """
+    def __init__(self, index=None, embedder=None):
+        self.enabled = os.getenv("SEMANTIC_CACHE_ENABLED", "0") == "1"
+        # Hashed n-grams score lower than model embeddings for the same pair, so the default depends on the source
+        source = os.getenv("SEMANTIC_CACHE_EMBEDDINGS", "gemini")
+        self.threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD") or ("0.75" if source == "local" else "0.9"))
+        self.ttl = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+        self.index = index if index is not None else self._default_index()
+        self._embedder = embedder
+
+    @staticmethod
+    def _default_index():
+        dsn = os.getenv("DATABASE_URL", "")
+        if os.getenv("SEMANTIC_CACHE_BACKEND", "pgvector") == "pgvector" and dsn.startswith("postgres") and psycopg2 is not None:
+            try:
+                return PgVectorIndex(dsn)
+            except Exception as e:
+                print(f"Semantic Cache: pgvector unavailable ({e}), using in-process index")
+        return InMemoryVectorIndex(int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000")))
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            source = os.getenv("SEMANTIC_CACHE_EMBEDDINGS", "gemini")
+            self._embedder = HashingEmbedder() if source == "local" else LLMProvider.get_embeddings(source)
+        return self._embedder
+
+    async def lookup(self, namespace: str, text: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        try:
+            vector = await self.embedder.aembed_query(text)
+            match = await self.index.search(namespace, vector)
+        except Exception as e:
+            print(f"Semantic Cache Error: {e}")
+            return None
+
+        kind = namespace.split(":")[0]
+        if match is None or match[0] < self.threshold:
+            metrics.incr(f"semantic_cache.{kind}.miss")
+            return None
+        if self._pinned_terms(text) != self._pinned_terms(match[1]):
+            metrics.incr(f"semantic_cache.{kind}.term_mismatch")
+            return None
+        metrics.incr(f"semantic_cache.{kind}.hit")
+        metrics.observe(f"semantic_cache.{kind}.similarity", match[0])
+        return json.loads(match[2])
+
+    def _pinned_terms(self, text: str) -> Tuple[frozenset, ...]:
+        """What must match exactly for a hit: numbers, and with the hashing embedder Latin words too."""
+        text = text.lower()
+        numbers = frozenset(_NUMBER_RE.findall(text))
+        if not isinstance(self.embedder, HashingEmbedder):
+            return (numbers,)
+        return (numbers, frozenset(_WORD_RE.findall(text)))
+
+    async def store(self, namespace: str, text: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        try:
+            vector = await self.embedder.aembed_query(text)
+            await self.index.add(namespace, vector, text, json.dumps(value, ensure_ascii=False), effective_ttl(self.ttl))
+        except Exception as e:
+            print(f"Semantic Cache Error: {e}")
+
+    async def aclose(self) -> None:
+        await self.index.aclose()
+
+_semantic_cache: Optional[SemanticCache] = None
+
+def get_semantic_cache() -> SemanticCache:
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
+
+async def close_semantic_cache() -> None:
+    global _semantic_cache
+    if _semantic_cache is not None:
+        await _semantic_cache.aclose()
+        _semantic_cache = None
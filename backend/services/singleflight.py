@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from services import deadline
+from services.metrics import metrics
+from services.scheduler import SharedWork, current_work_class, shared_work
+
+class _Call:
+    def __init__(self, task: asyncio.Future, work: SharedWork):
+        self.task = task
+        self.work = work
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: the first caller for a key starts the
+    work, later callers with the same key await the same future and get the
+    same result or exception. The shared call is only cancelled once every
+    waiter has gone away, so one impatient client can't fail the rest. It
+    runs at the highest scheduler class among its waiters, not just the
+    starter's.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            # The shared call runs without the starter's deadline; each waiter bounds its own wait
+            work = SharedWork(current_work_class())
+            call = _Call(deadline.detached_task(self._run(work, fn)), work)
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            metrics.incr(f"singleflight.{self.name}.calls")
+        else:
+            call.work.raise_to(current_work_class())
+            metrics.incr(f"singleflight.{self.name}.coalesced")
+
+        call.waiters += 1
+        try:
+            return await deadline.wait(asyncio.shield(call.task), f"singleflight.{self.name}")
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    @staticmethod
+    async def _run(work: SharedWork, fn: Callable[[], Awaitable[Any]]) -> Any:
+        with shared_work(work):
+            return await fn()
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,64 @@
+import json
+import time
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import BaseMessageChunk
+
+from services.tokens import estimate_tokens
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no", # Stop nginx from buffering the stream
+        },
+    )
+
+async def sse_token_stream(chunks: AsyncIterator[BaseMessageChunk]) -> AsyncIterator[str]:
+    """
+    Relay model chunks as `token` events, then a `done` event with usage.
+    Errors after the stream has started can't become an HTTP status, so they
+    are sent as an `error` event instead.
+    """
+    started = time.perf_counter()
+    first_token_at = None
+    parts = []
+    reported_usage = {}
+
+    try:
+        async for chunk in chunks:
+            delta = chunk.content if isinstance(chunk.content, str) else ""
+            metadata = getattr(chunk, "response_metadata", None) or {}
+            reported_usage.update(metadata.get("token_usage") or metadata.get("usage_metadata") or {})
+            if not delta:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            parts.append(delta)
+            yield sse_event("token", {"delta": delta})
+    except Exception as e:
+        print(f"Stream Error: {e}")
+        yield sse_event("error", {"detail": str(e)})
+        return
+
+    content = "".join(parts)
+    usage = {
+        "completion_tokens": estimate_tokens(content),
+        "characters": len(content),
+        "estimated": True,
+    }
+    if reported_usage:
+        usage = {**reported_usage, "estimated": False}
+
+    yield sse_event("done", {
+        "usage": usage,
+        "time_to_first_token_ms": round((first_token_at - started) * 1000) if first_token_at else None,
+        "duration_ms": round((time.perf_counter() - started) * 1000),
+    })
@@ -0,0 +1,35 @@
+from functools import lru_cache
+
+try:
+    import tiktoken # Installed with langchain-openai
+except ImportError:
+    tiktoken = None
+
+def estimate_tokens(text: str) -> int:
+    # Rough count without a tokenizer: CJK chars ~1 token each, other text ~4 chars per token
+    cjk = sum(1 for ch in text if "一" <= ch <= "鿿")
+    return cjk + (len(text) - cjk + 3) // 4
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """The model's encoding, or None if it can't be loaded (cached too, so offline we don't retry the download)."""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e: # e.g. BPE file can't be downloaded
+        print(f"Tokenizer Error ({model}): {e}")
+        return None
+
+def count_tokens(text: str, provider: str = "gemini") -> int:
+    """
+    Tokens as the provider would bill them: tiktoken for OpenAI-compatible
+    models, the CJK-aware estimate for Gemini (its counter is a network call).
+    """
+    if provider == "openai" and tiktoken is not None:
+        from services.llm_provider import LLMProvider
+        encoding = _encoding(LLMProvider.model_name("openai"))
+        if encoding is not None:
+            return len(encoding.encode(text))
+    return estimate_tokens(text)
@@ -0,0 +1,15 @@
+from typing import Optional
+from celery_app import celery_app, run_async
+from agents.article_job import ArticleJob
+from models.job import ArticleJobRequest
+from services.scheduler import BATCH, known_tenant, work_context
+
+@celery_app.task(name="tasks.articles.generate_article", acks_late=True)
+def generate_article(job_id: str, request: dict, tenant: str = "anonymous", attempt: Optional[int] = None) -> str:
+    """Run an article job submitted through /api/jobs/articles. Progress goes to the job store, not the result backend."""
+    async def run():
+        with work_context(BATCH, known_tenant(tenant)):
+            return await ArticleJob().run(job_id, ArticleJobRequest(**request), attempt, owner=tenant)
+
+    job = run_async(run())
+    return job.state if job is not None else "missing"
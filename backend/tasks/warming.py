@@ -0,0 +1,16 @@
+import os
+from celery_app import celery_app, run_async
+from services.cache_warming import CacheWarmer, load_trending_keywords
+from services.scheduler import BATCH, SYSTEM_TENANT, work_context
+
+@celery_app.task(name="tasks.warming.warm_trending_keywords", soft_time_limit=int(os.getenv("WARM_TIME_LIMIT", "3600")))
+def warm_trending_keywords(keywords=None, provider=None) -> dict:
+    """Fill the search and topic caches for trending keywords. Pass `keywords` to warm a given list instead."""
+    async def run():
+        with work_context(BATCH, SYSTEM_TENANT):
+            warmer = CacheWarmer(provider=provider)
+            return await warmer.run(keywords or await load_trending_keywords(warmer.http_pool))
+
+    report = run_async(run())
+    print(f"Warming: {report['keywords']} keywords, coverage {report['coverage']}")
+    return report
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules import each other as `services.x`, `models.x`: run from the backend directory's point of view
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
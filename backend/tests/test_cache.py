@@ -0,0 +1,109 @@
+import asyncio
+import types
+
+import pytest
+
+from models.topic import SearchResult
+from services import cache
+from services import search_cache as search_cache_module
+from services.cache import LRUCache, MemoryBackend, ResponseCache, cache_key, effective_ttl, min_ttl
+from services.search_cache import SearchCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+def test_cache_key_is_canonical():
+    assert cache_key("topics", {"a": 1, "b": [1, 2]}) == cache_key("topics", {"b": [1, 2], "a": 1})
+    assert cache_key("topics", {"a": 1}) != cache_key("outline", {"a": 1})
+    assert len(cache_key("x")) == 64
+
+def test_lru_evicts_least_recently_used(clock):
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1, 60)
+    lru.set("b", 2, 60)
+    assert lru.get("a") == 1 # Now most recently used
+    lru.set("c", 3, 60)
+    assert lru.get("b") is None and lru.get("a") == 1 and lru.get("c") == 3
+    assert len(lru) == 2
+
+def test_lru_entries_expire(clock):
+    lru = LRUCache()
+    lru.set("a", 1, 60)
+    clock.value += 60
+    assert lru.get("a") == 1
+    clock.value += 1
+    assert lru.get("a") is None and len(lru) == 0
+
+def test_shared_hit_is_promoted_to_the_local_tier():
+    shared = MemoryBackend()
+    writer = ResponseCache(backend=shared)
+    reader = ResponseCache(backend=shared) # Another worker
+
+    async def main():
+        await writer.set("topics", "k", {"ideas": ["一", "two"]})
+        assert len(reader.local) == 0
+        assert await reader.get("topics", "k") == {"ideas": ["一", "two"]}
+        assert len(reader.local) == 1
+        await shared.delete("llm:topics:k")
+        assert await reader.get("topics", "k") == {"ideas": ["一", "two"]}
+        assert await reader.get("topics", "other") is None
+
+    asyncio.run(main())
+
+def test_zero_ttl_namespace_is_not_cached(monkeypatch):
+    monkeypatch.setenv("CACHE_TTL_OUTLINE", "0")
+    response_cache = ResponseCache(backend=MemoryBackend())
+    assert not response_cache.is_active("outline") and not response_cache.is_active("write_section")
+    assert response_cache.is_active("topics")
+
+    async def main():
+        await response_cache.set("outline", "k", {"sections": []})
+        assert await response_cache.get("outline", "k") is None
+
+    asyncio.run(main())
+
+def test_entries_written_while_warming_outlive_their_namespace_ttl(clock, monkeypatch):
+    monkeypatch.setenv("CACHE_TTL_TOPICS", "600")
+    response_cache = ResponseCache(backend=MemoryBackend())
+
+    async def main():
+        await response_cache.set("topics", "traffic", {"ideas": [1]})
+        with min_ttl(6 * 3600):
+            # A short-lived entry is regenerated rather than trusted until the peak
+            assert await response_cache.get("topics", "traffic") is None
+            await response_cache.set("topics", "warmed", {"ideas": [2]})
+        clock.value += 3600
+        assert await response_cache.get("topics", "traffic") is None
+        assert await response_cache.get("topics", "warmed") == {"ideas": [2]}
+
+    asyncio.run(main())
+
+def test_min_ttl_leaves_disabled_namespaces_alone():
+    with min_ttl(3600):
+        assert effective_ttl(0) == 0
+        assert effective_ttl(600) == 3600
+        assert effective_ttl(7200) == 7200
+    assert effective_ttl(600) == 600
+
+def test_warmed_search_results_stay_fresh_until_the_peak(monkeypatch):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setenv("SEARCH_CACHE_TTL", "900")
+    now = [1000.0]
+    monkeypatch.setattr(search_cache_module, "time", types.SimpleNamespace(time=lambda: now[0]))
+    search_cache = SearchCache()
+    results = [SearchResult(title="t", url="u", content="c")]
+
+    async def main():
+        await search_cache.set("traffic", results)
+        with min_ttl(6 * 3600):
+            assert (await search_cache.get("traffic"))[1] is False # Fetched again by the warmer
+            await search_cache.set("warmed", results)
+            assert (await search_cache.get("warmed"))[1] is True
+        now[0] += 3600
+        assert (await search_cache.get("warmed"))[1] is True
+        assert (await search_cache.get("traffic"))[1] is False
+
+    asyncio.run(main())
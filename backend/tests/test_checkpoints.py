@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from models.article import OutlineResponse, OutlineSection
+from services.cache import MemoryBackend
+from services.checkpoints import CheckpointStore
+
+@pytest.fixture
+def checkpoints():
+    return CheckpointStore(MemoryBackend())
+
+class Counter:
+    """A stage that counts its calls and returns `values` in turn, repeating the last."""
+    def __init__(self, *values):
+        self.values = list(values)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.values[min(self.calls, len(self.values)) - 1]
+
+def memoize(checkpoints, run_id, stage, inputs, compute, **kwargs):
+    return asyncio.run(checkpoints.memoize(run_id, stage, inputs, compute, **kwargs))
+
+def test_retry_replays_stages_with_unchanged_inputs(checkpoints):
+    section = Counter("first text", "second text")
+    assert memoize(checkpoints, "run1", "section", {"title": "Intro"}, section) == "first text"
+    assert memoize(checkpoints, "run1", "section", {"title": "Intro"}, section) == "first text"
+    assert section.calls == 1
+
+def test_changed_inputs_recompute(checkpoints):
+    section = Counter("first text", "second text")
+    memoize(checkpoints, "run1", "section", {"title": "Intro"}, section)
+    assert memoize(checkpoints, "run1", "section", {"title": "Intro, edited"}, section) == "second text"
+    assert section.calls == 2
+
+def test_runs_and_stages_are_separate(checkpoints):
+    compute = Counter("a", "b", "c")
+    memoize(checkpoints, "run1", "section", {"title": "Intro"}, compute)
+    assert memoize(checkpoints, "run2", "section", {"title": "Intro"}, compute) == "b"
+    assert memoize(checkpoints, "run1", "polish", {"title": "Intro"}, compute) == "c"
+
+def test_rejected_results_are_not_kept(checkpoints):
+    outline = Counter("fallback", "real")
+    keep = lambda value: value != "fallback"
+    assert memoize(checkpoints, "run1", "outline", "topic", outline, keep=keep) == "fallback"
+    assert memoize(checkpoints, "run1", "outline", "topic", outline, keep=keep) == "real"
+    assert memoize(checkpoints, "run1", "outline", "topic", outline, keep=keep) == "real"
+    assert outline.calls == 2
+
+def test_failed_stage_is_recomputed_on_retry(checkpoints):
+    async def fails():
+        raise RuntimeError("model timed out")
+
+    with pytest.raises(RuntimeError):
+        memoize(checkpoints, "run1", "section", 1, fails)
+    assert memoize(checkpoints, "run1", "section", 1, Counter("written")) == "written"
+
+def test_pydantic_results_are_restored_with_their_model(checkpoints):
+    response = OutlineResponse(sections=[OutlineSection(title="Intro", description="d", key_points=["k"])])
+    outline = Counter(response)
+    memoize(checkpoints, "run1", "outline", "topic", outline, model=OutlineResponse)
+    replayed = memoize(checkpoints, "run1", "outline", "topic", outline, model=OutlineResponse)
+    assert outline.calls == 1
+    assert isinstance(replayed, OutlineResponse) and replayed == response
+
+def test_nothing_is_kept_without_a_run_or_when_disabled(checkpoints, monkeypatch):
+    compute = Counter("a", "b", "c", "d")
+    memoize(checkpoints, None, "section", 1, compute)
+    assert memoize(checkpoints, None, "section", 1, compute) == "b"
+    monkeypatch.setenv("CHECKPOINTS_ENABLED", "0")
+    disabled = CheckpointStore(MemoryBackend())
+    memoize(disabled, "run1", "section", 1, compute)
+    assert memoize(disabled, "run1", "section", 1, compute) == "d"
@@ -0,0 +1,79 @@
+import types
+
+import pytest
+
+from services import circuit_breaker
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = types.SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(circuit_breaker, "time", types.SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+def tripped(clock, **kwargs) -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=30, **kwargs)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+def test_opens_after_threshold_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success() # Resets the streak
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.is_open() and not breaker.available() and not breaker.allow()
+
+def test_half_open_after_recovery_timeout_and_probe_closes(clock):
+    breaker = tripped(clock)
+    clock.value += 30
+    assert not breaker.is_open() and breaker.available()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.available() and not breaker.allow() # The one probe slot is taken
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0 and breaker.allow()
+
+def test_failed_probe_reopens(clock):
+    breaker = tripped(clock)
+    clock.value += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.is_open()
+    clock.value += 29
+    assert not breaker.allow()
+
+def test_cancelled_probe_releases_its_slot(clock):
+    breaker = tripped(clock)
+    clock.value += 30
+    assert breaker.allow()
+    breaker.release_probe() # The probe was cancelled: no verdict
+    assert breaker.state == HALF_OPEN and breaker.available()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+def test_release_probe_is_a_no_op_outside_half_open(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=30)
+    breaker.release_probe()
+    assert breaker.state == CLOSED and breaker.probes == 0
+    breaker = tripped(clock)
+    breaker.release_probe()
+    assert breaker.state == OPEN and breaker.probes == 0
+
+def test_probes_that_never_report_are_retried_after_recovery_timeout(clock):
+    breaker = tripped(clock, half_open_max_calls=2)
+    clock.value += 30
+    assert breaker.allow() and breaker.allow()
+    assert not breaker.allow()
+    clock.value += 29
+    assert not breaker.available()
+    clock.value += 1
+    assert breaker.available()
+    assert breaker.allow() and breaker.allow() # A fresh round
+    assert not breaker.allow()
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from services import deadline
+
+def test_header_can_only_shorten_the_endpoint_deadline(monkeypatch):
+    monkeypatch.setenv("REQUEST_DEADLINE_MIN", "1")
+    monkeypatch.setenv("REQUEST_DEADLINE_MAX", "300")
+    assert deadline.for_path("/api/topics/generate") == 30
+    assert deadline.for_path("/api/topics/generate", "10") == 10
+    assert deadline.for_path("/api/topics/generate", "250") == 30
+    assert deadline.for_path("/api/topics/generate", "0.01") == 1
+    assert deadline.for_path("/api/topics/generate", "nan") == 30
+    assert deadline.for_path("/api/topics/generate", "soon") == 30
+
+def test_header_on_an_unbounded_endpoint_is_capped(monkeypatch):
+    monkeypatch.setenv("REQUEST_DEADLINE_MAX", "300")
+    assert deadline.for_path("/api/jobs/abc/events") is None
+    assert deadline.for_path("/api/jobs/abc/events", "20") == 20
+    assert deadline.for_path("/api/jobs/abc/events", "9999") == 300
+
+def test_floor_never_exceeds_the_endpoint_deadline(monkeypatch):
+    monkeypatch.setenv("REQUEST_DEADLINE_TOPICS_GENERATE", "2")
+    monkeypatch.setenv("REQUEST_DEADLINE_MIN", "5")
+    assert deadline.for_path("/api/topics/generate", "1") == 2
+
+def test_expiry_cancels_downstream_work():
+    state = {}
+
+    async def downstream():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def main():
+        with deadline.scope(0.05):
+            with pytest.raises(deadline.DeadlineExceeded):
+                await deadline.wait(downstream(), "llm.gemini")
+            # Out of time: later stages fail fast without starting
+            with pytest.raises(deadline.DeadlineExceeded):
+                await deadline.wait(downstream(), "llm.gemini")
+
+    asyncio.run(asyncio.wait_for(main(), timeout=5))
+    assert state == {"cancelled": True}
+
+def test_nested_scope_cannot_extend_the_deadline():
+    async def main():
+        with deadline.scope(1):
+            with deadline.scope(60):
+                return deadline.remaining()
+
+    assert asyncio.run(main()) <= 1
@@ -0,0 +1,50 @@
+from models.topic import SearchResult
+from services.dedup import MinHashSketch, dedupe_results, shingles
+
+STORY = (
+    "The central bank held interest rates steady on Wednesday, citing cooling inflation "
+    "and a resilient labour market, while signalling that cuts could come later this year "
+    "if price growth continues to slow towards its two percent target."
+)
+OTHER = (
+    "A new smartphone with a foldable display went on sale this morning, and early "
+    "reviewers praised its battery life but questioned the durability of the hinge."
+)
+
+def result(url: str, content: str, published_date=None) -> SearchResult:
+    return SearchResult(title="News", url=url, content=content, published_date=published_date)
+
+def test_shingles_latin_and_cjk():
+    assert shingles("One two three four") == {"one two three", "two three four"}
+    assert shingles("人工智能") == {"人 工 智", "工 智 能"}
+    assert shingles("Hi") == {"hi"}
+    assert shingles("...") == set()
+
+def test_similarity_of_identical_near_and_unrelated_texts():
+    story = MinHashSketch(STORY)
+    assert story.similarity(MinHashSketch(STORY)) == 1.0
+    assert story.similarity(MinHashSketch(STORY.upper() + " Reuters")) > 0.8
+    assert story.similarity(MinHashSketch(OTHER)) < 0.1
+    assert story.similarity(MinHashSketch("")) == 0.0
+
+def test_syndicated_copy_is_dropped_and_first_kept():
+    results = [
+        result("a", STORY),
+        result("b", OTHER),
+        result("c", "Reposted: " + STORY),
+    ]
+    assert [r.url for r in dedupe_results(results)] == ["a", "b"]
+
+def test_threshold_decides_what_counts_as_a_copy():
+    half = STORY[: len(STORY) // 2]
+    results = [result("a", STORY), result("b", half)]
+    similarity = MinHashSketch(f"News {STORY}").similarity(MinHashSketch(f"News {half}"))
+    assert 0.3 < similarity < 0.7
+    assert [r.url for r in dedupe_results(results, threshold=0.7)] == ["a", "b"]
+    assert [r.url for r in dedupe_results(results, threshold=0.3)] == ["a"]
+
+def test_dropped_copy_fills_in_a_missing_date():
+    results = [result("a", STORY), result("b", STORY, "2024-05-01")]
+    kept = dedupe_results(results)
+    assert [(r.url, r.published_date) for r in kept] == [("a", "2024-05-01")]
+    assert results[0].published_date is None # Inputs are left untouched
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import StaticPool
+from sqlmodel import create_engine
+
+from api import drafts
+from models.draft import DraftCreate, DraftImageInput, DraftPatch, DraftSectionInput, SectionPatch
+from services.draft_store import DraftConflict, DraftStore, get_draft_store
+
+@pytest.fixture
+def store():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    yield DraftStore(engine)
+    engine.dispose()
+
+def new_draft(store: DraftStore, tenant: str = "acme"):
+    return asyncio.run(store.create(tenant, DraftCreate(
+        keyword="ai",
+        topic_title="AI at work",
+        sections=[
+            DraftSectionInput(title="Intro", content="Hello"),
+            DraftSectionInput(title="Body", key_points=["one"]),
+            DraftSectionInput(title="End"),
+        ],
+    )))
+
+def save(store: DraftStore, draft_id: str, tenant: str = "acme", **patch):
+    return asyncio.run(store.save(tenant, draft_id, DraftPatch(**patch)))
+
+def test_get_returns_headers_without_section_text(store):
+    draft = new_draft(store)
+    assert draft.version == 1
+    assert [(s.position, s.title, s.has_content) for s in draft.sections] == [(0, "Intro", True), (1, "Body", False), (2, "End", False)]
+    section = asyncio.run(store.get_section("acme", draft.id, 0))
+    assert section.content == "Hello" and section.version == 1
+
+def test_delta_save_bumps_only_changed_sections(store):
+    draft = new_draft(store)
+    result = save(store, draft.id, version=1, sections=[
+        SectionPatch(position=1, version=1, content="Body text"),
+        SectionPatch(position=2, title="End"), # Same as stored: not a change
+    ])
+    assert result.changed == 1 and result.version == 2
+    assert result.section_versions == {1: 2, 2: 1}
+    assert asyncio.run(store.get_section("acme", draft.id, 1)).content == "Body text"
+
+def test_unchanged_save_keeps_the_version(store):
+    draft = new_draft(store)
+    result = save(store, draft.id, version=1, topic_title="AI at work")
+    assert result.changed == 0 and result.version == 1
+
+def test_stale_draft_version_conflicts(store):
+    draft = new_draft(store)
+    save(store, draft.id, version=1, tone="Casual")
+    with pytest.raises(DraftConflict) as e:
+        save(store, draft.id, version=1, tone="Witty")
+    assert e.value.current_version == 2
+    assert asyncio.run(store.get("acme", draft.id)).tone == "Casual"
+
+def test_stale_section_version_conflicts_and_rolls_back(store):
+    draft = new_draft(store)
+    save(store, draft.id, sections=[SectionPatch(position=0, version=1, content="Edited")])
+    with pytest.raises(DraftConflict) as e:
+        save(store, draft.id, topic_title="Changed", sections=[SectionPatch(position=0, version=1, content="Other tab")])
+    assert e.value.what == "Section 0" and e.value.current_version == 2
+    current = asyncio.run(store.get("acme", draft.id))
+    assert current.topic_title == "AI at work" and current.version == 2
+
+def test_remove_and_append_sections(store):
+    draft = new_draft(store)
+    result = save(store, draft.id, removed_sections=[0], sections=[SectionPatch(position=2, title="Appendix")])
+    assert result.changed == 2
+    current = asyncio.run(store.get("acme", draft.id))
+    assert [(s.position, s.title) for s in current.sections] == [(0, "Body"), (1, "End"), (2, "Appendix")]
+    with pytest.raises(ValueError):
+        save(store, draft.id, sections=[SectionPatch(position=5, title="Gap")])
+
+def test_drafts_are_scoped_to_their_tenant(store):
+    draft = new_draft(store)
+    assert asyncio.run(store.get("other", draft.id)) is None
+    assert save(store, draft.id, tenant="other", tone="Casual") is None
+
+def test_assemble_joins_sections_and_images_are_kept(store):
+    draft = new_draft(store)
+    save(store, draft.id, images=[DraftImageInput(url="/img/1.png", section_position=0)])
+    article = asyncio.run(store.assemble("acme", draft.id))
+    assert article.content.startswith("## Intro\n\nHello\n\n## Body")
+    assert [i.url for i in asyncio.run(store.get("acme", draft.id)).images] == ["/img/1.png"]
+
+def test_autosave_endpoint_answers_conflicts_with_409(store):
+    app = FastAPI()
+    app.include_router(drafts.router)
+    app.dependency_overrides[get_draft_store] = lambda: store
+    client = TestClient(app)
+
+    draft = client.post("/api/drafts", json={"topic_title": "T", "sections": [{"title": "S"}]}).json()
+    assert client.patch(f"/api/drafts/{draft['id']}", json={"version": 1, "tone": "Casual"}).status_code == 200
+    response = client.patch(f"/api/drafts/{draft['id']}", json={"version": 1, "tone": "Witty"})
+    assert response.status_code == 409
+    assert response.json()["detail"]["current_version"] == 2
+    assert client.patch("/api/drafts/missing", json={"tone": "Witty"}).status_code == 404
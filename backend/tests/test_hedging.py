@@ -0,0 +1,45 @@
+import time
+import asyncio
+
+from services.hedging import HedgePolicy, hedged_call
+from services.metrics import metrics
+
+def policy(endpoint: str) -> HedgePolicy:
+    return HedgePolicy(endpoint, "gemini", "openai", percentile=95, min_delay=0.05, max_delay=0.05, max_rate=1.0)
+
+def test_hedge_fires_after_its_delay_and_the_loser_is_cancelled():
+    started, cancelled = {}, []
+
+    async def attempt(name: str, first_token: asyncio.Event):
+        started[name] = time.monotonic()
+        if name == "openai":
+            return "backup"
+        try:
+            await asyncio.sleep(10) # Stalls before its first token
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+
+    async def main():
+        result = await hedged_call(policy("hedge_test_stall"), attempt)
+        await asyncio.sleep(0.01) # Let the cancellation land
+        return result
+
+    assert asyncio.run(asyncio.wait_for(main(), timeout=5)) == "backup"
+    assert started["openai"] - started["gemini"] >= 0.05
+    assert cancelled == ["gemini"]
+    assert metrics.count("hedge.hedge_test_stall.fired") == 1
+    assert metrics.count("hedge.hedge_test_stall.backup_won") == 1
+
+def test_no_hedge_once_the_first_token_arrives():
+    started = []
+
+    async def attempt(name: str, first_token: asyncio.Event):
+        started.append(name)
+        first_token.set()
+        await asyncio.sleep(0.1) # Slow overall, but streaming
+        return name
+
+    assert asyncio.run(hedged_call(policy("hedge_test_streaming"), attempt)) == "gemini"
+    assert started == ["gemini"]
+    assert metrics.count("hedge.hedge_test_streaming.fired") == 0
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agents.article_job import ArticleJob
+from api import jobs
+from models.job import ArticleJobRequest, CANCELLED, QUEUED, RUNNING
+from services.cache import MemoryBackend
+from services.job_store import JobStore, get_job_store
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setenv("JOBS_BACKEND", "inline")
+    store = JobStore()
+    assert isinstance(store.backend, MemoryBackend)
+    return store
+
+@pytest.fixture
+def client(store, monkeypatch):
+    dispatched = []
+
+    async def dispatch(job, req, store, tenant):
+        dispatched.append(job.attempts)
+        return jobs.JobSubmitResponse(job_id=job.job_id, state=job.state, status_url="", events_url="")
+
+    monkeypatch.setattr(jobs, "_dispatch", dispatch)
+    app = FastAPI()
+    app.include_router(jobs.router)
+    app.dependency_overrides[get_job_store] = lambda: store
+    client = TestClient(app)
+    client.dispatched = dispatched
+    return client
+
+def new_job(store: JobStore, state: str = QUEUED):
+    async def main():
+        job = await store.create("article", request=ArticleJobRequest(keyword="ai").model_dump())
+        job.state = state
+        await store.save(job)
+        return job
+    return asyncio.run(main())
+
+def test_retry_waits_for_the_cancelled_runner_to_stop(store, client):
+    job = new_job(store, RUNNING)
+    assert client.delete(f"/api/jobs/{job.job_id}").json()["state"] == CANCELLED
+    assert client.get(f"/api/jobs/{job.job_id}").json()["state"] == CANCELLED
+    # The runner hasn't reached its next checkpoint yet: its flag must stay put
+    assert client.post(f"/api/jobs/{job.job_id}/retry").status_code == 409
+    assert asyncio.run(store.is_cancelled(job.job_id))
+
+    job.state = CANCELLED # What the runner stores once it has stopped
+    asyncio.run(store.save(job))
+    assert client.post(f"/api/jobs/{job.job_id}/retry").status_code == 202
+    assert client.dispatched == [2]
+    assert not asyncio.run(store.is_cancelled(job.job_id))
+    assert client.get(f"/api/jobs/{job.job_id}").json()["state"] == QUEUED
+
+def test_job_cancelled_while_queued_can_be_retried(store, client):
+    job = new_job(store, QUEUED)
+    client.delete(f"/api/jobs/{job.job_id}")
+    assert client.post(f"/api/jobs/{job.job_id}/retry").status_code == 202
+
+def test_running_job_cannot_be_retried(store, client):
+    job = new_job(store, RUNNING)
+    assert client.post(f"/api/jobs/{job.job_id}/retry").status_code == 409
+
+def make_runner(store: JobStore, stages) -> ArticleJob:
+    runner = ArticleJob.__new__(ArticleJob) # Just the store: the stages are stubbed
+    runner.store = store
+    runner._run_stages = lambda job, req: stages(runner, job)
+
+    async def no_draft(job, req, owner):
+        pass
+
+    runner._save_draft = no_draft
+    return runner
+
+def test_runner_of_an_earlier_attempt_stops_without_writing(store):
+    job = new_job(store, QUEUED)
+
+    async def retried_mid_stage(runner, current):
+        stored = await store.load(current.job_id)
+        stored.attempts += 1
+        stored.stage = "retried"
+        await store.save(stored)
+        current.stage = "stale"
+        await runner._checkpoint(current)
+
+    result = asyncio.run(make_runner(store, retried_mid_stage).run(job.job_id, ArticleJobRequest(keyword="ai")))
+    assert result.state == RUNNING # Never recorded
+    stored = asyncio.run(store.load(job.job_id))
+    assert stored.attempts == 2 and stored.stage == "retried"
+
+def test_redelivered_task_of_an_earlier_attempt_does_not_run(store):
+    job = new_job(store, QUEUED)
+    ran = []
+
+    async def stages(runner, current):
+        ran.append(current.attempts)
+
+    asyncio.run(make_runner(store, stages).run(job.job_id, ArticleJobRequest(keyword="ai"), attempt=0))
+    assert ran == []
+    asyncio.run(make_runner(store, stages).run(job.job_id, ArticleJobRequest(keyword="ai"), attempt=1))
+    assert ran == [1]
+
+def test_cancel_before_start_is_recorded_by_the_runner(store):
+    job = new_job(store, QUEUED)
+    asyncio.run(store.request_cancel(job.job_id))
+
+    async def stages(runner, current):
+        raise AssertionError("should not run")
+
+    asyncio.run(make_runner(store, stages).run(job.job_id, ArticleJobRequest(keyword="ai")))
+    assert asyncio.run(store.load(job.job_id)).state == CANCELLED
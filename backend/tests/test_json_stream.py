@@ -0,0 +1,45 @@
+import json
+
+from services.json_stream import JsonArrayStream
+
+PAYLOAD = {
+    "sections": [
+        {"title": "Intro", "description": "Say \"hi\" {not a brace}", "key_points": ["a", "b"]},
+        {"title": "Back\\slash ]}", "description": "nested", "key_points": [{"x": [1, 2]}]},
+        {"title": "End", "description": "", "key_points": []},
+    ],
+    "extra": [{"title": "ignored"}],
+}
+
+def feed_in_chunks(text: str, size: int, array_key: str = "sections") -> list:
+    stream = JsonArrayStream(array_key)
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(stream.feed(text[i:i + size]))
+    return items
+
+def test_every_chunk_boundary_yields_the_same_items():
+    text = json.dumps(PAYLOAD, ensure_ascii=False)
+    for size in range(1, len(text) + 1):
+        assert feed_in_chunks(text, size) == PAYLOAD["sections"], size
+
+def test_item_is_returned_as_soon_as_it_closes():
+    stream = JsonArrayStream("sections")
+    assert stream.feed('{"sections": [{"title": "A"') == []
+    assert stream.feed('}, {"title": "B"') == [{"title": "A"}]
+    assert stream.feed("}]}") == [{"title": "B"}]
+
+def test_escaped_quote_split_across_chunks():
+    stream = JsonArrayStream("sections")
+    assert stream.feed('{"sections": [{"title": "say \\') == []
+    assert stream.feed('"}\\') == []
+    assert stream.feed('" still quoted"}') == [{"title": 'say "}" still quoted'}]
+
+def test_fence_and_preamble_are_skipped():
+    text = 'Here you go:\n```json\n{"ideas": [{"title": "T1"}, {"title": "T2"}]}\n```'
+    assert feed_in_chunks(text, 7, "ideas") == [{"title": "T1"}, {"title": "T2"}]
+
+def test_other_keys_and_nested_arrays_are_not_items():
+    stream = JsonArrayStream("ideas")
+    items = stream.feed('{"meta": {"ideas": [{"title": "nested"}]}, "ideas": [[{"title": "deep"}], {"title": "top"}]}')
+    assert items == [{"title": "top"}]
@@ -0,0 +1,98 @@
+import asyncio
+
+from fastapi import FastAPI
+
+from api import middleware
+from api.middleware import AdmissionMiddleware, CancelOnDisconnectMiddleware, DeadlineMiddleware
+from services.admission import AdmissionController
+from services.metrics import metrics
+
+def make_app(handler_state: dict) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/jobs/{job_id}")
+    async def slow(job_id: str):
+        handler_state["started"] = True
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            handler_state["cancelled"] = True
+            raise
+        return {"job_id": job_id}
+
+    return app
+
+async def call(app, path: str, disconnect_after: float = None, headers=None) -> list:
+    """Drive `app` with one GET; the client disconnects after `disconnect_after` seconds if given."""
+    sent = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": headers or [], "client": ("test", 1), "server": ("test", 80),
+    }
+    await app(scope, receive, send)
+    return sent
+
+def test_disconnect_cancels_the_handler_and_counts_by_route():
+    state = {}
+    app = CancelOnDisconnectMiddleware(make_app(state))
+    before = metrics.count("cancelled.jobs/{job_id}")
+    sent = asyncio.run(asyncio.wait_for(call(app, "/api/jobs/abc123", disconnect_after=0.05), timeout=5))
+    assert state == {"started": True, "cancelled": True}
+    assert sent == [] # Nobody left to answer
+    assert metrics.count("cancelled.jobs/{job_id}") == before + 1
+    assert metrics.count("cancelled./api/jobs/abc123") == 0
+
+def test_deadline_timeout_answers_504_and_counts_by_route(monkeypatch):
+    monkeypatch.setenv("REQUEST_DEADLINE_GRACE", "0")
+    monkeypatch.setenv("REQUEST_DEADLINE_MIN", "0.05")
+    state = {}
+    app = DeadlineMiddleware(make_app(state))
+    before = metrics.count("deadline.jobs/{job_id}.timeout")
+    sent = asyncio.run(call(app, "/api/jobs/abc123", headers=[(b"x-request-timeout", b"0.05")]))
+    assert sent[0]["status"] == 504
+    assert state == {"started": True, "cancelled": True}
+    assert metrics.count("deadline.jobs/{job_id}.timeout") == before + 1
+
+def test_admission_sheds_with_503_and_retry_after_when_saturated(monkeypatch):
+    monkeypatch.setenv("ADMISSION_MAX_INFLIGHT_TOPICS_GENERATE", "1")
+    controller = AdmissionController()
+    monkeypatch.setattr(middleware, "get_admission", lambda: controller)
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.get("/api/topics/generate")
+    async def generate():
+        await release.wait()
+        return {"topics": []}
+
+    async def main():
+        first = asyncio.create_task(call(AdmissionMiddleware(app), "/api/topics/generate"))
+        while controller.inflight.get("topics/generate", 0) == 0:
+            await asyncio.sleep(0.01)
+        refused = await call(AdmissionMiddleware(app), "/api/topics/generate")
+        release.set()
+        return refused, await first
+
+    before = metrics.count("admission.topics/generate.shed")
+    refused, served = asyncio.run(asyncio.wait_for(main(), timeout=5))
+    assert refused[0]["status"] == 503
+    assert dict(refused[0]["headers"])[b"retry-after"] == b"1"
+    assert served[0]["status"] == 200
+    assert controller.inflight["topics/generate"] == 0
+    assert metrics.count("admission.topics/generate.shed") == before + 1
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from agents.outline_agent import OutlineAgent
+from models.topic import TopicIdea, TopicResponse
+from services.prefetch import OutlinePrefetcher
+
+RESULT = TopicResponse(search_summary="s", sources=[], topics=[
+    TopicIdea(title=f"Idea {i}", rationale="r", angle="a") for i in range(3)
+])
+
+@pytest.fixture
+def outlined(monkeypatch):
+    titles = []
+
+    async def generate_outline(self, topic, context, provider="gemini", use_cache=True):
+        titles.append(topic)
+
+    monkeypatch.setattr(OutlineAgent, "generate_outline", generate_outline)
+    monkeypatch.setenv("OUTLINE_PREFETCH_TOP_N", "2")
+    monkeypatch.setenv("TENANTS", "acme")
+    return titles
+
+def schedule(prefetcher: OutlinePrefetcher, *calls) -> list:
+    async def main():
+        started = [prefetcher.schedule(*call) for call in calls]
+        await asyncio.gather(*prefetcher._tasks, return_exceptions=True)
+        return started
+    return asyncio.run(main())
+
+def test_server_switch_wins_over_the_request(outlined, monkeypatch):
+    monkeypatch.setenv("OUTLINE_PREFETCH_ENABLED", "0")
+    assert schedule(OutlinePrefetcher(), ("acme", "s1", RESULT, "gemini", True)) == [0]
+    monkeypatch.setenv("OUTLINE_PREFETCH_ENABLED", "1")
+    prefetcher = OutlinePrefetcher()
+    assert schedule(prefetcher, ("acme", "s1", RESULT, "gemini", False), ("acme", "s2", RESULT, "gemini", None)) == [0, 2]
+
+def test_unknown_tenants_share_one_budget(outlined, monkeypatch):
+    monkeypatch.setenv("OUTLINE_PREFETCH_ENABLED", "1")
+    monkeypatch.setenv("OUTLINE_PREFETCH_TENANT_BURST", "2")
+    prefetcher = OutlinePrefetcher()
+    started = schedule(
+        prefetcher,
+        ("fresh-1", "s1", RESULT, "gemini"),
+        ("fresh-2", "s2", RESULT, "gemini"), # A new header value doesn't buy a new budget
+        ("acme", "s3", RESULT, "gemini"),
+    )
+    assert started == [2, 0, 2]
+    assert list(prefetcher._budgets) == ["anonymous", "acme"]
+
+def test_tenant_budgets_are_bounded(outlined, monkeypatch):
+    monkeypatch.setenv("OUTLINE_PREFETCH_ENABLED", "1")
+    monkeypatch.setenv("OUTLINE_PREFETCH_MAX_TENANTS", "2")
+    monkeypatch.setenv("TENANTS", "a,b,c")
+    prefetcher = OutlinePrefetcher()
+    schedule(prefetcher, *[(t, f"s{i}", RESULT, "gemini") for i, t in enumerate(("a", "b", "a", "c"))])
+    assert list(prefetcher._budgets) == ["a", "c"]
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from services import rate_limiter
+from services.rate_limiter import AdaptiveConcurrency, ProviderLimiter, TokenBucket, is_throttle_error
+
+class RateLimitError(Exception):
+    pass
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setenv("LLM_CONCURRENCY_GEMINI", "4")
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY_GEMINI", "5")
+    monkeypatch.setenv("LLM_THROTTLE_RETRIES", "2")
+    return ProviderLimiter("gemini")
+
+def test_success_grows_the_window_additively(limiter):
+    async def ok():
+        return "ok"
+
+    async def main():
+        for _ in range(4):
+            assert await limiter.run(10, ok) == "ok"
+
+    asyncio.run(main())
+    # +1/limit per success: about +1 after a full window of four
+    assert 4.9 < limiter.concurrency.limit < 5
+    asyncio.run(main())
+    assert limiter.concurrency.limit == 5 # Capped at LLM_MAX_CONCURRENCY_GEMINI
+
+def test_throttle_halves_the_window_and_retries(limiter, monkeypatch):
+    sleeps = []
+
+    async def no_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", no_sleep)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitError("429 Too Many Requests")
+        return "ok"
+
+    assert asyncio.run(limiter.run(10, flaky)) == "ok"
+    assert sleeps == [2, 4] # Exponential backoff between requeues
+    assert limiter.concurrency.limit == pytest.approx(1 + 1 / 1) # 4 -> 2 -> 1, then one success
+
+def test_throttle_gives_up_after_max_retries(limiter, monkeypatch):
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", no_sleep)
+
+    async def always_throttled():
+        raise asyncio.TimeoutError()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(limiter.run(10, always_throttled))
+    assert limiter.concurrency.limit == 1 # Never below LLM_MIN_CONCURRENCY
+
+def test_other_errors_neither_shrink_nor_retry(limiter):
+    attempts = []
+
+    async def broken():
+        attempts.append(1)
+        raise ValueError("bad output")
+
+    with pytest.raises(ValueError):
+        asyncio.run(limiter.run(10, broken))
+    assert attempts == [1] and limiter.concurrency.limit == 4
+
+def test_callers_over_the_limit_wait_for_a_slot():
+    concurrency = AdaptiveConcurrency(initial=2)
+
+    async def main():
+        await concurrency.acquire()
+        await concurrency.acquire()
+        third = asyncio.create_task(concurrency.acquire())
+        await asyncio.sleep(0)
+        assert not third.done() and concurrency.waiting == 1
+        await concurrency.release("ok")
+        await third
+        assert concurrency.in_flight == 2 and concurrency.waiting == 0
+
+    asyncio.run(main())
+
+def test_token_bucket_try_acquire():
+    bucket = TokenBucket(per_minute=60, capacity=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert TokenBucket(per_minute=0).try_acquire(1e9) # 0 is unlimited
+
+def test_is_throttle_error():
+    assert is_throttle_error(RateLimitError("slow down"))
+    assert is_throttle_error(Exception("Resource has been exhausted (e.g. check quota)."))
+    assert is_throttle_error(asyncio.TimeoutError())
+    assert not is_throttle_error(ValueError("invalid JSON"))
@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+
+from api.middleware import SchedulingMiddleware
+from services import scheduler
+from services.scheduler import (
+    BATCH, DEFAULT_TENANT, INTERACTIVE, PREFETCH, SYSTEM_TENANT, FairScheduler, class_for_path, known_tenant, work_context,
+)
+from services.singleflight import SingleFlight
+
+@pytest.fixture
+def make_scheduler(monkeypatch):
+    def make(capacity: int = 1, quantum: int = 2000, **env) -> FairScheduler:
+        monkeypatch.setenv("LLM_SCHEDULER_CAPACITY", str(capacity))
+        monkeypatch.setenv("LLM_SCHEDULER_QUANTUM", str(quantum))
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        fair = FairScheduler()
+        monkeypatch.setattr(scheduler, "_scheduler", fair)
+        return fair
+    return make
+
+async def run_in_order(fair: FairScheduler, calls) -> list:
+    """Queue `calls` ((work_class, tenant, cost, label), ...) behind a held slot and return their admission order."""
+    order = []
+    release = asyncio.Event()
+
+    async def call(work_class, tenant, cost, label):
+        with work_context(work_class, tenant):
+            async with fair.slot(cost):
+                order.append(label)
+                if label == "holder":
+                    await release.wait()
+
+    holder = asyncio.create_task(call(INTERACTIVE, "x", 1, "holder"))
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(call(*c)) for c in calls]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, *tasks)
+    assert sum(fair.running.values()) == 0
+    return order[1:]
+
+def test_tenants_share_a_class_by_deficit_round_robin(make_scheduler):
+    fair = make_scheduler(LLM_SCHEDULER_MAX_BATCH=1)
+    calls = [(BATCH, "a", 1000, f"a{i}") for i in range(4)] + [(BATCH, "b", 1000, f"b{i}") for i in range(2)]
+    # Each visit adds one quantum (2000): two 1000-token calls per tenant per round
+    assert asyncio.run(run_in_order(fair, calls)) == ["a0", "a1", "b0", "b1", "a2", "a3"]
+
+def test_tenant_weight_scales_its_share(make_scheduler):
+    fair = make_scheduler(LLM_SCHEDULER_MAX_BATCH=1, LLM_SCHEDULER_TENANT_WEIGHT_B=2)
+    calls = [(BATCH, "a", 1000, f"a{i}") for i in range(4)] + [(BATCH, "b", 1000, f"b{i}") for i in range(4)]
+    assert asyncio.run(run_in_order(fair, calls)) == ["a0", "a1", "b0", "b1", "b2", "b3", "a2", "a3"]
+
+def test_classes_are_served_in_strict_priority(make_scheduler):
+    fair = make_scheduler()
+    calls = [(BATCH, "a", 1, "batch"), (PREFETCH, "a", 1, "prefetch"), (INTERACTIVE, "a", 1, "interactive")]
+    assert asyncio.run(run_in_order(fair, calls)) == ["interactive", "prefetch", "batch"]
+
+def test_class_cap_leaves_room_for_other_classes(make_scheduler):
+    fair = make_scheduler(capacity=4, LLM_SCHEDULER_MAX_BATCH=1)
+
+    async def main():
+        release = asyncio.Event()
+
+        async def batch():
+            with work_context(BATCH, "a"):
+                async with fair.slot():
+                    await release.wait()
+
+        tasks = [asyncio.create_task(batch()) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert fair.running[BATCH] == 1 and fair.queued(BATCH) == 2
+        with work_context(INTERACTIVE, "b"):
+            async with fair.slot():
+                assert fair.running[INTERACTIVE] == 1
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+def test_cancelled_waiter_leaves_the_queue(make_scheduler):
+    fair = make_scheduler()
+
+    async def main():
+        release = asyncio.Event()
+
+        async def call(work_class):
+            with work_context(work_class, "a"):
+                async with fair.slot():
+                    await release.wait()
+
+        holder = asyncio.create_task(call(INTERACTIVE))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(call(BATCH))
+        await asyncio.sleep(0)
+        assert fair.queued(BATCH) == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert fair.queued(BATCH) == 0
+        release.set()
+        await holder
+        assert sum(fair.running.values()) == 0
+
+    asyncio.run(main())
+
+def test_single_flight_call_is_raised_to_its_highest_waiter(make_scheduler):
+    fair = make_scheduler(LLM_SCHEDULER_MAX_BATCH=1)
+    flight = SingleFlight("test")
+
+    async def main():
+        order = []
+        release = asyncio.Event()
+
+        async def call(label):
+            async with fair.slot():
+                order.append(label)
+                if label == "holder":
+                    await release.wait()
+                return label
+
+        with work_context(BATCH, "a"):
+            holder = asyncio.create_task(call("holder"))
+            await asyncio.sleep(0)
+            other = asyncio.create_task(call("batch"))
+            shared = asyncio.create_task(flight.do("k", lambda: call("shared")))
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+        assert fair.queued(BATCH) == 2
+
+        with work_context(INTERACTIVE, "b"):
+            joined = asyncio.create_task(flight.do("k", lambda: call("unused")))
+            await asyncio.sleep(0)
+        assert fair.queued(BATCH) == 1 and fair.queued(INTERACTIVE) == 1
+        release.set()
+        assert await joined == "shared" and await shared == "shared"
+        await asyncio.gather(holder, other)
+        assert order == ["holder", "shared", "batch"]
+        assert sum(fair.running.values()) == 0
+
+    asyncio.run(main())
+
+def test_class_for_path():
+    assert class_for_path("/api/jobs/abc/events") == BATCH
+    assert class_for_path("/api/topics/generate_batch") == BATCH
+    assert class_for_path("/api/topics/generate") == INTERACTIVE
+
+def test_only_known_tenants_get_their_own_share(monkeypatch):
+    monkeypatch.setenv("TENANTS", "acme, globex")
+    assert known_tenant("acme") == "acme"
+    assert known_tenant(" globex ") == "globex"
+    assert known_tenant("made-up-1234") == DEFAULT_TENANT
+    assert known_tenant("") == DEFAULT_TENANT
+    assert known_tenant(SYSTEM_TENANT) == DEFAULT_TENANT # Only the server's own tasks run as system
+    monkeypatch.delenv("TENANTS")
+    assert known_tenant("acme") == DEFAULT_TENANT
+
+def test_scheduling_middleware_maps_unknown_tenant_headers_to_the_default(monkeypatch):
+    monkeypatch.setenv("TENANTS", "acme")
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(scheduler.current_tenant())
+
+    middleware = SchedulingMiddleware(app)
+    for tenant in (b"acme", b"fresh-tenant-for-a-new-share"):
+        scope = {"type": "http", "path": "/api/topics/generate", "headers": [(b"x-tenant-id", tenant)]}
+        asyncio.run(middleware(scope, None, None))
+    assert seen == ["acme", DEFAULT_TENANT]
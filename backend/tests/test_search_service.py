@@ -0,0 +1,91 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from models.topic import SearchResult
+from services import circuit_breaker
+from services.circuit_breaker import OPEN
+from services.search_cache import SearchCache
+from services.search_providers import SearchProvider
+from services.search_service import SearchService
+
+class FakeProvider(SearchProvider):
+    def __init__(self, name: str, urls: List[str], delay: float = 0, error: Exception = None):
+        super().__init__(http_pool=None)
+        self.name = self.breaker = name
+        self.urls = urls
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def search(self, query: str, limit: int) -> List[SearchResult]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [SearchResult(title=url, url=url, content=f"Story {url} " * 5) for url in self.urls[:limit]]
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("SEARCH_PROVIDERS", "")
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    service = SearchService(http_pool=object())
+    service.cache = SearchCache()
+    return service
+
+def test_provider_must_implement_search():
+    class Incomplete(SearchProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete(http_pool=None)
+
+def test_results_are_merged_by_reciprocal_rank(service):
+    service.providers = [FakeProvider("one", ["a", "b", "c"]), FakeProvider("two", ["c", "d"])]
+    results = asyncio.run(service.search("query", max_results=4))
+    # c is ranked by both sources; the rest tie on rank and keep source priority
+    assert [r.url for r in results] == ["c", "a", "b", "d"]
+
+def test_source_weight_reorders_the_merge(service, monkeypatch):
+    monkeypatch.setenv("SEARCH_WEIGHT_TWO", "2")
+    service.providers = [FakeProvider("one", ["a", "b"]), FakeProvider("two", ["c", "d"])]
+    assert [r.url for r in asyncio.run(service.search("query", max_results=4))] == ["c", "d", "a", "b"]
+
+def test_failing_and_slow_sources_are_left_out(service, monkeypatch):
+    monkeypatch.setenv("SEARCH_DEADLINE_SLOW", "0.05")
+    slow = FakeProvider("slow", ["s"], delay=1)
+    broken = FakeProvider("broken", ["x"], error=RuntimeError("500"))
+    service.providers = [slow, broken, FakeProvider("ok", ["a", "b"])]
+    assert [r.url for r in asyncio.run(service.search("query"))] == ["a", "b"]
+    assert circuit_breaker.get_breaker("slow").failures == 1
+    assert circuit_breaker.get_breaker("broken").failures == 1
+    assert circuit_breaker.get_breaker("ok").failures == 0
+
+def test_open_breaker_skips_its_source(service):
+    down = FakeProvider("down", ["x"])
+    breaker = circuit_breaker.get_breaker("down")
+    breaker.failure_threshold = 1
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    service.providers = [down, FakeProvider("ok", ["a"])]
+    assert [r.url for r in asyncio.run(service.search("query"))] == ["a"]
+    assert down.calls == 0
+
+def test_concurrent_identical_searches_share_one_fan_out(service):
+    source = FakeProvider("one", ["a"], delay=0.01)
+    service.providers = [source]
+
+    async def main():
+        return await asyncio.gather(*(service.search("Same  Query") for _ in range(3)), service.search("same query"))
+
+    assert all([r.url for r in results] == ["a"] for results in asyncio.run(main()))
+    assert source.calls == 1
+
+def test_all_sources_failing_is_not_cached(service):
+    broken = FakeProvider("broken", ["x"], error=RuntimeError("500"))
+    service.providers = [broken]
+    assert asyncio.run(service.search("query")) == []
+    assert asyncio.run(service.search("query")) == []
+    assert broken.calls == 2
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import types
+
+import pytest
+
+from services import semantic_cache as semantic_cache_module
+from services.semantic_cache import HashingEmbedder, InMemoryVectorIndex, PgVectorIndex, SemanticCache
+
+@pytest.fixture
+def semantic_cache(monkeypatch):
+    monkeypatch.setenv("SEMANTIC_CACHE_ENABLED", "1")
+    monkeypatch.setenv("SEMANTIC_CACHE_EMBEDDINGS", "local")
+    return SemanticCache(index=InMemoryVectorIndex(), embedder=HashingEmbedder())
+
+def test_similar_keyword_hits_and_unrelated_misses(semantic_cache):
+    async def main():
+        await semantic_cache.store("topics:gemini", "AI in healthcare", {"ideas": ["x"]})
+        assert await semantic_cache.lookup("topics:gemini", "AI in healthcare") == {"ideas": ["x"]}
+        assert await semantic_cache.lookup("topics:gemini", "ai in  Healthcare!") == {"ideas": ["x"]}
+        assert await semantic_cache.lookup("topics:gemini", "electric cars in Norway") is None
+
+    asyncio.run(main())
+
+def test_namespaces_are_separate(semantic_cache):
+    async def main():
+        await semantic_cache.store("topics:gemini", "AI in healthcare", {"ideas": ["x"]})
+        assert await semantic_cache.lookup("topics:openai", "AI in healthcare") is None
+        assert await semantic_cache.lookup("outline:gemini", "AI in healthcare") is None
+
+    asyncio.run(main())
+
+def test_threshold_decides_a_hit(semantic_cache):
+    async def similarity(a, b):
+        va = await semantic_cache.embedder.aembed_query(a)
+        vb = await semantic_cache.embedder.aembed_query(b)
+        return sum(x * y for x, y in zip(va, vb))
+
+    score = asyncio.run(similarity("AI手机", "AI手机 趋势"))
+    assert 0 < score < 1
+
+    async def lookup():
+        await semantic_cache.store("topics:gemini", "AI手机", {"ideas": ["x"]})
+        return await semantic_cache.lookup("topics:gemini", "AI手机 趋势")
+
+    semantic_cache.threshold = score + 0.01
+    assert asyncio.run(lookup()) is None
+    semantic_cache.threshold = score - 0.01
+    assert asyncio.run(lookup()) == {"ideas": ["x"]}
+
+def test_different_numbers_or_names_never_hit(semantic_cache):
+    async def main():
+        await semantic_cache.store("topics:gemini", "iPhone 15", {"ideas": ["15"]})
+        await semantic_cache.store("topics:gemini", "2024年高考", {"ideas": ["2024"]})
+        await semantic_cache.store("topics:gemini", "Tesla 降价", {"ideas": ["tesla"]})
+        assert await semantic_cache.lookup("topics:gemini", "iPhone 16") is None
+        assert await semantic_cache.lookup("topics:gemini", "2025年高考") is None
+        assert await semantic_cache.lookup("topics:gemini", "Tesla降价") == {"ideas": ["tesla"]}
+        assert await semantic_cache.lookup("topics:gemini", "Teslo 降价") is None
+
+    asyncio.run(main())
+
+def test_model_embeddings_only_pin_numbers(monkeypatch):
+    class Embedder:
+        async def aembed_query(self, text):
+            return [1.0, 0.0] # Every text is a perfect match
+
+    monkeypatch.setenv("SEMANTIC_CACHE_ENABLED", "1")
+    model_cache = SemanticCache(index=InMemoryVectorIndex(), embedder=Embedder())
+    assert model_cache.threshold == 0.9 # The default for model embeddings
+
+    async def main():
+        await model_cache.store("topics:gemini", "best phones 2024", {"ideas": []})
+        assert await model_cache.lookup("topics:gemini", "top phones 2024") == {"ideas": []}
+        assert await model_cache.lookup("topics:gemini", "best phones 2025") is None
+
+    asyncio.run(main())
+
+def test_disabled_cache_neither_stores_nor_hits(monkeypatch):
+    monkeypatch.setenv("SEMANTIC_CACHE_ENABLED", "0")
+    disabled = SemanticCache(index=InMemoryVectorIndex(), embedder=HashingEmbedder())
+
+    async def main():
+        await disabled.store("topics:gemini", "AI", {"ideas": []})
+        assert await disabled.lookup("topics:gemini", "AI") is None
+
+    asyncio.run(main())
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            rowcount = 2
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql, params=None):
+                connection.statements.append(" ".join(sql.split()))
+
+        return Cursor()
+
+    def commit(self):
+        pass
+
+def test_pgvector_inserts_purge_expired_rows_at_most_once_per_interval(monkeypatch):
+    connection = FakeConnection()
+    index = PgVectorIndex.__new__(PgVectorIndex) # No database: the fake connection records the SQL
+    index.purge_interval = 300
+    index._ready_dims = {2}
+    index._purged_at = {}
+    index._lock = threading.Lock()
+    index._run = lambda fn: fn(connection)
+    clock = [1000.0]
+    monkeypatch.setattr(semantic_cache_module, "time", types.SimpleNamespace(monotonic=lambda: clock[0]))
+
+    def purges():
+        return [s for s in connection.statements if s.startswith("DELETE")]
+
+    asyncio.run(index.add("topics:gemini", [1.0, 0.0], "AI", "{}", 60))
+    asyncio.run(index.add("topics:gemini", [1.0, 0.0], "AI", "{}", 60))
+    assert purges() == ["DELETE FROM semantic_cache_2 WHERE expires_at <= now()"]
+    clock[0] += 300
+    asyncio.run(index.add("topics:gemini", [1.0, 0.0], "AI", "{}", 60))
+    assert len(purges()) == 2
+    assert sum(s.startswith("INSERT") for s in connection.statements) == 3
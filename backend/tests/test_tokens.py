@@ -0,0 +1,19 @@
+import types
+
+from services import tokens
+
+def test_tokenizer_failure_is_remembered(monkeypatch):
+    calls = []
+
+    def unavailable(model):
+        calls.append(model)
+        raise ConnectionError("can't fetch cl100k_base.tiktoken")
+
+    monkeypatch.setattr(tokens, "tiktoken", types.SimpleNamespace(encoding_for_model=unavailable))
+    tokens._encoding.cache_clear()
+    try:
+        assert tokens.count_tokens("hello world", "openai") == tokens.estimate_tokens("hello world")
+        assert tokens.count_tokens("你好", "openai") == 2
+        assert len(calls) == 1 # Falls back at once instead of retrying the download
+    finally:
+        tokens._encoding.cache_clear()
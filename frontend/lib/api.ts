@@ -2,6 +2,17 @@ import axios from 'axios';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
+// One ID per browser tab, so the backend can tie a topic search to the outline picked from it
+const sessionHeaders = (): Record<string, string> => {
+    if (typeof window === 'undefined') return {};
+    let id = window.sessionStorage.getItem('wecreate-session-id');
+    if (!id) {
+        id = window.crypto.randomUUID();
+        window.sessionStorage.setItem('wecreate-session-id', id);
+    }
+    return { 'X-Session-ID': id };
+};
+
 export interface SearchResult {
     title: string;
     url: string;
@@ -68,7 +79,7 @@ export const articleApi = {
         const response = await axios.post(`${API_URL}/api/articles/outline`, {
             topic_title: topic,
             search_summary: summary
-        });
+        }, { headers: sessionHeaders() });
         return response.data;
     },
 
@@ -89,7 +100,7 @@ export const topicApi = {
             keyword,
             mode: 'creative',
             model_provider: provider,
-        });
+        }, { headers: sessionHeaders() });
         return response.data;
     },
 };